@@ -0,0 +1,107 @@
+"""
+In-process caches invalidated through CacheVersion stamps.
+
+Each process keeps its own copy of small, rarely changing data (an institute's
+terms, ...) together with the version it was built from. Writers bump the
+version in the database; readers compare versions and rebuild when they differ.
+Inside a request the version is read at most once per key (memo reset by
+InstituteContextMiddleware), so repeated lookups cost no round trip.
+"""
+
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+from django.db import connection
+
+from .middleware import get_request_versions
+from .models import CacheVersion
+
+T = TypeVar("T")
+
+
+def get_version(key: str) -> int:
+    memo = get_request_versions()
+    if memo is not None and key in memo:
+        return memo[key]
+    version = (
+        CacheVersion.objects.filter(key=key).values_list("version", flat=True).first()
+        or 0
+    )
+    if memo is not None:
+        memo[key] = version
+    return version
+
+
+def bump_version(key: str) -> int:
+    """
+    Invalidate every process's copy of `key` (one upsert round trip).
+
+    The new stamp is random rather than version + 1: a bump inside a
+    transaction that later rolls back must not hand out a number that a
+    subsequent committed bump could reuse for different data.
+    """
+    table = connection.ops.quote_name(CacheVersion._meta.db_table)
+    version = secrets.randbits(62)
+    with connection.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {table} (key, version, updated_at) VALUES (%s, %s, now()) "
+            f"ON CONFLICT (key) DO UPDATE SET version = EXCLUDED.version, "
+            f"updated_at = now()",
+            [key, version],
+        )
+    memo = get_request_versions()
+    if memo is not None:
+        memo[key] = version
+    return version
+
+
+class VersionedCache(Generic[T]):
+    """
+    Process-local map key -> value, rebuilt by `loader(key)` whenever the
+    CacheVersion stamp of `version_key(key)` moves. Values must be treated
+    as read-only: they are shared across threads and requests.
+
+    With `maxsize`, the least recently used keys are evicted beyond it.
+    """
+
+    def __init__(
+        self,
+        version_key: Callable[[Hashable], str],
+        loader: Callable[..., T],
+        maxsize: Optional[int] = None,
+    ):
+        self._version_key = version_key
+        self._loader = loader
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[int, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> T:
+        version = get_version(self._version_key(key))
+        hit = self._entries.get(key)
+        if hit is not None and hit[0] == version:
+            if self._maxsize:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+            return hit[1]
+        value = self._loader(key)
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            if self._maxsize:
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Bump the stamp (all processes) and drop the local copy."""
+        bump_version(self._version_key(key))
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
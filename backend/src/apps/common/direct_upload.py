@@ -0,0 +1,205 @@
+"""
+Direct-to-bucket uploads for photos and logos.
+
+1. POST <detail>/upload-url/ {content_type}
+   -> presigned POST for a deterministic staging key
+      (incoming/<final key>), limited in size and content type by the policy
+2. the browser posts the file straight to MinIO/S3
+3. POST <detail>/upload-confirm/ {key}
+   -> the staged object is checked (size, type, decodable image, dimensions),
+      copied server-side onto the model's final key and attached; variants
+      are scheduled as for a multipart upload
+
+Upload bytes never pass through the application workers on the way in.
+Needs an S3-compatible default storage (django-storages S3Boto3Storage).
+"""
+
+import io
+import posixpath
+from typing import Dict
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from drf_spectacular.utils import extend_schema, inline_serializer
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .images import schedule_variants
+from .media import public_media_url
+
+STAGING_PREFIX = "incoming"
+PRESIGN_EXPIRES = 600  # seconds
+MIN_EDGE = 32
+MAX_EDGE = 12000
+
+CONTENT_TYPES = {
+    "image/jpeg": (".jpg", "JPEG"),
+    "image/png": (".png", "PNG"),
+    "image/webp": (".webp", "WEBP"),
+}
+
+
+class DirectUploadUnavailable(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Direct uploads need S3-compatible media storage."
+    default_code = "direct_upload_unavailable"
+
+
+def _max_bytes() -> int:
+    return getattr(settings, "DIRECT_UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+
+
+def _s3():
+    """(boto3 client, bucket name) of the default storage."""
+    bucket = getattr(default_storage, "bucket_name", None)
+    connection = getattr(default_storage, "connection", None) if bucket else None
+    if connection is None:
+        raise DirectUploadUnavailable()
+    return connection.meta.client, bucket
+
+
+def staging_key(final_key: str) -> str:
+    return posixpath.join(STAGING_PREFIX, final_key)
+
+
+def presign_upload(final_stem: str, content_type: str) -> Dict:
+    """Presigned POST for <final_stem><ext>'s staging key."""
+    if content_type not in CONTENT_TYPES:
+        raise ValidationError(
+            {"content_type": f"Must be one of: {', '.join(CONTENT_TYPES)}."}
+        )
+    client, bucket = _s3()
+    key = staging_key(final_stem + CONTENT_TYPES[content_type][0])
+    max_bytes = _max_bytes()
+    post = client.generate_presigned_post(
+        Bucket=bucket,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_bytes],
+        ],
+        ExpiresIn=PRESIGN_EXPIRES,
+    )
+    # the policy is not bound to the host: hand out the browser-facing bucket URL
+    public = getattr(settings, "DIRECT_UPLOAD_BASE", None)
+    return {
+        "url": public.rstrip("/") if public else post["url"],
+        "fields": post["fields"],
+        "key": key,
+        "expires_in": PRESIGN_EXPIRES,
+        "max_bytes": max_bytes,
+    }
+
+
+def _validate_staged(client, bucket: str, key: str) -> str:
+    """Check the staged object; returns its content type."""
+    try:
+        head = client.head_object(Bucket=bucket, Key=key)
+    except ClientError:
+        raise ValidationError({"key": "No uploaded object found for this key."})
+
+    content_type = head.get("ContentType")
+    if content_type not in CONTENT_TYPES:
+        raise ValidationError({"key": "Unsupported content type."})
+    if not 0 < head["ContentLength"] <= _max_bytes():
+        raise ValidationError({"key": "File is empty or too large."})
+
+    data = client.get_object(Bucket=bucket, Key=key)["Body"].read()
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            fmt, (w, h) = img.format, img.size
+            img.verify()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError({"key": "File is not a readable image."})
+    if fmt != CONTENT_TYPES[content_type][1]:
+        raise ValidationError({"key": f"File content is {fmt}, not {content_type}."})
+    if min(w, h) < MIN_EDGE or max(w, h) > MAX_EDGE:
+        raise ValidationError(
+            {"key": f"Image must be between {MIN_EDGE} and {MAX_EDGE} px per side."}
+        )
+    return content_type
+
+
+def confirm_upload(final_stem: str, key: str) -> str:
+    """Validate the staged upload and copy it onto its final key; returns it."""
+    expected = {staging_key(final_stem + ext) for ext, _ in CONTENT_TYPES.values()}
+    if key not in expected:
+        raise ValidationError({"key": "Key was not issued for this object."})
+    client, bucket = _s3()
+    content_type = _validate_staged(client, bucket, key)
+    final_key = final_stem + CONTENT_TYPES[content_type][0]
+    client.copy_object(
+        Bucket=bucket,
+        Key=final_key,
+        CopySource={"Bucket": bucket, "Key": key},
+        ContentType=content_type,
+        MetadataDirective="REPLACE",
+    )
+    client.delete_object(Bucket=bucket, Key=key)
+    return final_key
+
+
+class DirectUploadMixin:
+    """
+    upload-url / upload-confirm detail actions for a model with one image
+    slot. Subclasses set `upload_source_field` (ImageField or key CharField),
+    `upload_variants_field` and implement `direct_upload_stem(obj)`, the final
+    key without extension (the same key the multipart upload action writes).
+    """
+
+    upload_source_field = "photo"
+    upload_variants_field = "photo_variants"
+    upload_response_keys = ("photo_url",)
+
+    def direct_upload_stem(self, obj) -> str:
+        raise NotImplementedError
+
+    @extend_schema(
+        request=inline_serializer(
+            "DirectUploadRequest",
+            {"content_type": serializers.ChoiceField(choices=list(CONTENT_TYPES))},
+        ),
+        summary="Presigned POST for uploading the image straight to storage",
+    )
+    @action(detail=True, methods=["post"], url_path="upload-url")
+    def upload_url(self, request, pk=None):
+        obj = self.get_object()
+        presigned = presign_upload(
+            self.direct_upload_stem(obj), request.data.get("content_type")
+        )
+        return Response(presigned)
+
+    @extend_schema(
+        request=inline_serializer(
+            "DirectUploadConfirm", {"key": serializers.CharField()}
+        ),
+        summary="Validate a direct upload and attach it",
+    )
+    @action(detail=True, methods=["post"], url_path="upload-confirm")
+    def upload_confirm(self, request, pk=None):
+        obj = self.get_object()
+        field = self.upload_source_field
+        stem = self.direct_upload_stem(obj)
+        final_key = confirm_upload(stem, request.data.get("key"))
+
+        old = getattr(obj, field)
+        old_key = getattr(old, "name", old)
+        with transaction.atomic():
+            setattr(obj, field, final_key)
+            obj.save(update_fields=[field, "updated_at"])
+            schedule_variants(
+                obj,
+                source_field=field,
+                variants_field=self.upload_variants_field,
+                source_key=final_key,
+            )
+        if old_key and old_key != final_key:
+            default_storage.delete(old_key)
+        url = public_media_url(final_key)
+        return Response({k: url for k in self.upload_response_keys})
@@ -1,8 +1,7 @@
 from datetime import date
 from django.utils import timezone
 from dataclasses import dataclass
-from django.db import transaction
-from django.db.models import F
+from django.db import connection
 
 from apps.common.models import PinCounter, PinKind
 from apps.terms.services import pick_term_by_closeness
@@ -20,38 +19,81 @@ def _year2(dt: date) -> int:
     return dt.year % 100
 
 
-def _bump_and_get(
-    institute_id: int, *, kind: str, year2: int, term_no: int | None
+def _allocate_block(
+    institute_id: int, *, kind: str, year2: int, term_no: int | None, count: int = 1
 ) -> int:
-    with transaction.atomic():
-        counter, _ = PinCounter.objects.select_for_update().get_or_create(
-            institute_id=institute_id,
-            kind=kind,
-            year2=year2,
-            term_no=term_no,
-            defaults={"last_no": 0},
-        )
-        counter.last_no = F("last_no") + 1
-        counter.save(update_fields=["last_no"])
-        counter.refresh_from_db(fields=["last_no"])
-        return int(counter.last_no)
+    """
+    Advance the counter by `count` and return the new last_no, so the caller
+    owns (last_no - count, last_no]. One INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING round trip: it creates the counter on first use, and the row lock
+    is held for one statement instead of a get_or_create/UPDATE/SELECT sequence.
+    """
+    table = connection.ops.quote_name(PinCounter._meta.db_table)
+    # employee counters (term_no NULL) conflict on the partial unique index
+    target = (
+        "(institute_id, kind, year2, term_no)"
+        if term_no is not None
+        else "(institute_id, kind, year2) WHERE term_no IS NULL"
+    )
+    sql = (
+        f"INSERT INTO {table} (institute_id, kind, year2, term_no, last_no) "
+        f"VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT {target} "
+        f"DO UPDATE SET last_no = {table}.last_no + EXCLUDED.last_no "
+        f"RETURNING last_no"
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, [institute_id, kind, year2, term_no, count])
+        return int(cur.fetchone()[0])
 
 
-def generate_employee_pin(
-    *, institute_id: int, entry_date: date | None = None
-) -> PinResult:
+def reserve_employee_pins(
+    *, institute_id: int, count: int, entry_date: date | None = None
+) -> list[PinResult]:
+    """Reserve `count` consecutive EPINs in one round trip."""
+    if count <= 0:
+        return []
     d = entry_date or timezone.localdate()
     yy = _year2(d)
-    seq = _bump_and_get(institute_id, kind=PinKind.EMPLOYEE, year2=yy, term_no=None)
-    return PinResult(pin=f"E{yy:02d}{seq:03d}", year2=yy, term_no=None, seq=seq)
+    last = _allocate_block(
+        institute_id, kind=PinKind.EMPLOYEE, year2=yy, term_no=None, count=count
+    )
+    return [
+        PinResult(pin=f"E{yy:02d}{seq:03d}", year2=yy, term_no=None, seq=seq)
+        for seq in range(last - count + 1, last + 1)
+    ]
 
 
-def generate_student_pin(
-    *, institute_id: int, enquiry_date: date | None = None
-) -> PinResult:
+def reserve_student_pins(
+    *, institute_id: int, count: int, enquiry_date: date | None = None
+) -> list[PinResult]:
+    """Reserve `count` consecutive SPINs in one round trip."""
+    if count <= 0:
+        return []
     d = enquiry_date or timezone.localdate()
     yy = _year2(d)
     sel = pick_term_by_closeness(institute_id, d)
     T = int(sel.term_no)  # parsed from "TYYYY_N"
-    seq = _bump_and_get(institute_id, kind=PinKind.STUDENT, year2=yy, term_no=T)
-    return PinResult(pin=f"S{yy:02d}{T}{seq:03d}", year2=yy, term_no=T, seq=seq)
+    last = _allocate_block(
+        institute_id, kind=PinKind.STUDENT, year2=yy, term_no=T, count=count
+    )
+    return [
+        PinResult(pin=f"S{yy:02d}{T}{seq:03d}", year2=yy, term_no=T, seq=seq)
+        for seq in range(last - count + 1, last + 1)
+    ]
+
+
+def generate_employee_pin(
+    *, institute_id: int, entry_date: date | None = None
+) -> PinResult:
+    return reserve_employee_pins(
+        institute_id=institute_id, count=1, entry_date=entry_date
+    )[0]
+
+
+def generate_student_pin(
+    *, institute_id: int, enquiry_date: date | None = None
+) -> PinResult:
+    return reserve_student_pins(
+        institute_id=institute_id, count=1, enquiry_date=enquiry_date
+    )[0]
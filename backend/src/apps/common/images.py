@@ -0,0 +1,172 @@
+"""
+Resized, EXIF-free variants of uploaded photos and logos.
+
+An upload stays in storage as the source; from it we derive
+- thumb     160px WebP  (lists / grids)
+- medium    640px WebP  (detail pages)
+- original  <=2048px JPEG, orientation applied, metadata dropped
+under deterministic keys next to it (students/S251001.jpg ->
+students/variants/S251001/thumb.webp, ...). The keys are recorded in the
+model's JSON variants field, which serializers consult for ?photo_size=.
+
+Variants are built after the upload's transaction commits, on a small
+process-wide thread pool (IMAGE_VARIANTS_ASYNC=False builds them inline,
+e.g. for tests and management commands). Each change of a variants field
+sends `variants_changed` (sender=model, pk=...) for caches keyed on it.
+"""
+
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> (longest edge in px, Pillow format, extension)
+VARIANTS = {
+    "thumb": (160, "WEBP", "webp"),
+    "medium": (640, "WEBP", "webp"),
+    "original": (2048, "JPEG", "jpg"),
+}
+DEFAULT_SIZE = "original"
+
+# sent with sender=model, pk=... after a variants field was cleared or filled
+variants_changed = Signal()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def variant_key(source_key: str, name: str) -> str:
+    folder, filename = posixpath.split(source_key)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(folder, "variants", stem, f"{name}.{VARIANTS[name][2]}")
+
+
+def pick_variant(
+    source_key: Optional[str], variants: Optional[Dict[str, str]], size: Optional[str]
+) -> Optional[str]:
+    """
+    Key to serve for `size`: the requested variant, else the stripped
+    original variant, else the upload itself (variants not built yet).
+    """
+    variants = variants or {}
+    return variants.get(size or DEFAULT_SIZE) or variants.get(DEFAULT_SIZE) or source_key
+
+
+def requested_size(request) -> Optional[str]:
+    """Valid ?photo_size= of a DRF request, else None (default variant)."""
+    params = getattr(request, "query_params", None)
+    size = params.get("photo_size") if params is not None else None
+    return size if size in VARIANTS else None
+
+
+def _encode(img: Image.Image, edge: int, fmt: str) -> bytes:
+    out = img.copy()
+    out.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        out = out.convert("RGB")
+        out.save(buf, fmt, quality=85, optimize=True, progressive=True)
+    else:
+        out.save(buf, fmt, quality=80, method=4)
+    return buf.getvalue()
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """Encode all variants from the uploaded bytes (no EXIF/ICC/XMP carried over)."""
+    largest = max(edge for edge, _, _ in VARIANTS.values())
+    with Image.open(io.BytesIO(data)) as src:
+        # JPEG: let libjpeg decode at a reduced scale (still >= largest edge)
+        src.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(src)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img.load()
+    img.info.clear()
+    return {name: _encode(img, edge, fmt) for name, (edge, fmt, _) in VARIANTS.items()}
+
+
+def build_variants(source_key: str) -> Dict[str, str]:
+    """Render and store the variants of `source_key`; returns name -> key."""
+    with default_storage.open(source_key, "rb") as fh:
+        rendered = render_variants(fh.read())
+    keys = {}
+    for name, payload in rendered.items():
+        key = variant_key(source_key, name)
+        # storage does not overwrite (AWS_S3_FILE_OVERWRITE=False): replace explicitly
+        if default_storage.exists(key):
+            default_storage.delete(key)
+        keys[name] = default_storage.save(key, ContentFile(payload))
+    return keys
+
+
+def record_variants(
+    model, pk, source_field: str, variants_field: str, source_key: str, variants
+) -> bool:
+    """Store `variants` unless the source was replaced meanwhile (a newer job owns it)."""
+    manager = getattr(model, "all_objects", model._default_manager)
+    updated = manager.filter(pk=pk, **{source_field: source_key}).update(
+        **{variants_field: variants}
+    )
+    if updated:
+        variants_changed.send(sender=model, pk=pk)
+    return bool(updated)
+
+
+def _build_and_record(model, pk, source_field: str, variants_field: str, source_key: str):
+    try:
+        variants = build_variants(source_key)
+    except Exception:
+        logger.exception("Building image variants for %s failed", source_key)
+        return
+    record_variants(model, pk, source_field, variants_field, source_key, variants)
+
+
+def _run_in_worker(*args):
+    close_old_connections()
+    try:
+        _build_and_record(*args)
+    finally:
+        connection.close()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_VARIANTS_WORKERS", 2),
+                thread_name_prefix="image-variants",
+            )
+        return _executor
+
+
+def schedule_variants(
+    instance, *, source_field: str, variants_field: str, source_key: Optional[str]
+) -> None:
+    """
+    Clear the stale variants of `instance` now and rebuild them from
+    `source_key` once the current transaction commits.
+    """
+    model = type(instance)
+    manager = getattr(model, "all_objects", model._default_manager)
+    manager.filter(pk=instance.pk).update(**{variants_field: {}})
+    setattr(instance, variants_field, {})
+    variants_changed.send(sender=model, pk=instance.pk)
+    if not source_key:
+        return
+    args = (model, instance.pk, source_field, variants_field, source_key)
+    if getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, *args))
+    else:
+        transaction.on_commit(lambda: _build_and_record(*args))
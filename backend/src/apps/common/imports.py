@@ -0,0 +1,59 @@
+"""
+Row-level outcome report shared by the bulk importers (students, ledger):
+
+    {"summary": {"created", "validated", "skipped", "errors", "total_rows",
+                 "commit", "atomic"},
+     "rows": [{"row_number", "action", "errors", "instance_id"}, ...]}
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class RowOutcome:
+    row_number: int
+    action: str  # "validated" | "created" | "skipped" | "error"
+    errors: Dict[str, Any] = field(default_factory=dict)
+    instance_id: Optional[int] = None
+
+
+def summarize(outcomes: List[RowOutcome]) -> Dict[str, int]:
+    counts = {"created": 0, "validated": 0, "skipped": 0, "errors": 0}
+    for o in outcomes:
+        counts["errors" if o.action == "error" else o.action] += 1
+    return counts
+
+
+def import_report(
+    outcomes: List[RowOutcome], *, commit: bool, atomic: bool
+) -> Dict[str, Any]:
+    return {
+        "summary": {
+            **summarize(outcomes),
+            "total_rows": len(outcomes),
+            "commit": bool(commit),
+            "atomic": bool(atomic),
+        },
+        "rows": [o.__dict__ for o in outcomes],
+    }
+
+
+def error_report(row_number: int, errors: Dict[str, Any]) -> Dict[str, Any]:
+    """Report of an input rejected as a whole (missing columns, no institute...)."""
+    return {
+        "summary": {"created": 0, "validated": 0, "skipped": 0, "errors": 1},
+        "rows": [
+            RowOutcome(row_number=row_number, action="error", errors=errors).__dict__
+        ],
+    }
+
+
+class AtomicImportError(Exception):
+    """An atomic import had failing rows; `report` holds the row outcomes."""
+
+    def __init__(self, report: Dict[str, Any]):
+        super().__init__("Atomic import failed; nothing was created.")
+        self.report = report
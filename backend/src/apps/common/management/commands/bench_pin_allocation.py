@@ -0,0 +1,112 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.common.generate_pin import _allocate_block
+from apps.common.models import PinCounter, PinKind
+from apps.institutes.models import Institute
+
+# Counter scope used by the benchmark only (not a real two-digit year).
+BENCH_YEAR2 = 999
+
+
+def _locked_bump(institute_id: int, count: int) -> int:
+    """The previous get_or_create + SELECT FOR UPDATE + UPDATE + SELECT allocator."""
+    with transaction.atomic():
+        counter, _ = PinCounter.objects.select_for_update().get_or_create(
+            institute_id=institute_id,
+            kind=PinKind.EMPLOYEE,
+            year2=BENCH_YEAR2,
+            term_no=None,
+            defaults={"last_no": 0},
+        )
+        counter.last_no = F("last_no") + count
+        counter.save(update_fields=["last_no"])
+        counter.refresh_from_db(fields=["last_no"])
+        return int(counter.last_no)
+
+
+def _block_bump(institute_id: int, count: int) -> int:
+    return _allocate_block(
+        institute_id, kind=PinKind.EMPLOYEE, year2=BENCH_YEAR2, term_no=None, count=count
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure PIN allocation throughput with parallel writers on one counter "
+        "(uses a scratch counter that is removed afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, required=True)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--calls", type=int, default=250, help="Allocations per worker."
+        )
+        parser.add_argument(
+            "--block", type=int, default=1, help="PINs reserved per allocation."
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["block", "locked", "both"],
+            default="both",
+            help="block = UPDATE ... RETURNING allocator, locked = previous allocator.",
+        )
+
+    def _run(self, bump, iid, workers, calls, block):
+        PinCounter.objects.filter(year2=BENCH_YEAR2).delete()
+        results, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(workers)
+
+        def worker():
+            got = []
+            try:
+                barrier.wait()
+                for _ in range(calls):
+                    last = bump(iid, block)
+                    got.extend(range(last - block + 1, last + 1))
+            except Exception as e:  # surface in the report, do not hang
+                errors.append(e)
+            finally:
+                connection.close()
+            with lock:
+                results.extend(got)
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        PinCounter.objects.filter(year2=BENCH_YEAR2).delete()
+
+        if errors:
+            raise CommandError(f"{len(errors)} worker(s) failed: {errors[0]!r}")
+        expected = workers * calls * block
+        if sorted(results) != list(range(1, expected + 1)):
+            raise CommandError("Allocated numbers are not unique and contiguous!")
+        return elapsed, expected
+
+    def handle(self, *args, **o):
+        iid = o["institute"]
+        if not Institute.objects.filter(pk=iid).exists():
+            raise CommandError(f"Institute {iid} does not exist.")
+
+        modes = ["locked", "block"] if o["mode"] == "both" else [o["mode"]]
+        for mode in modes:
+            bump = _block_bump if mode == "block" else _locked_bump
+            elapsed, pins = self._run(bump, iid, o["workers"], o["calls"], o["block"])
+            calls = o["workers"] * o["calls"]
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{mode:>6}: {o['workers']} workers x {o['calls']} calls "
+                    f"(block={o['block']}) in {elapsed:.2f}s -> "
+                    f"{calls / elapsed:.0f} allocations/s, {pins / elapsed:.0f} PINs/s"
+                )
+            )
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.common.images import build_variants, record_variants
+from apps.employees.models import Employee
+from apps.institutes.models import Institute
+from apps.students.models import Student
+
+# (label, model, manager, source field, variants field)
+TARGETS = [
+    ("students", Student, Student.all_objects, "photo", "photo_variants"),
+    ("employees", Employee, Employee.all_objects, "photo", "photo_variants"),
+    ("institutes", Institute, Institute.objects, "logo_key", "logo_variants"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Build thumb/medium/original variants for photos and logos uploaded "
+        "before the variant pipeline (or all of them with --all)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, help="Limit to one institute.")
+        parser.add_argument(
+            "--all", action="store_true", help="Rebuild rows that already have variants."
+        )
+
+    def handle(self, *args, **o):
+        for label, model, manager, source, field in TARGETS:
+            qs = manager.exclude(**{f"{source}__isnull": True}).exclude(**{source: ""})
+            if o["institute"]:
+                key = "pk" if model is Institute else "institute_id"
+                qs = qs.filter(**{key: o["institute"]})
+            if not o["all"]:
+                qs = qs.filter(**{field: {}})
+
+            built = failed = 0
+            started = time.perf_counter()
+            for pk, key in qs.values_list("pk", source).iterator(chunk_size=500):
+                try:
+                    variants = build_variants(key)
+                except Exception as e:  # missing object, not an image, ...
+                    failed += 1
+                    self.stderr.write(f"{label} #{pk} ({key}): {e}")
+                    continue
+                if record_variants(model, pk, source, field, key, variants):
+                    built += 1
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: {built} built, {failed} failed "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
+            )
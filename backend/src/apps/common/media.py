@@ -1,47 +1,118 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from urllib.parse import quote
 from django.conf import settings
 from django.core.files.storage import default_storage
 from apps.institutes.models import Institute
+from .cache_versions import VersionedCache
+from .images import pick_variant, requested_size
 
+# institute id -> (logo_key, logo_variants), or None for a missing institute
+LOGO_CACHE_SIZE = 512
 
-def public_media_url(
-    key: Optional[str], fallback_institute_id: Optional[int] = None, timestamp: Optional[str] = None
-) -> Optional[str]:
+
+def logo_version_key(institute_id: int) -> str:
+    return f"institute-logo:{institute_id}"
+
+
+def _load_logo(institute_id: int) -> Optional[Tuple[Optional[str], Dict[str, str]]]:
+    return (
+        Institute.objects.filter(pk=institute_id)
+        .values_list("logo_key", "logo_variants")
+        .first()
+    )
+
+
+_logos = VersionedCache(logo_version_key, _load_logo, maxsize=LOGO_CACHE_SIZE)
+
+
+def institute_logo_key(institute_id: int, size: Optional[str] = None) -> Optional[str]:
+    """Key of the institute's logo in variant `size` (process cache, see above)."""
+    logo = _logos.get(institute_id)
+    if logo is None:
+        return None
+    return pick_variant(logo[0], logo[1], size)
+
+
+def invalidate_institute_logo(institute_id: int) -> None:
+    """Called (via apps/institutes/signals.py) whenever a logo or its variants change."""
+    _logos.invalidate(institute_id)
+
+
+class MediaUrlResolver:
     """
-    Build a browser-facing URL for an object key inside the media bucket.
+    Builds the media URLs of one response (typically one serialized page).
 
-    - If MEDIA_PUBLIC_BASE is set, we join it with the key.
-    - Otherwise we fall back to storage.url(key).
-    - If no key is provided, we fall back to the current institute's logo (if set).
-    - If timestamp is provided, append it as a query parameter for cache busting.
+    Settings are read once and the logo fallback is resolved once per
+    institute, so a page of photo-less rows costs at most one logo lookup;
+    across requests, the logo comes from the process cache until the
+    "institute-logo:<id>" stamp moves.
     """
 
-    if not key:
-        # Try institute fallback
-        if fallback_institute_id:
+    CONTEXT_KEY = "media_url_resolver"
+
+    def __init__(self, size: Optional[str] = None):
+        self.size = size
+        base = getattr(settings, "MEDIA_PUBLIC_BASE", None)
+        self._base = base.rstrip("/") if base else None
+        self._fallbacks: Dict[int, Optional[str]] = {}
+
+    @classmethod
+    def for_context(cls, context: dict) -> "MediaUrlResolver":
+        """The resolver shared by a serializer and its list siblings."""
+        resolver = context.get(cls.CONTEXT_KEY)
+        if resolver is None:
+            resolver = cls(requested_size(context.get("request")))
+            context[cls.CONTEXT_KEY] = resolver
+        return resolver
+
+    def fallback_key(self, institute_id: int) -> Optional[str]:
+        if institute_id not in self._fallbacks:
+            self._fallbacks[institute_id] = institute_logo_key(institute_id, self.size)
+        return self._fallbacks[institute_id]
+
+    def url(
+        self,
+        key: Optional[str],
+        fallback_institute_id: Optional[int] = None,
+        timestamp: Optional[str] = None,
+    ) -> Optional[str]:
+        if not key and fallback_institute_id:
+            key = self.fallback_key(fallback_institute_id)
+        if not key:
+            return None
+
+        if self._base:
+            url = f"{self._base}/{quote(key)}"
+        else:
             try:
-                inst = Institute.objects.only("logo_key").get(id=fallback_institute_id)
-                key = inst.logo_key
-            except Institute.DoesNotExist:
+                url = default_storage.url(key)
+            except Exception:
                 return None
 
-    if not key:
-        return None
+        # Add cache-busting timestamp if provided
+        if timestamp and url:
+            separator = "&" if "?" in url else "?"
+            url = f"{url}{separator}v={timestamp}"
+
+        return url
 
-    base = getattr(settings, "MEDIA_PUBLIC_BASE", None)
-    if base:
-        url = f"{base.rstrip('/')}/{quote(key)}"
-    else:
-        try:
-            url = default_storage.url(key)
-        except Exception:
-            return None
 
-    # Add cache-busting timestamp if provided
-    if timestamp and url:
-        separator = "&" if "?" in url else "?"
-        url = f"{url}{separator}v={timestamp}"
+def public_media_url(
+    key: Optional[str],
+    fallback_institute_id: Optional[int] = None,
+    timestamp: Optional[str] = None,
+    size: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Build a browser-facing URL for an object key inside the media bucket.
 
-    return url
+    - If MEDIA_PUBLIC_BASE is set, we join it with the key.
+    - Otherwise we fall back to storage.url(key).
+    - If no key is provided, we fall back to the current institute's logo (if set),
+      in the requested variant `size` when it has been built.
+    - If timestamp is provided, append it as a query parameter for cache busting.
+
+    For many URLs in one response use a MediaUrlResolver instead.
+    """
+    return MediaUrlResolver(size).url(key, fallback_institute_id, timestamp)
@@ -17,6 +17,21 @@ def get_current_institute_id() -> Optional[int]:
     return _current_institute_id.get()
 
 
+# Per-request memo of CacheVersion stamps (see apps.common.cache_versions):
+# None outside a request, a fresh dict for every request.
+_request_versions: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "request_versions", default=None
+)
+
+
+def reset_request_versions(active: bool = True) -> None:
+    _request_versions.set({} if active else None)
+
+
+def get_request_versions() -> Optional[dict]:
+    return _request_versions.get()
+
+
 class InstituteContextMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -27,4 +42,8 @@ class InstituteContextMiddleware:
         if getattr(user, "is_authenticated", False):
             iid = getattr(user, "institute_id", None)
         set_current_institute_id(iid)
-        return self.get_response(request)
+        reset_request_versions()
+        try:
+            return self.get_response(request)
+        finally:
+            reset_request_versions(active=False)
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+# NULL term_no rows were never deduplicated by uniq_pin_scope: fold duplicates
+# into the oldest row, keeping the highest number handed out.
+MERGE_DUPLICATES_SQL = """
+UPDATE common_pincounter AS keep
+SET last_no = d.max_no
+FROM (
+    SELECT MIN(id) AS keep_id, MAX(last_no) AS max_no
+    FROM common_pincounter
+    WHERE term_no IS NULL
+    GROUP BY institute_id, kind, year2
+    HAVING COUNT(*) > 1
+) AS d
+WHERE keep.id = d.keep_id;
+
+DELETE FROM common_pincounter AS p
+USING common_pincounter AS keep
+WHERE p.term_no IS NULL
+  AND keep.term_no IS NULL
+  AND p.institute_id = keep.institute_id
+  AND p.kind = keep.kind
+  AND p.year2 = keep.year2
+  AND p.id > keep.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('institutes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_DUPLICATES_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='pincounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('term_no__isnull', True)), fields=('institute', 'kind', 'year2'), name='uniq_pin_scope_no_term'),
+        ),
+    ]
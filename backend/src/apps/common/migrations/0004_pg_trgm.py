@@ -0,0 +1,15 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:54
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_cacheversion'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
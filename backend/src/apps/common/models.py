@@ -60,8 +60,30 @@ class PinCounter(models.Model):
         constraints = [
             models.UniqueConstraint(
                 fields=["institute", "kind", "year2", "term_no"], name="uniq_pin_scope"
-            )
+            ),
+            # NULLs are distinct in uniq_pin_scope: employee counters (no term)
+            # need their own key for ON CONFLICT in generate_pin._allocate_block
+            models.UniqueConstraint(
+                fields=["institute", "kind", "year2"],
+                condition=models.Q(term_no__isnull=True),
+                name="uniq_pin_scope_no_term",
+            ),
         ]
 
     def __str__(self):
         return f"{self.institute_id}:{self.kind}:y{self.year2}:t{self.term_no or 0} -> {self.last_no}"
+
+
+class CacheVersion(models.Model):
+    """
+    Version stamp for in-process caches (one row per cache key).
+    Writers replace it, readers compare it with the stamp their copy was built
+    from; see apps/common/cache_versions.py.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}@{self.version}"
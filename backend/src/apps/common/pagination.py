@@ -0,0 +1,267 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in composite keyset (cursor) pagination.
+
+    Only kicks in when the request carries `cursor` or `page_size`; otherwise
+    the list stays unpaginated so older clients keep working
+    (set `opt_in = False` to always paginate).
+
+    The keyset is the queryset's effective ordering (OrderingFilter / get_queryset
+    order_by / Meta.ordering) with a pk tiebreak, e.g. (-date, -id) on the ledger.
+    Pages are fetched with `WHERE (key) after (cursor) LIMIT n`, so the cost
+    does not grow with the page depth the way OFFSET does.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = "Invalid cursor"
+    opt_in = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.opt_in
+            and self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["r"])
+
+        # reversed pages walk the keyset backwards and flip the slice afterwards
+        order = [_flip(f) for f in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if cursor:
+            queryset = queryset.filter(self._after(order, cursor["p"]))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = [
+            o
+            for o in (queryset.query.order_by or queryset.model._meta.ordering or [])
+            if isinstance(o, str) and o != "?"
+        ]
+        pk_name = queryset.model._meta.pk.name
+        if not any(o.lstrip("-") in ("pk", pk_name) for o in ordering):
+            desc = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(f"-{pk_name}" if desc else pk_name)
+        return [self._normalize(o) for o in ordering]
+
+    def _normalize(self, term):
+        """Resolve `pk` and relation orderings to concrete column paths."""
+        desc, path = term.startswith("-"), term.lstrip("-")
+        field = _resolve_field(self.model, path)
+        head = path.rsplit("__", 1)[0] + "__" if "__" in path else ""
+        # a relation sorts by its key here (not the related Meta.ordering)
+        path = head + (field.attname if field.is_relation else field.name)
+        return f"-{path}" if desc else path
+
+    # ---- keyset ---------------------------------------------------------
+
+    def _after(self, order, values):
+        """
+        Lexicographic "strictly after" predicate:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        with direction and NULL placement (Postgres: NULLS LAST asc, FIRST desc)
+        taken into account per column.
+        """
+        if len(values) != len(order):
+            raise NotFound(self.invalid_cursor_message)
+
+        result, prefix = Q(), Q()
+        branches = []
+        for term, raw in zip(order, values):
+            desc, path = term.startswith("-"), term.lstrip("-")
+            field = _resolve_field(self.model, path)
+            try:
+                value = None if raw is None else field.to_python(raw)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+            step = _strictly_after(path, value, desc, field.null)
+            if step is not None:
+                branches.append(prefix & step)
+            prefix &= Q(**{f"{path}__isnull": True}) if value is None else Q(**{path: value})
+
+        if not branches:
+            return Q(pk__in=[])
+        for b in branches:
+            result |= b
+
+        # Redundant bound on the leading column so the planner can range-scan
+        # the composite index instead of evaluating the OR chain row by row.
+        lead_desc, lead = order[0].startswith("-"), order[0].lstrip("-")
+        lead_field = _resolve_field(self.model, lead)
+        lead_value = None if values[0] is None else lead_field.to_python(values[0])
+        if lead_value is not None and not lead_field.null:
+            result &= Q(**{f"{lead}__{'lte' if lead_desc else 'gte'}": lead_value})
+        return result
+
+    # ---- cursors --------------------------------------------------------
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            cursor = {"p": list(data["p"]), "r": bool(data["r"]), "o": data["o"]}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if cursor["o"] != self.ordering:
+            # the ordering changed between requests: the position means nothing
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, obj, reverse):
+        position = [_to_json(_value_of(obj, f.lstrip("-"))) for f in self.ordering]
+        payload = {"p": position, "r": reverse, "o": self.ordering}
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset cursor from a previous page's next/previous link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Page size (max %d). Passing it or `cursor` enables pagination; "
+                    "without either the full list is returned." % self.max_page_size
+                ),
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+def _flip(term):
+    return term[1:] if term.startswith("-") else f"-{term}"
+
+
+def _resolve_field(model, path):
+    field = None
+    for part in path.split("__"):
+        if field is not None:
+            model = field.related_model
+        try:
+            field = model._meta.pk if part == "pk" else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # `<fk>_id` attnames are not registered as field names
+            field = next(
+                (f for f in model._meta.concrete_fields if f.attname == part), None
+            )
+            if field is None:
+                raise
+    return field
+
+
+def _strictly_after(path, value, desc, nullable):
+    if value is None:
+        # NULLs sort last ascending / first descending in Postgres
+        return Q(**{f"{path}__isnull": False}) if desc else None
+    q = Q(**{f"{path}__{'lt' if desc else 'gt'}": value})
+    if nullable and not desc:
+        q |= Q(**{f"{path}__isnull": True})
+    return q
+
+
+def _value_of(obj, path):
+    for part in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+    return obj
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
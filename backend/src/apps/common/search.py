@@ -0,0 +1,142 @@
+"""
+Trigram (pg_trgm) name matching for people-like models (students, employees,
+custodians) with `first_name` / `last_name` columns.
+
+Candidate rows are found with the `%` operator on lower(first_name) and
+lower(last_name), which the GIN gin_trgm_ops indexes on those expressions
+serve; only the candidates are then scored with similarity(). The `%`
+prefilter uses pg_trgm's similarity_threshold (0.3 by default), so a
+requested minimum below that has no effect.
+"""
+
+from itertools import permutations
+from typing import List
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Concat, Greatest, Lower
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+TRIGRAM_THRESHOLD = 0.3
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def normalize_name(value: str | None) -> str:
+    return " ".join((value or "").split()).lower()
+
+
+def _words(q: str) -> List[str]:
+    return [w for w in q.split(" ") if len(w) > 1][:3]
+
+
+def with_name_keys(qs):
+    """Alias the lower-cased names the trigram indexes are built on."""
+    return qs.alias(_first_l=Lower("first_name"), _last_l=Lower("last_name"))
+
+
+def fuzzy_name_search(qs, q: str, *, min_similarity: float = TRIGRAM_THRESHOLD):
+    """
+    Rows whose first or last name is trigram-similar to `q`; for a query of
+    several words, rows whose first and last names match two different words
+    (in any order). Annotated with `similarity` (best of first, last and full
+    name) and ordered best first.
+    """
+    q = normalize_name(q)
+    words = _words(q)
+    if len(words) < 2:
+        match = Q(_first_l__trigram_similar=q) | Q(_last_l__trigram_similar=q)
+    else:
+        # "first last" in either order: each name must match a different word
+        match = Q()
+        for a, b in permutations(words, 2):
+            match |= Q(_first_l__trigram_similar=a, _last_l__trigram_similar=b)
+    full = Concat(F("_first_l"), Value(" "), F("_last_l"))
+    return (
+        with_name_keys(qs)
+        .filter(match)
+        .annotate(
+            similarity=Greatest(
+                TrigramSimilarity("_first_l", q),
+                TrigramSimilarity("_last_l", q),
+                TrigramSimilarity(full, q),
+                output_field=FloatField(),
+            )
+        )
+        .filter(similarity__gte=min_similarity)
+        .order_by("-similarity", "id")
+    )
+
+
+def similar_name_pairs(qs, first_name: str, last_name: str):
+    """
+    Rows whose (first, last) names are both trigram-similar to the given pair,
+    also when swapped, annotated with `similarity`: the better of the two pair
+    averages (an exact match scores 1.0).
+    """
+    fn, ln = normalize_name(first_name), normalize_name(last_name)
+    sim = TrigramSimilarity
+    straight = (sim("_first_l", fn) + sim("_last_l", ln)) / 2
+    swapped = (sim("_first_l", ln) + sim("_last_l", fn)) / 2
+    return (
+        with_name_keys(qs)
+        .filter(
+            Q(_first_l__trigram_similar=fn, _last_l__trigram_similar=ln)
+            | Q(_first_l__trigram_similar=ln, _last_l__trigram_similar=fn)
+        )
+        .annotate(similarity=Greatest(straight, swapped, output_field=FloatField()))
+    )
+
+
+def exact_name_pairs(qs, first_name: str, last_name: str):
+    """Case-insensitive (first, last) match, names also accepted swapped."""
+    fn, ln = Lower(Value(first_name.strip())), Lower(Value(last_name.strip()))
+    return with_name_keys(qs).filter(
+        Q(_first_l=fn, _last_l=ln) | Q(_first_l=ln, _last_l=fn)
+    )
+
+
+class FuzzySearchMixin:
+    """
+    Adds GET <list>/search/?q=<name>[&min_similarity=][&limit=] to a viewset of
+    a first_name/last_name model: the best trigram matches among the rows of
+    get_queryset(), serialized like the list and carrying a `similarity` score.
+    """
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", OpenApiTypes.STR, required=True),
+            OpenApiParameter(
+                "min_similarity", OpenApiTypes.FLOAT, default=TRIGRAM_THRESHOLD
+            ),
+            OpenApiParameter("limit", OpenApiTypes.INT, default=SEARCH_LIMIT),
+        ],
+        summary="Fuzzy (trigram) name search",
+    )
+    @action(detail=False, methods=["get"], url_path="search", pagination_class=None)
+    def search(self, request):
+        p = request.query_params
+        q = normalize_name(p.get("q"))
+        if len(q) < 2:
+            raise ValidationError({"q": "At least 2 characters are required."})
+        try:
+            min_similarity = float(p.get("min_similarity", TRIGRAM_THRESHOLD))
+            limit = int(p.get("limit", SEARCH_LIMIT))
+        except ValueError:
+            raise ValidationError({"detail": "min_similarity / limit must be numbers."})
+        min_similarity = min(max(min_similarity, TRIGRAM_THRESHOLD), 1.0)
+        limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+
+        rows = list(
+            fuzzy_name_search(self.get_queryset(), q, min_similarity=min_similarity)[
+                :limit
+            ]
+        )
+        data = self.get_serializer(rows, many=True).data
+        for item, row in zip(data, rows):
+            item["similarity"] = round(row.similarity, 3)
+        return Response(data)
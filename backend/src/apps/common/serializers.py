@@ -0,0 +1,23 @@
+"""Serializer building blocks shared by the apps."""
+
+from rest_framework import serializers
+
+
+class PageContextListSerializer(serializers.ListSerializer):
+    """
+    Computes something for a whole page at once and hands it to the rows
+    through the (shared) serializer context: `resolve(items)` runs one query
+    over the page and its result is stored under `context_key`. Child
+    serializers read it there and fall back to resolving a single object.
+    """
+
+    context_key: str
+
+    def resolve(self, items):
+        raise NotImplementedError
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        if items:
+            self.context[self.context_key] = self.resolve(items)
+        return super().to_representation(items)
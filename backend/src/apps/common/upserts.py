@@ -0,0 +1,39 @@
+"""
+Counter tables kept in step by deltas (rollups, ...): one row per unique key,
+whose value columns are added to rather than overwritten.
+"""
+
+from typing import Iterable, Sequence, Tuple, Type
+
+from django.db import connection, models
+
+
+def upsert_add(
+    model: Type[models.Model],
+    key_columns: Sequence[str],
+    value_columns: Sequence[str],
+    rows: Iterable[Tuple[Sequence, Sequence]],
+) -> None:
+    """
+    Add each (key, values) row to its counters in one INSERT ... ON CONFLICT
+    DO UPDATE; missing keys are inserted with the values. `key_columns` must
+    carry a unique constraint. Rows go in key order, so concurrent writers
+    lock shared rows in the same order and do not deadlock.
+    """
+    rows = sorted(rows)
+    if not rows:
+        return
+    q = connection.ops.quote_name
+    table = q(model._meta.db_table)
+    keys = ", ".join(q(c) for c in key_columns)
+    columns = ", ".join(q(c) for c in (*key_columns, *value_columns))
+    row_sql = f"({', '.join(['%s'] * (len(key_columns) + len(value_columns)))})"
+    updates = ", ".join(
+        f"{q(c)} = {table}.{q(c)} + EXCLUDED.{q(c)}" for c in value_columns
+    )
+    with connection.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {table} ({columns}) VALUES {', '.join([row_sql] * len(rows))} "
+            f"ON CONFLICT ({keys}) DO UPDATE SET {updates}",
+            [v for key, values in rows for v in (*key, *values)],
+        )
@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from apps.common.pagination import KeysetPagination
 from apps.common.permissions import HasInstitute
 
 
@@ -7,9 +8,11 @@ class ScopedModelViewSet(viewsets.ModelViewSet):
     """
     A reusable base for institute-scoped models.
     Enforces that all queries and creates are bound to request.user.institute_id.
+    Lists paginate by keyset only when `cursor`/`page_size` is passed.
     """
 
     permission_classes = [IsAuthenticated, HasInstitute]
+    pagination_class = KeysetPagination
     model = None  # must be set in subclasses
 
     def get_institute_id(self):
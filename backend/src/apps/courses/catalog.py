@@ -0,0 +1,118 @@
+"""
+Per-institute course catalog: the serialized courses and classes plus which
+classes have an instructor, cached per process and invalidated through the
+"catalog:<institute_id>" CacheVersion stamp (bumped by apps/courses/signals.py
+on writes to Course, CourseClass and CourseInstructor).
+
+Catalog endpoints answer with an ETag built from that stamp (and the date,
+as "active course" depends on it); a matching If-None-Match gets a 304
+without the catalog being loaded at all.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.common.cache_versions import VersionedCache, get_version
+
+from .models import Course, CourseClass, CourseInstructor
+from .serializers import CourseClassReadSerializer, CourseReadSerializer
+
+
+@dataclass(frozen=True)
+class Catalog:
+    # (course valid_until, serialized course), ordered by name
+    courses: Tuple[Tuple[Optional[date], dict], ...]
+    # (course valid_until, serialized class), ordered by course name, index
+    classes: Tuple[Tuple[Optional[date], dict], ...]
+    instructed: FrozenSet[int]  # class ids with >= 1 instructor
+    abbreviations: Dict[int, str]  # course id -> abbreviation
+    totals: Dict[int, int]  # course id -> total_classes
+
+    def active_classes(self, today: date) -> List[dict]:
+        return [c for until, c in self.classes if until is None or until > today]
+
+    def offered_classes(self) -> List[dict]:
+        """Classes with an instructor, shaped for the student "enroll" picker."""
+        return [
+            {
+                "id": c["id"],
+                "course_name": c["course_name"],
+                "abbr_name": self.abbreviations[c["course"]],
+                "class_number": c["index"],
+                "classes_total": self.totals[c["course"]],
+            }
+            for _, c in self.classes
+            if c["id"] in self.instructed
+        ]
+
+
+def version_key(institute_id: int) -> str:
+    return f"catalog:{institute_id}"
+
+
+def _load(institute_id: int) -> Catalog:
+    courses = list(Course.objects.filter(institute_id=institute_id).order_by("name", "id"))
+    classes = list(
+        CourseClass.objects.filter(course__institute_id=institute_id)
+        .select_related("course")
+        .order_by("course__name", "course_id", "index")
+    )
+    instructed = frozenset(
+        CourseInstructor.all_objects.filter(institute_id=institute_id)
+        .values_list("course_class_id", flat=True)
+        .distinct()
+    )
+    return Catalog(
+        courses=tuple(
+            zip(
+                [c.valid_until for c in courses],
+                CourseReadSerializer(courses, many=True).data,
+            )
+        ),
+        classes=tuple(
+            zip(
+                [cc.course.valid_until for cc in classes],
+                CourseClassReadSerializer(classes, many=True).data,
+            )
+        ),
+        instructed=instructed,
+        abbreviations={c.id: c.abbreviation for c in courses},
+        totals={c.id: c.total_classes for c in courses},
+    )
+
+
+_catalogs: VersionedCache[Catalog] = VersionedCache(version_key, _load, maxsize=512)
+
+
+def get_catalog(institute_id: int) -> Catalog:
+    return _catalogs.get(institute_id)
+
+
+def invalidate_catalog(institute_id: int) -> None:
+    _catalogs.invalidate(institute_id)
+
+
+def catalog_etag(institute_id: int) -> str:
+    stamp = get_version(version_key(institute_id))
+    return f'W/"catalog-{institute_id}-{stamp}-{timezone.now().date():%Y%m%d}"'
+
+
+def catalog_response(
+    request, institute_id: int, build: Callable[[Catalog], object]
+) -> Response:
+    """
+    304 when the client's If-None-Match matches the catalog's ETag,
+    otherwise `build(catalog)` with the ETag attached.
+    """
+    etag = catalog_etag(institute_id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(build(get_catalog(institute_id)), headers=headers)
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import Course, CourseClass, CourseInstructor
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseInstructor)
+@receiver(post_delete, sender=CourseInstructor)
+def catalog_changed(sender, instance, **kwargs):
+    """
+    Every process drops its cached catalog for the institute. The class
+    services' bulk writes run next to a Course save, which covers them.
+    """
+    invalidate_catalog(instance.institute_id)
+
+
+@receiver(post_save, sender=CourseClass)
+@receiver(post_delete, sender=CourseClass)
+def course_class_changed(sender, instance, **kwargs):
+    institute_id = (
+        Course.objects.filter(pk=instance.course_id)
+        .values_list("institute_id", flat=True)
+        .first()
+    )
+    if institute_id:
+        invalidate_catalog(institute_id)
@@ -4,7 +4,10 @@ from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from django.utils import timezone
+
 from apps.employees.selectors import q_active_instructors
+from .catalog import catalog_response
 from .models import CertificateType, Course, CourseClass, CourseInstructor
 from .serializers import (
     CourseReadSerializer,
@@ -43,15 +46,34 @@ class CourseViewSet(viewsets.ModelViewSet):
             else CourseReadSerializer
         )
 
+    def list(self, request, *args, **kwargs):
+        """Served from the cached catalog (ETag / 304)."""
+        if "ordering" in request.query_params:
+            return super().list(request, *args, **kwargs)
+        iid = getattr(request.user, "institute_id", None)
+        q = (request.query_params.get("q") or "").lower()
+
+        def build(catalog):
+            return [
+                c
+                for _, c in catalog.courses
+                if not q or q in c["name"].lower() or q in c["abbr_name"].lower()
+            ]
+
+        return catalog_response(request, iid, build)
+
     @action(detail=True, methods=["get"], url_path="classes")
     def classes(self, request, pk=None):
         iid = getattr(request.user, "institute_id", None)
-        qs = (
-            CourseClass.objects.select_related("course")
-            .filter(course__institute_id=iid, course_id=pk)
-            .order_by("index")
+        try:
+            course_id = int(pk)
+        except (TypeError, ValueError):
+            return Response([])
+        return catalog_response(
+            request,
+            iid,
+            lambda catalog: [c for _, c in catalog.classes if c["course"] == course_id],
         )
-        return Response(CourseClassReadSerializer(qs, many=True).data)
 
 
 class CourseClassViewSet(viewsets.ModelViewSet):
@@ -90,6 +112,21 @@ class CourseClassViewSet(viewsets.ModelViewSet):
             else CourseClassReadSerializer
         )
 
+    def list(self, request, *args, **kwargs):
+        """Classes of active courses, served from the cached catalog (ETag / 304)."""
+        if "ordering" in request.query_params:
+            return super().list(request, *args, **kwargs)
+        iid = getattr(request.user, "institute_id", None)
+        course = request.query_params.get("course")
+
+        def build(catalog):
+            rows = catalog.active_classes(timezone.now().date())
+            if course:
+                rows = [c for c in rows if str(c["course"]) == course]
+            return rows
+
+        return catalog_response(request, iid, build)
+
     @action(detail=False, methods=["get"], url_path="choices")
     def choices(self, request):
         return Response(
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0012_employeecareer_created_by'),
+        ('institutes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeecareer',
+            index=models.Index(fields=['institute', '-start_date', '-id'], name='emp_car_inst_start_id_idx'),
+        ),
+    ]
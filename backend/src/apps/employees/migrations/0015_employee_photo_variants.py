@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0014_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.db.models import Q
 from django.conf import settings
@@ -27,6 +29,8 @@ class Employee(InstituteScopedModel):
     last_name = models.CharField(max_length=120)
     date_of_birth = models.DateField(null=True, blank=True)
     photo = models.ImageField(upload_to="students/", null=True, blank=True)
+    # variant name -> storage key (apps/common/images.py)
+    photo_variants = models.JSONField(default=dict, blank=True)
 
     gender = models.CharField(
         max_length=12, choices=Gender.choices, null=True, blank=True
@@ -93,6 +97,15 @@ class Employee(InstituteScopedModel):
                 fields=["institute", "last_name", "first_name"], name="emp_name_idx"
             ),
             models.Index(fields=["epin"], name="emp_epin_idx"),
+            # fuzzy search / duplicate candidates (apps/common/search.py)
+            GinIndex(
+                OpClass(Lower("first_name"), name="gin_trgm_ops"),
+                name="emp_first_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Lower("last_name"), name="gin_trgm_ops"),
+                name="emp_last_trgm_idx",
+            ),
         ]
 
     def clean(self):
@@ -208,6 +221,10 @@ class EmployeeCareer(InstituteScopedModel):
             models.Index(
                 fields=["function", "start_date"], name="emp_car_fun_start_idx"
             ),
+            models.Index(
+                fields=["institute", "-start_date", "-id"],
+                name="emp_car_inst_start_id_idx",
+            ),
         ]
 
 
@@ -4,7 +4,10 @@ from django.utils import timezone
 from .models import Employee, EmployeeFunction, EmployeeCareer, EmployeeDependent
 from apps.common.generate_pin import generate_employee_pin
 from .services.dedup import has_potential_duplicate_employee
+from .services.functions import current_function_names
+from apps.common.images import pick_variant, requested_size
 from apps.common.media import public_media_url
+from apps.common.serializers import PageContextListSerializer
 
 
 class EmployeeFunctionSerializer(serializers.ModelSerializer):
@@ -93,7 +96,12 @@ class EmployeeReadSerializer(serializers.ModelSerializer):
         timestamp = None
         if hasattr(obj, "updated_at") and obj.updated_at:
             timestamp = str(int(obj.updated_at.timestamp()))
-        return public_media_url(key, timestamp=timestamp) if key else None
+        if not key:
+            return None
+        key = pick_variant(
+            key, obj.photo_variants, requested_size(self.context.get("request"))
+        )
+        return public_media_url(key, timestamp=timestamp)
 
 
 class EmployeeWriteSerializer(serializers.ModelSerializer):
@@ -131,7 +139,42 @@ class EmployeePhotoUploadResponseSerializer(serializers.Serializer):
     photo_url = serializers.URLField()
 
 
-class EmployeeCareerSerializer(serializers.ModelSerializer):
+CREATOR_FUNCTIONS = "creator_functions"
+
+
+class CreatorFunctionListSerializer(PageContextListSerializer):
+    """Current function names of the page's creators, for `created_by_function`."""
+
+    context_key = CREATOR_FUNCTIONS
+
+    def resolve(self, items):
+        return current_function_names(o.created_by_id for o in items)
+
+
+class CreatedByFieldsMixin:
+    """
+    created_by_name / created_by_function for models with a `created_by`
+    employee. Select `created_by` with the queryset and set
+    `list_serializer_class = CreatorFunctionListSerializer` in Meta.
+    """
+
+    def get_created_by_name(self, obj):
+        """Get the full name of the employee who created this record."""
+        if not obj.created_by:
+            return None
+        return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip()
+
+    def get_created_by_function(self, obj):
+        """Get the current function/role of the employee who created this record."""
+        if not obj.created_by_id:
+            return None
+        names = self.context.get(CREATOR_FUNCTIONS)
+        if names is None:  # single object
+            names = current_function_names([obj.created_by_id])
+        return names.get(obj.created_by_id)
+
+
+class EmployeeCareerSerializer(CreatedByFieldsMixin, serializers.ModelSerializer):
     employee = serializers.PrimaryKeyRelatedField(queryset=Employee.all_objects.none())
     function = serializers.PrimaryKeyRelatedField(
         queryset=EmployeeFunction.all_objects.none()
@@ -159,37 +202,7 @@ class EmployeeCareerSerializer(serializers.ModelSerializer):
             "created_by_function",
         ]
         read_only_fields = ["created_by", "function_name", "created_by_name", "created_by_function"]
-
-    def get_created_by_name(self, obj):
-        """Get the full name of the employee who created this career assignment."""
-        if not obj.created_by:
-            return None
-        return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip()
-
-    def get_created_by_function(self, obj):
-        """Get the current function/role of the employee who created this career assignment."""
-        if not obj.created_by:
-            return None
-
-        from django.utils import timezone
-
-        # Get the most recent function assignment for this employee
-        today = timezone.now().date()
-        current_function = (
-            EmployeeCareer.all_objects
-            .filter(
-                employee=obj.created_by,
-                start_date__lte=today
-            )
-            .order_by("-start_date", "-id")
-            .select_related("function")
-            .first()
-        )
-
-        if current_function and current_function.function:
-            return current_function.function.name
-
-        return None
+        list_serializer_class = CreatorFunctionListSerializer
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -308,4 +321,9 @@ class EmployeeListSerializer(serializers.ModelSerializer):
         timestamp = None
         if hasattr(obj, "updated_at") and obj.updated_at:
             timestamp = str(int(obj.updated_at.timestamp()))
-        return public_media_url(key, timestamp=timestamp) if key else None
+        if not key:
+            return None
+        key = pick_variant(
+            key, obj.photo_variants, requested_size(self.context.get("request"))
+        )
+        return public_media_url(key, timestamp=timestamp)
@@ -1,5 +1,7 @@
 from __future__ import annotations
-from django.db.models import Q
+from typing import Dict, List
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from apps.common.search import exact_name_pairs, similar_name_pairs
 from apps.employees.models import Employee
 
 
@@ -14,18 +16,46 @@ def has_potential_duplicate_employee(
     Block creation if an employee with same (first_name, last_name, DOB)
     or swapped names exists in THIS institute and is 'active' (no exit_date).
     """
-    fn = _clean(first_name)
-    ln = _clean(last_name)
-
-    return (
+    return exact_name_pairs(
         Employee.all_objects.filter(
             institute_id=institute_id,
             date_of_birth=date_of_birth,
             exit_date__isnull=True,  # treat only active rows as blockers
+        ),
+        _clean(first_name),
+        _clean(last_name),
+    ).exists()
+
+
+def possible_duplicate_employees(
+    institute_id: int, first_name: str, last_name: str, date_of_birth, *, limit=10
+) -> List[Dict]:
+    """
+    Ranked near-duplicates (trigram-similar names, also swapped) for review:
+    same date of birth first, then by name similarity. Advisory only; the
+    blocking rule stays has_potential_duplicate_employee().
+    """
+    qs = (
+        similar_name_pairs(
+            Employee.all_objects.filter(institute_id=institute_id),
+            _clean(first_name),
+            _clean(last_name),
         )
-        .filter(
-            Q(first_name__iexact=fn, last_name__iexact=ln)
-            | Q(first_name__iexact=ln, last_name__iexact=fn)  # swapped
+        .annotate(
+            same_date_of_birth=ExpressionWrapper(
+                Q(date_of_birth=date_of_birth), output_field=BooleanField()
+            )
         )
-        .exists()
+        .order_by("-same_date_of_birth", "-similarity", "id")
+        .values(
+            "id",
+            "epin",
+            "first_name",
+            "last_name",
+            "date_of_birth",
+            "exit_date",
+            "similarity",
+            "same_date_of_birth",
+        )[:limit]
     )
+    return [{**row, "similarity": round(row["similarity"], 3)} for row in qs]
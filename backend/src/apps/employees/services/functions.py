@@ -0,0 +1,29 @@
+from __future__ import annotations
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from django.utils import timezone
+
+from apps.employees.models import EmployeeCareer
+
+
+def current_function_names(
+    employee_ids: Iterable[int], on: Optional[date] = None
+) -> Dict[int, str]:
+    """
+    employee id -> name of the function of their latest career row started
+    on or before `on` (today), for all given employees in one query.
+    Employees without such a row are absent.
+    """
+    ids = {i for i in employee_ids if i}
+    if not ids:
+        return {}
+    rows = (
+        EmployeeCareer.all_objects.filter(
+            employee_id__in=ids, start_date__lte=on or timezone.now().date()
+        )
+        .order_by("employee_id", "-start_date", "-id")
+        .distinct("employee_id")
+        .values_list("employee_id", "function__name")
+    )
+    return {emp_id: name for emp_id, name in rows if name}
@@ -12,6 +12,7 @@ from django.conf import settings
 from django.utils import timezone
 
 from apps.common.permissions import HasInstitute, HasEmployeeFunctionCode
+from apps.common.pagination import KeysetPagination
 from .models import Employee, EmployeeFunction, EmployeeCareer, EmployeeDependent
 from .serializers import (
     EmployeeFunctionSerializer,
@@ -30,11 +31,15 @@ from .services.accounts import (
     create_employee_account_invite,
     reset_employee_account,
 )
+from apps.common.direct_upload import DirectUploadMixin
+from apps.common.images import schedule_variants
 from apps.common.media import public_media_url
+from apps.common.search import FuzzySearchMixin
 
 
 class ScopedModelViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, HasInstitute]
+    pagination_class = KeysetPagination
     model = None
 
     def _iid(self):
@@ -52,13 +57,17 @@ class ScopedModelViewSet(viewsets.ModelViewSet):
         serializer.save(institute_id=self._iid())
 
 
-class EmployeeViewSet(ScopedModelViewSet):
+class EmployeeViewSet(DirectUploadMixin, FuzzySearchMixin, ScopedModelViewSet):
     model = Employee
 
+    def direct_upload_stem(self, obj):
+        # same key as upload_photo (ImageField upload_to + EPIN)
+        return f"{Employee.photo.field.upload_to}{obj.epin}"
+
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             return EmployeeWriteSerializer
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return EmployeeListSerializer
         return EmployeeReadSerializer
 
@@ -86,6 +95,26 @@ class EmployeeViewSet(ScopedModelViewSet):
         )
         return qs.annotate(_current_function_name=Subquery(open_fun))
 
+    @action(detail=False, methods=["get"], url_path="dedup")
+    def dedup(self, request):
+        first = request.query_params.get("first_name", "").strip()
+        last = request.query_params.get("last_name", "").strip()
+        dob = request.query_params.get("date_of_birth", "").strip()
+        if not (first and last and dob):
+            return Response(
+                {"detail": "first_name, last_name, date_of_birth are required."},
+                status=400,
+            )
+        from .services.dedup import (
+            has_potential_duplicate_employee,
+            possible_duplicate_employees,
+        )
+
+        iid = self._iid()
+        exists = has_potential_duplicate_employee(iid, first, last, dob)
+        candidates = possible_duplicate_employees(iid, first, last, dob)
+        return Response({"duplicate": exists, "candidates": candidates})
+
     @extend_schema(
         responses={200: EmployeeFunctionSerializer(many=True)}, parameters=[]
     )
@@ -111,6 +140,12 @@ class EmployeeViewSet(ScopedModelViewSet):
             employee.photo.delete(save=False)
         object_key = f"{employee.epin}{ext}"
         employee.photo.save(object_key, file, save=True)
+        schedule_variants(
+            employee,
+            source_field="photo",
+            variants_field="photo_variants",
+            source_key=employee.photo.name,
+        )
         return Response(
             {"photo_url": public_media_url(employee.photo.name)}, status=200
         )
@@ -332,7 +367,11 @@ class EmployeeCareerViewSet(ScopedModelViewSet):
     serializer_class = EmployeeCareerSerializer
 
     def get_queryset(self):
-        qs = super().get_queryset()  # already scoped to request.user.institute_id
+        qs = (
+            super()  # already scoped to request.user.institute_id
+            .get_queryset()
+            .select_related("function", "created_by")
+        )
         params = self.request.query_params
 
         employee_id = params.get("employee")
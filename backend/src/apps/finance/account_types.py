@@ -0,0 +1,80 @@
+"""
+Process-wide registry of the (global, small) AccountType table.
+
+The whole table is loaded once per process and shared, grouped by section;
+apps/finance/signals.py bumps the "account-types" CacheVersion stamp on
+every AccountType write, which makes each process reload it on its next
+lookup. Nothing loads it at start: the first lookup of a process does.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from apps.common.cache_versions import VersionedCache
+
+from .models import AccountType
+
+VERSION_KEY = "account-types"
+
+
+@dataclass(frozen=True)
+class AccountTypeRegistry:
+    by_id: Dict[int, AccountType]  # active or not
+    # section -> active types, ordered by acc_category
+    sections: Dict[str, Tuple[AccountType, ...]]
+
+    def get(self, pk) -> Optional[AccountType]:
+        return self.by_id.get(pk)
+
+    def active(self, pk) -> Optional[AccountType]:
+        t = self.by_id.get(pk)
+        return t if t is not None and t.is_active else None
+
+    def section_of(self, pk) -> Optional[str]:
+        t = self.by_id.get(pk)
+        return t.section if t is not None else None
+
+    def in_sections(self, *sections: str) -> List[AccountType]:
+        """Active types of the sections, ordered by acc_category."""
+        types = [t for s in sections for t in self.sections.get(s, ())]
+        return sorted(types, key=lambda t: t.acc_category)
+
+    def first_active(self, section: str) -> Optional[AccountType]:
+        types = self.sections.get(section, ())
+        return types[0] if types else None
+
+
+def _load(_key=None) -> AccountTypeRegistry:
+    types = list(AccountType.objects.order_by("acc_category"))
+    sections: Dict[str, List[AccountType]] = {}
+    for t in types:
+        if t.is_active:
+            sections.setdefault(t.section, []).append(t)
+    return AccountTypeRegistry(
+        by_id={t.id: t for t in types},
+        sections={s: tuple(ts) for s, ts in sections.items()},
+    )
+
+
+_registry: VersionedCache[AccountTypeRegistry] = VersionedCache(
+    lambda _key: VERSION_KEY, _load
+)
+
+
+def account_types() -> AccountTypeRegistry:
+    """The registry (a version check, memoized per request; read-only)."""
+    return _registry.get(VERSION_KEY)
+
+
+def invalidate_account_types() -> None:
+    _registry.invalidate(VERSION_KEY)
+
+
+def active_account_type_choices() -> List[Tuple[int, str]]:
+    return [
+        (t.id, t.acc_category)
+        for t in sorted(account_types().by_id.values(), key=lambda t: t.acc_category)
+        if t.is_active
+    ]
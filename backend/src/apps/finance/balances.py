@@ -0,0 +1,276 @@
+"""
+Account balances without re-aggregating the ledger.
+
+- FinanceAccountBalance holds the current balance of every account
+- FinanceBalanceSnapshot holds, per account and month, the month's movement
+  and the closing balance
+
+FinanceLedgerEntry.save()/delete() and the bulk writers (LedgerService)
+hand their changes to rollups.apply_ledger_changes(), which calls
+apply_balance_deltas(). "Balance as of X" is then the closing of the last
+snapshot before X's month plus the entries of X's month up to X;
+running_balances() seeds its window function the same way.
+`manage.py verify_finance_balances` compares both tables with a full
+re-aggregation of the ledger.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum, Window
+
+from .models import FinanceAccountBalance, FinanceBalanceSnapshot, FinanceLedgerEntry
+
+# (institute_id, account_id, first day of the month)
+DeltaKey = Tuple[int, int, date]
+# (institute_id, account_id, category_id, date, amount) - what the
+# materialized aggregates need of a ledger entry
+EntryValues = Tuple[int, int, int, date, Decimal]
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def entry_values(entry) -> EntryValues:
+    if isinstance(entry, FinanceLedgerEntry):
+        return (
+            entry.institute_id,
+            entry.account_id,
+            entry.category_id,
+            entry.date,
+            entry.amount,
+        )
+    return entry
+
+
+def entry_deltas(
+    added: Iterable = (), removed: Iterable = ()
+) -> Dict[DeltaKey, Decimal]:
+    """Per-(account, month) movement of adding/removing entries (or EntryValues)."""
+    deltas: Dict[DeltaKey, Decimal] = defaultdict(Decimal)
+    for sign, entries in ((1, added), (-1, removed)):
+        for entry in entries:
+            iid, account_id, _, d, amount = entry_values(entry)
+            deltas[(iid, account_id, month_start(d))] += sign * Decimal(amount)
+    return deltas
+
+
+def apply_balance_deltas(deltas: Dict[DeltaKey, Decimal]) -> None:
+    """
+    Add the movements to the balances and monthly snapshots (three statements).
+
+    The balance upsert goes first and in account order: it locks the
+    accounts' balance rows, so concurrent writers of one account serialize
+    there before touching its snapshots.
+    """
+    rows = sorted((k, n) for k, n in deltas.items() if n)
+    if not rows:
+        return
+    per_account: Dict[Tuple[int, int], Decimal] = defaultdict(Decimal)
+    first_month: Dict[int, date] = {}
+    for (iid, account_id, month), n in rows:
+        per_account[(iid, account_id)] += n
+        first_month[account_id] = min(month, first_month.get(account_id, month))
+
+    balances = connection.ops.quote_name(FinanceAccountBalance._meta.db_table)
+    snapshots = connection.ops.quote_name(FinanceBalanceSnapshot._meta.db_table)
+    with connection.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {balances} (institute_id, account_id, balance) "
+            f"VALUES {', '.join(['(%s, %s, %s)'] * len(per_account))} "
+            f"ON CONFLICT (account_id) "
+            f"DO UPDATE SET balance = {balances}.balance + EXCLUDED.balance",
+            [v for key, n in sorted(per_account.items()) for v in (*key, n)],
+        )
+        cur.execute(
+            f"INSERT INTO {snapshots} (institute_id, account_id, month, net, closing) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s, 0)'] * len(rows))} "
+            f"ON CONFLICT (account_id, month) "
+            f"DO UPDATE SET net = {snapshots}.net + EXCLUDED.net",
+            [v for key, n in rows for v in (*key, n)],
+        )
+        # closings from the first touched month on: a running sum of the
+        # (few) monthly rows of the account, not of its entries
+        cur.execute(
+            f"UPDATE {snapshots} AS s SET closing = c.closing "
+            f"FROM (SELECT id, SUM(net) OVER "
+            f"(PARTITION BY account_id ORDER BY month) AS closing "
+            f"FROM {snapshots} WHERE account_id = ANY(%s)) AS c "
+            f"WHERE s.id = c.id AND s.month >= %s::date AND s.closing <> c.closing",
+            [list(first_month), min(first_month.values())],
+        )
+
+
+REBUILD_SQL = """
+WITH monthly AS (
+    SELECT institute_id, account_id,
+           date_trunc('month', date)::date AS month, SUM(amount) AS net
+    FROM finance_ledger_entry
+    WHERE %(where)s
+    GROUP BY institute_id, account_id, date_trunc('month', date)
+), snapshots AS (
+    INSERT INTO finance_balance_snapshot (institute_id, account_id, month, net, closing)
+    SELECT institute_id, account_id, month, net,
+           SUM(net) OVER (PARTITION BY account_id ORDER BY month)
+    FROM monthly
+)
+INSERT INTO finance_account_balance (institute_id, account_id, balance)
+SELECT institute_id, account_id, SUM(net) FROM monthly
+GROUP BY institute_id, account_id
+"""
+
+
+@transaction.atomic
+def rebuild_balances(institute_id: int) -> int:
+    """Recompute the institute's balances and snapshots from its ledger."""
+    FinanceBalanceSnapshot.all_objects.filter(institute_id=institute_id).delete()
+    FinanceAccountBalance.all_objects.filter(institute_id=institute_id).delete()
+    with connection.cursor() as cur:
+        cur.execute(REBUILD_SQL % {"where": "institute_id = %s"}, [institute_id])
+    return FinanceAccountBalance.all_objects.filter(institute_id=institute_id).count()
+
+
+def current_balances(institute_id: int) -> Dict[int, Decimal]:
+    return dict(
+        FinanceAccountBalance.all_objects.filter(institute_id=institute_id).values_list(
+            "account_id", "balance"
+        )
+    )
+
+
+def balances_as_of(
+    institute_id: int, on: date, account_ids: Optional[Iterable[int]] = None
+) -> Dict[int, Decimal]:
+    """
+    Balance of each account at the end of day `on`: the closing of its last
+    snapshot before `on`'s month plus that month's entries up to `on`.
+    """
+    month = month_start(on)
+    closings = FinanceBalanceSnapshot.all_objects.filter(
+        institute_id=institute_id, month__lt=month
+    )
+    tail = FinanceLedgerEntry.all_objects.filter(
+        institute_id=institute_id, date__gte=month, date__lte=on
+    )
+    if account_ids is not None:
+        closings = closings.filter(account_id__in=account_ids)
+        tail = tail.filter(account_id__in=account_ids)
+
+    out: Dict[int, Decimal] = dict(
+        closings.order_by("account_id", "-month")
+        .distinct("account_id")
+        .values_list("account_id", "closing")
+    )
+    for account_id, amount in (
+        tail.values("account_id")
+        .annotate(s=Sum("amount"))
+        .values_list("account_id", "s")
+    ):
+        out[account_id] = out.get(account_id, Decimal("0")) + amount
+    return out
+
+
+def running_balances(institute_id: int, entries: Iterable) -> Dict[int, Decimal]:
+    """
+    Running balance of the account after each entry (ordered by date, id),
+    for one page of entries.
+
+    The window function only runs from the first month the page touches per
+    account, seeded with the previous closing snapshot: the cost depends on
+    the page, not on how deep it is in the ledger. Two queries.
+    """
+    bounds: Dict[int, Tuple[date, date]] = {}  # account -> (first, last) date
+    ids = set()
+    for e in entries:
+        ids.add(e.pk)
+        lo, hi = bounds.get(e.account_id, (e.date, e.date))
+        bounds[e.account_id] = (min(lo, e.date), max(hi, e.date))
+    if not bounds:
+        return {}
+
+    seed_q, range_q = Q(pk__in=[]), Q(pk__in=[])
+    for account_id, (lo, hi) in bounds.items():
+        seed_q |= Q(account_id=account_id, month__lt=month_start(lo))
+        range_q |= Q(account_id=account_id, date__gte=month_start(lo), date__lte=hi)
+    seeds = dict(
+        FinanceBalanceSnapshot.all_objects.filter(institute_id=institute_id)
+        .filter(seed_q)
+        .order_by("account_id", "-month")
+        .distinct("account_id")
+        .values_list("account_id", "closing")
+    )
+    rows = (
+        FinanceLedgerEntry.all_objects.filter(institute_id=institute_id)
+        .filter(range_q)
+        .annotate(
+            running=Window(
+                Sum("amount"),
+                partition_by=[F("account_id")],
+                order_by=[F("date").asc(), F("id").asc()],
+            )
+        )
+        .order_by()
+        .values_list("id", "account_id", "running")
+    )
+    return {
+        pk: seeds.get(account_id, Decimal("0")) + running
+        for pk, account_id, running in rows
+        if pk in ids
+    }
+
+
+def verify_balances(institute_id: int) -> List[str]:
+    """Differences between the stored balances/snapshots and the ledger (empty when in sync)."""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT account_id, month, SUM(amount) AS net,
+                   SUM(SUM(amount)) OVER (PARTITION BY account_id ORDER BY month)
+            FROM (SELECT account_id, date_trunc('month', date)::date AS month, amount
+                  FROM finance_ledger_entry WHERE institute_id = %s) AS e
+            GROUP BY account_id, month
+            """,
+            [institute_id],
+        )
+        expected = {(a, m): (net, closing) for a, m, net, closing in cur.fetchall()}
+
+    problems: List[str] = []
+    stored = {
+        (s.account_id, s.month): (s.net, s.closing)
+        for s in FinanceBalanceSnapshot.all_objects.filter(institute_id=institute_id)
+    }
+    zero = (Decimal("0"), None)
+    for account_id, month in sorted(set(expected) | set(stored)):
+        want = expected.get((account_id, month))
+        have = stored.get((account_id, month))
+        if want is None:
+            # a month emptied by deletions keeps a zero-movement row
+            if have[0] != 0:
+                problems.append(
+                    f"account {account_id} {month:%Y-%m}: snapshot net {have[0]}, "
+                    f"ledger has no entries"
+                )
+            continue
+        if have is None or have[0] != want[0] or have[1] != want[1]:
+            net, closing = have or zero
+            problems.append(
+                f"account {account_id} {month:%Y-%m}: snapshot net/closing "
+                f"{net}/{closing}, ledger {want[0]}/{want[1]}"
+            )
+
+    totals: Dict[int, Decimal] = defaultdict(Decimal)
+    for (account_id, _), (net, _) in expected.items():
+        totals[account_id] += net
+    balances = current_balances(institute_id)
+    for account_id in sorted(set(totals) | set(balances)):
+        want = totals.get(account_id, Decimal("0"))
+        have = balances.get(account_id, Decimal("0"))
+        if have != want:
+            problems.append(f"account {account_id}: balance {have}, ledger {want}")
+    return problems
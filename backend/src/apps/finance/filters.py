@@ -1,5 +1,6 @@
 from django_filters import rest_framework as filters
-from .models import FinanceLedgerEntry, FinanceAccount, AccountType
+from .account_types import active_account_type_choices
+from .models import FinanceLedgerEntry, FinanceAccount
 
 
 class LedgerEntryFilter(filters.FilterSet):
@@ -8,15 +9,17 @@ class LedgerEntryFilter(filters.FilterSet):
         field_name="account",
         queryset=FinanceAccount.all_objects.none(),
     )
-    category = filters.ModelChoiceFilter(
+    category = filters.ChoiceFilter(
         field_name="category",
-        queryset=AccountType.objects.filter(is_active=True),
+        choices=active_account_type_choices,  # from the registry, no query
     )
-    date = filters.DateFilter(field_name="date")  # exact date; add range if needed
+    date = filters.DateFilter(field_name="date")
+    date_from = filters.DateFilter(field_name="date", lookup_expr="gte")
+    date_to = filters.DateFilter(field_name="date", lookup_expr="lte")
 
     class Meta:
         model = FinanceLedgerEntry
-        fields = ["account", "category", "date"]
+        fields = ["account", "category", "date", "date_from", "date_to"]
 
     def __init__(self, data=None, queryset=None, *, request=None, prefix=None):
         super().__init__(data=data, queryset=queryset, request=request, prefix=prefix)
@@ -0,0 +1,286 @@
+"""
+Bulk ledger entry creation: bank statement files (CSV / XLSX) and JSON
+batches.
+
+Accounts and categories are resolved from in-memory maps (by id, name or
+code; categories from the AccountType registry), the sign / section and
+debit / credit rules of FinanceLedgerEntry.clean() run in memory over all
+rows, and the valid rows are written with bulk_create plus one
+apply_ledger_changes() - a constant number of statements instead of a
+full_clean() and save() per entry.
+The report has the same shape as the student importer's
+(apps/common/imports.py).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zipfile import BadZipFile
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from apps.common.imports import (
+    AtomicImportError,
+    RowOutcome,
+    error_report,
+    import_report,
+)
+
+from .account_types import account_types
+from .models import FinanceAccount, FinanceLedgerEntry, sign_errors
+from .rollups import apply_ledger_changes
+
+REQUIRED = {"date", "category"}
+# a signed `amount`, or a bank statement's money_in / money_out pair
+AMOUNT_COLUMNS = {"amount", "money_in", "money_out"}
+COLUMNS = [
+    "date",
+    "amount",
+    "money_in",
+    "money_out",
+    "category",
+    "account",
+    "counterparty",
+    "comment",
+]
+
+MAX_BATCH_ENTRIES = 5000
+INSERT_BATCH_SIZE = 1000
+MAX_AMOUNT = Decimal("1e12")  # DecimalField(max_digits=14, decimal_places=2)
+MAX_COUNTERPARTY = FinanceLedgerEntry._meta.get_field("counterparty").max_length
+
+
+def _key(value: Any) -> str:
+    return str(value).strip().casefold()
+
+
+class _Lookup:
+    """Active accounts and categories of an institute, by id, name (and code)."""
+
+    def __init__(self, institute_id: int):
+        self.accounts: Dict[str, int] = {}
+        for pk, name in FinanceAccount.all_objects.filter(
+            institute_id=institute_id, is_active=True
+        ).values_list("id", "name"):
+            self.accounts[str(pk)] = self.accounts[_key(name)] = pk
+        self.categories: Dict[str, Tuple[int, str]] = {}
+        for t in account_types().by_id.values():
+            if t.is_active:
+                for k in (str(t.id), _key(t.code), _key(t.acc_category)):
+                    self.categories[k] = (t.id, t.section)
+
+    def account(self, value: Any) -> Optional[int]:
+        return None if value in (None, "") else self.accounts.get(_key(value))
+
+    def category(self, value: Any) -> Optional[Tuple[int, str]]:
+        return None if value in (None, "") else self.categories.get(_key(value))
+
+
+def _date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return parse_date(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    """Amounts as numbers or text ("1,250.00"); None when empty."""
+    if value in (None, ""):
+        return None
+    try:
+        amount = Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+        raise ValueError("Not a number.")
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        raise ValueError("Not a valid amount.")
+    if amount != amount.quantize(Decimal("0.01")):
+        raise ValueError("At most 2 decimal places.")
+    return amount.quantize(Decimal("0.01"))
+
+
+def _amount(row: Dict[str, Any]) -> Decimal:
+    if row.get("amount") not in (None, ""):
+        return _decimal(row["amount"])
+    money_in = _decimal(row.get("money_in")) or Decimal("0")
+    money_out = _decimal(row.get("money_out")) or Decimal("0")
+    if money_in and money_out:
+        raise ValueError("Give either money_in or money_out, not both.")
+    return money_in - abs(money_out)
+
+
+@dataclass
+class _Ready:
+    outcome: RowOutcome
+    entry: FinanceLedgerEntry
+
+
+def _validate(
+    rows: Iterable[Tuple[int, Dict[str, Any]]],
+    lookup: _Lookup,
+    *,
+    institute_id: int,
+    default_account: Optional[int],
+    created_by_id: str,
+) -> Tuple[List[RowOutcome], List[_Ready]]:
+    """FinanceLedgerEntry.clean()'s rules for every row, without a query per row."""
+    outcomes: List[RowOutcome] = []
+    ready: List[_Ready] = []
+    for row_number, row in rows:
+        errors: Dict[str, Any] = {}
+        day = _date(row.get("date"))
+        if day is None:
+            errors["date"] = "A date (YYYY-MM-DD) is required."
+        try:
+            amount = _amount(row)
+        except ValueError as e:
+            errors["amount"], amount = str(e), None
+        if row.get("account") in (None, ""):
+            account_id = default_account
+        else:
+            account_id = lookup.account(row["account"])
+        if account_id is None:
+            errors["account"] = "Unknown or inactive account."
+        category = lookup.category(row.get("category"))
+        if category is None:
+            errors["category"] = "Unknown or inactive category."
+        if amount is not None and category is not None:
+            errors = {**sign_errors(amount, category[1]), **errors}
+        counterparty = str(row.get("counterparty") or "")
+        if len(counterparty) > MAX_COUNTERPARTY:
+            errors["counterparty"] = f"At most {MAX_COUNTERPARTY} characters."
+
+        outcome = RowOutcome(
+            row_number=row_number,
+            action="error" if errors else "validated",
+            errors=errors,
+        )
+        outcomes.append(outcome)
+        if errors:
+            continue
+        entry = FinanceLedgerEntry(
+            institute_id=institute_id,
+            account_id=account_id,
+            category_id=category[0],
+            date=day,
+            amount=amount,
+            counterparty=counterparty,
+            comment=str(row.get("comment") or ""),
+            created_by_id=created_by_id,
+        )
+        entry.set_sides()
+        ready.append(_Ready(outcome, entry))
+    return outcomes, ready
+
+
+def import_ledger_rows(
+    institute_id: int,
+    rows: Iterable[Tuple[int, Dict[str, Any]]],
+    *,
+    created_by_id: str,
+    account: Optional[Any] = None,
+    commit: bool = False,
+    atomic: bool = False,
+) -> Dict[str, Any]:
+    """
+    Validate (and with `commit`, create) ledger entries from
+    (row_number, {column: value}) pairs. `account` is the default account of
+    rows without one (a bank statement's account).
+
+    - commit=False: dry-run
+    - commit=True: the valid rows are created, errors reported per row
+    - commit=True, atomic=True: nothing is written when any row fails;
+      raises AtomicImportError
+    """
+    lookup = _Lookup(institute_id)
+    default_account = lookup.account(account)
+    if account not in (None, "") and default_account is None:
+        return error_report(0, {"account": "Unknown or inactive account."})
+
+    outcomes, ready = _validate(
+        rows,
+        lookup,
+        institute_id=institute_id,
+        default_account=default_account,
+        created_by_id=created_by_id,
+    )
+    if commit and atomic and len(ready) != len(outcomes):
+        raise AtomicImportError(import_report(outcomes, commit=commit, atomic=atomic))
+    if commit and ready:
+        entries = [r.entry for r in ready]
+        with transaction.atomic():
+            FinanceLedgerEntry.all_objects.bulk_create(
+                entries, batch_size=INSERT_BATCH_SIZE
+            )
+            apply_ledger_changes(added=entries)
+        for r in ready:
+            r.outcome.action, r.outcome.instance_id = "created", r.entry.pk
+    return import_report(outcomes, commit=commit, atomic=atomic)
+
+
+# ---- statement files --------------------------------------------------------
+
+
+def _sheet_rows(header: Iterable[Any], rows: Iterable[Iterable[Any]]) -> Iterator:
+    """(row number, {column: value}) per non-empty line; header is row 1."""
+    names = [_key(h or "") for h in header]
+    for i, values in enumerate(rows, start=2):
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield i, {n: v for n, v in zip(names, values) if n in COLUMNS}
+
+
+def statement_rows(file_obj) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Rows of an uploaded .csv or .xlsx statement; ValueError on a bad header
+    or a file that cannot be read as either.
+    """
+    name = (getattr(file_obj, "name", "") or "").lower()
+    try:
+        if name.endswith(".csv"):
+            return _csv_rows(file_obj)
+        return _xlsx_rows(file_obj)
+    except (csv.Error, BadZipFile, InvalidFileException, KeyError) as e:
+        raise ValueError(f"Not a readable .csv or .xlsx file: {e}") from e
+
+
+def _csv_rows(file_obj) -> List[Tuple[int, Dict[str, Any]]]:
+    raw = getattr(file_obj, "file", file_obj)  # the UploadedFile's stream
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    lines = csv.reader(text)
+    header = next(lines, [])
+    _check_header(header)
+    return list(_sheet_rows(header, lines))
+
+
+def _xlsx_rows(file_obj) -> List[Tuple[int, Dict[str, Any]]]:
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        lines = wb.active.iter_rows(values_only=True)
+        header = next(lines, ())
+        _check_header(header)
+        return list(_sheet_rows(header, lines))
+    finally:
+        wb.close()
+
+
+def _check_header(header: Iterable[Any]) -> None:
+    names = {_key(h or "") for h in header}
+    missing = sorted(REQUIRED - names)
+    if not names & AMOUNT_COLUMNS:
+        missing.append("amount (or money_in / money_out)")
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
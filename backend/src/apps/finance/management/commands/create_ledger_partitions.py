@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.finance.partitions import (
+    MOVE_BATCH_SIZE,
+    YEARS_AHEAD,
+    ensure_partitions,
+    is_partitioned,
+    partition_ledger,
+    partition_years,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the yearly finance_ledger_entry partitions ahead of time. "
+        "On a ledger still being partitioned (migration 0005 on a filled "
+        "table), first copy its rows over one batch per transaction, which "
+        "can be stopped and resumed, then swap the tables under a lock held "
+        "only for the rows written meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--years-ahead",
+            type=int,
+            default=YEARS_AHEAD,
+            help=f"Years after the current one to cover (default {YEARS_AHEAD}).",
+        )
+        parser.add_argument(
+            "--from-year",
+            type=int,
+            help="Also create the partitions of earlier years, from this one.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MOVE_BATCH_SIZE,
+            help="Rows per transaction when copying an unpartitioned table.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            copied = partition_ledger(
+                batch_size=options["batch_size"],
+                years_ahead=options["years_ahead"],
+                progress=lambda n: self.stdout.write(f"  copied {n} entries"),
+            )
+            self.stdout.write(f"Partitioned the ledger ({copied} entries copied).")
+        created = ensure_partitions(
+            timezone.localdate().year + options["years_ahead"],
+            from_year=options["from_year"],
+        )
+        for name in created:
+            self.stdout.write(f"  created {name}")
+        years = partition_years()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ledger partitions: {years[0]}-{years[-1]} ({len(created)} new)."
+            )
+        )
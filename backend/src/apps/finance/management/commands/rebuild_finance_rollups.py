@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.models import FinanceLedgerEntry
+from apps.finance.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recount the FinanceMonthlyRollup table (period reports) from the ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--institute", type=int, help="Only rebuild this institute id."
+        )
+
+    def handle(self, *args, **options):
+        if options["institute"]:
+            institutes = [options["institute"]]
+        else:
+            institutes = list(
+                FinanceLedgerEntry.all_objects.order_by()
+                .values_list("institute_id", flat=True)
+                .distinct()
+            )
+        for iid in institutes:
+            started = time.perf_counter()
+            buckets = rebuild_rollups(iid)
+            self.stdout.write(
+                f"  institute {iid}: {buckets} buckets "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt finance rollups of {len(institutes)} institutes.")
+        )
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.balances import rebuild_balances, verify_balances
+from apps.finance.models import FinanceLedgerEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the materialized account balances and monthly snapshots "
+        "against a full re-aggregation of the ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, help="Only check this institute id.")
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rebuild the balances of institutes that are out of sync.",
+        )
+
+    def handle(self, *args, **options):
+        if options["institute"]:
+            institutes = [options["institute"]]
+        else:
+            institutes = list(
+                FinanceLedgerEntry.all_objects.order_by()
+                .values_list("institute_id", flat=True)
+                .distinct()
+            )
+        broken = 0
+        for iid in institutes:
+            started = time.perf_counter()
+            problems = verify_balances(iid)
+            elapsed = time.perf_counter() - started
+            if not problems:
+                self.stdout.write(f"  institute {iid}: in sync ({elapsed:.2f}s)")
+                continue
+            broken += 1
+            self.stdout.write(
+                self.style.WARNING(f"  institute {iid}: {len(problems)} differences")
+            )
+            for line in problems:
+                self.stdout.write(f"    {line}")
+            if options["repair"]:
+                accounts = rebuild_balances(iid)
+                self.stdout.write(f"    rebuilt {accounts} account balances")
+
+        if broken and not options["repair"]:
+            raise CommandError(
+                f"{broken} of {len(institutes)} institutes out of sync (use --repair)."
+            )
+        self.stdout.write(self.style.SUCCESS(f"Checked {len(institutes)} institutes."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        ('institutes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financeledgerentry',
+            index=models.Index(fields=['institute', '-date', '-id'], name='ledger_inst_date_id_idx'),
+        ),
+    ]
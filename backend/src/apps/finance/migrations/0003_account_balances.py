@@ -0,0 +1,61 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# initial balances and monthly snapshots from the existing ledger
+BACKFILL_SQL = """
+WITH monthly AS (
+    SELECT institute_id, account_id,
+           date_trunc('month', date)::date AS month, SUM(amount) AS net
+    FROM finance_ledger_entry
+    GROUP BY institute_id, account_id, date_trunc('month', date)
+), snapshots AS (
+    INSERT INTO finance_balance_snapshot (institute_id, account_id, month, net, closing)
+    SELECT institute_id, account_id, month, net,
+           SUM(net) OVER (PARTITION BY account_id ORDER BY month)
+    FROM monthly
+)
+INSERT INTO finance_account_balance (institute_id, account_id, balance)
+SELECT institute_id, account_id, SUM(net) FROM monthly
+GROUP BY institute_id, account_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_financeledgerentry_ledger_inst_date_id_idx'),
+        ('institutes', '0002_institute_logo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceAccountBalance',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_balance', serialize=False, to='finance.financeaccount')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+            ],
+            options={
+                'db_table': 'finance_account_balance',
+            },
+        ),
+        migrations.CreateModel(
+            name='FinanceBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('closing', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='finance.financeaccount')),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+            ],
+            options={
+                'db_table': 'finance_balance_snapshot',
+                'constraints': [models.UniqueConstraint(fields=('account', 'month'), name='uq_balance_snapshot_month')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
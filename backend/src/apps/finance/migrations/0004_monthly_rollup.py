@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# initial rollup from the existing ledger
+BACKFILL_SQL = """
+INSERT INTO finance_monthly_rollup
+    (institute_id, month, account_id, category_id, inflow, outflow, entries)
+SELECT institute_id, date_trunc('month', date)::date, account_id, category_id,
+       COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+       COALESCE(-SUM(amount) FILTER (WHERE amount < 0), 0),
+       COUNT(*)
+FROM finance_ledger_entry
+GROUP BY institute_id, date_trunc('month', date), account_id, category_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_account_balances'),
+        ('institutes', '0002_institute_logo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('inflow', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('outflow', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('entries', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='finance.financeaccount')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='finance.accounttype')),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+            ],
+            options={
+                'db_table': 'finance_monthly_rollup',
+                'constraints': [models.UniqueConstraint(fields=('institute', 'month', 'account', 'category'), name='uq_finance_rollup_key')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def partition_ledger(apps, schema_editor):
+    from apps.finance.partitions import (
+        TABLE,
+        prepare_partitioned_ledger,
+        swap_partitioned_ledger,
+    )
+
+    # only the partitioned structure here: a filled ledger's rows are copied by
+    # `manage.py create_ledger_partitions` (batch by batch, then a short swap)
+    if not prepare_partitioned_ledger():
+        return
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM {schema_editor.quote_name(TABLE)})")
+        empty = not cur.fetchone()[0]
+    if empty:
+        swap_partitioned_ledger()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_monthly_rollup'),
+    ]
+
+    operations = [
+        # reversing keeps the partitioned table: it serves the model as is
+        migrations.RunPython(partition_ledger, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from apps.common.models import InstituteScopedModel, TimeStampedModel
 
 
@@ -40,6 +40,17 @@ class FinanceAccount(InstituteScopedModel):
         return f"{self.name} ({self.kind})"
 
 
+def sign_errors(amount, section: str) -> dict:
+    """The amount sign <-> category section rule of a ledger entry."""
+    if amount == 0:
+        return {"amount": "Amount cannot be zero."}
+    if amount > 0 and section not in {"REVENUE", "LFB"}:
+        return {"category": "Positive amount requires Revenue or Liquid Funds (LFB)."}
+    if amount < 0 and section not in {"EXPENSE", "LFB"}:
+        return {"category": "Negative amount requires Expense or Liquid Funds (LFB)."}
+    return {}
+
+
 class FinanceLedgerEntry(InstituteScopedModel):
     account = models.ForeignKey(
         FinanceAccount, on_delete=models.PROTECT, related_name="entries"
@@ -86,54 +97,167 @@ class FinanceLedgerEntry(InstituteScopedModel):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # partitioned by year of `date`, keyed (id, date) in the database
+        # (apps/finance/partitions.py)
         db_table = "finance_ledger_entry"
         ordering = ["-date", "-id"]
         indexes = [
             models.Index(fields=["institute", "date"]),
+            # keyset pagination on (-date, -id)
+            models.Index(
+                fields=["institute", "-date", "-id"], name="ledger_inst_date_id_idx"
+            ),
             models.Index(fields=["institute", "account", "date"]),
             models.Index(fields=["transfer_id"]),
         ]
 
+    def full_clean(self, exclude=None, **kwargs):
+        # categories are checked against the AccountType registry in clean(),
+        # not with a query per foreign key
+        exclude = {*(exclude or ()), "category", "debit_category", "credit_category"}
+        return super().full_clean(exclude=exclude, **kwargs)
+
     def clean(self):
         from django.core.exceptions import ValidationError
 
-        if self.amount == 0:
-            raise ValidationError({"amount": "Amount cannot be zero."})
+        from .account_types import account_types
 
-        # Sign ↔ category section rule
-        if self.amount > 0 and self.category.section not in {"REVENUE", "LFB"}:
+        section = account_types().section_of(self.category_id)
+        if section is None:
+            raise ValidationError({"category": "Unknown category."})
+        errors = sign_errors(self.amount, section)
+        if errors:
+            raise ValidationError(errors)
+        self.set_sides()
+
+        # Enforce exactly one target per side
+        if (self.debit_finance_account_id is None) == (self.debit_category_id is None):
             raise ValidationError(
-                {"category": "Positive amount requires Revenue or Liquid Funds (LFB)."}
+                "Exactly one of (debit_finance_account, debit_category) must be set."
             )
-        if self.amount < 0 and self.category.section not in {"EXPENSE", "LFB"}:
+        if (self.credit_finance_account_id is None) == (
+            self.credit_category_id is None
+        ):
             raise ValidationError(
-                {"category": "Negative amount requires Expense or Liquid Funds (LFB)."}
+                "Exactly one of (credit_finance_account, credit_category) must be set."
             )
 
-        # Auto-populate debit/credit sides based on sign
+    def set_sides(self):
+        """Auto-populate debit/credit sides based on sign"""
         if self.amount > 0:
             # Incoming: Debit bank/cash; Credit category
-            self.debit_finance_account = self.account
-            self.debit_category = None
-            self.credit_finance_account = None
-            self.credit_category = self.category
+            self.debit_finance_account_id = self.account_id
+            self.debit_category_id = None
+            self.credit_finance_account_id = None
+            self.credit_category_id = self.category_id
         else:
             # Outgoing: Debit category; Credit bank/cash
-            self.debit_finance_account = None
-            self.debit_category = self.category
-            self.credit_finance_account = self.account
-            self.credit_category = None
-
-        # Enforce exactly one target per side
-        if bool(self.debit_finance_account) == bool(self.debit_category):
-            raise ValidationError(
-                "Exactly one of (debit_finance_account, debit_category) must be set."
-            )
-        if bool(self.credit_finance_account) == bool(self.credit_category):
-            raise ValidationError(
-                "Exactly one of (credit_finance_account, credit_category) must be set."
-            )
+            self.debit_finance_account_id = None
+            self.debit_category_id = self.category_id
+            self.credit_finance_account_id = self.account_id
+            self.credit_category_id = None
 
     def save(self, *args, **kwargs):
+        from .rollups import apply_ledger_changes
+
         self.full_clean()
-        return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            old = None
+            if self.pk and not self._state.adding:
+                old = (
+                    FinanceLedgerEntry.all_objects.filter(pk=self.pk)
+                    .values_list(
+                        "institute_id", "account_id", "category_id", "date", "amount"
+                    )
+                    .first()
+                )
+            result = super().save(*args, **kwargs)
+            apply_ledger_changes(added=[self], removed=[old] if old else [])
+        return result
+
+    def delete(self, *args, **kwargs):
+        from .rollups import apply_ledger_changes
+
+        with transaction.atomic(using=kwargs.get("using")):
+            apply_ledger_changes(removed=[self])
+            return super().delete(*args, **kwargs)
+
+
+class FinanceAccountBalance(InstituteScopedModel):
+    """
+    Current balance of a FinanceAccount (sum of all its ledger entries).
+    Kept in sync by apps/finance/balances.py; check with
+    `manage.py verify_finance_balances`.
+    """
+
+    account = models.OneToOneField(
+        FinanceAccount,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="current_balance",
+    )
+    balance = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "finance_account_balance"
+
+    def __str__(self):
+        return f"{self.account_id}: {self.balance}"
+
+
+class FinanceBalanceSnapshot(InstituteScopedModel):
+    """
+    Monthly closing balance of a FinanceAccount: `net` is the month's
+    movement, `closing` the balance at the end of the month. Months without
+    entries have no row (the previous closing still holds).
+    """
+
+    account = models.ForeignKey(
+        FinanceAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    month = models.DateField()  # first day of the month
+    net = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    closing = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "finance_balance_snapshot"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "month"], name="uq_balance_snapshot_month"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id}@{self.month:%Y-%m}: {self.closing}"
+
+
+class FinanceMonthlyRollup(InstituteScopedModel):
+    """
+    Ledger totals per (month, account, category): money in (positive
+    amounts), money out (negative amounts, as a positive number) and the
+    number of entries. The period reports (apps/finance/reports.py) read
+    this table; kept up to date by apps/finance/rollups.py.
+    """
+
+    month = models.DateField()  # first day of the month
+    account = models.ForeignKey(
+        FinanceAccount, on_delete=models.CASCADE, related_name="+"
+    )
+    category = models.ForeignKey(
+        AccountType, on_delete=models.CASCADE, related_name="+"
+    )
+    inflow = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    outflow = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    entries = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "finance_monthly_rollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["institute", "month", "account", "category"],
+                name="uq_finance_rollup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}:{self.account_id}:{self.category_id}"
@@ -0,0 +1,317 @@
+"""
+Yearly range partitions of finance_ledger_entry (by `date`).
+
+The ledger is a declaratively partitioned table: one partition per calendar
+year (finance_ledger_entry_y2025, ...) and a DEFAULT partition catching
+dates no year partition covers yet. Indexes are declared on the parent, so
+each partition carries its own (partition-local) copies, and queries
+filtered by date only touch the partitions of the years they cover. Old
+years can be vacuumed, detached and archived on their own.
+
+Postgres requires the partition key in the primary key, so the table's
+key is (id, date), and `id` takes its values from a plain sequence
+(finance_ledger_entry_id_seq) instead of an identity column. The model
+keeps `id` as its pk: ids come from that one sequence and stay unique,
+but the database no longer enforces uniqueness of `id` alone.
+
+Converting a filled plain table happens in three steps, so the ledger
+stays readable and writable except for the final swap:
+
+- prepare_partitioned_ledger(): builds the partitioned table next to the
+  plain one (finance_ledger_entry_staged) and logs the ids of the rows
+  written from then on (migration 0005)
+- copy_ledger_rows(): copies the rows over, one transaction per batch;
+  stopping and running it again resumes after the last copied id
+- swap_partitioned_ledger(): locks the plain table, re-copies the logged
+  rows and the ones not copied yet, drops it and renames the partitioned
+  table into its place; the lock is held for that delta only
+
+partition_ledger() runs the three; `manage.py create_ledger_partitions`
+calls it, then ensure_partitions(), which creates missing year partitions
+(moving rows that already landed in the DEFAULT partition) ahead of the
+new year.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+from typing import Callable, List, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import FinanceLedgerEntry
+
+TABLE = FinanceLedgerEntry._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+# the partitioned table while the plain one's rows are copied into it
+STAGED = f"{TABLE}_staged"
+# ids of the plain table's rows written since STAGED was created
+CHANGES = f"{TABLE}_changes"
+
+YEARS_AHEAD = 2
+MOVE_BATCH_SIZE = 5000
+
+_YEAR_PARTITION = re.compile(rf"^{TABLE}_y(\d{{4}})$")
+_INDEX_DEF = re.compile(
+    r"^(CREATE (?:UNIQUE )?INDEX) (\S+) ON (?:ONLY )?\S+ (USING .*)$"
+)
+
+
+def _q(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def partition_name(year: int) -> str:
+    return f"{TABLE}_y{year}"
+
+
+def _staged_index_name(name: str) -> str:
+    # the plain table's index names stay taken until the swap
+    return f"{name[:55]}_staged"
+
+
+def _relkind(cur, name: str) -> Optional[str]:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [name])
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def is_partitioned() -> bool:
+    with connection.cursor() as cur:
+        return _relkind(cur, TABLE) == "p"
+
+
+def partition_years() -> List[int]:
+    """Years with a partition attached, ascending."""
+    with connection.cursor() as cur:
+        return _partition_years(cur)
+
+
+def _partition_years(cur) -> List[int]:
+    cur.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [TABLE],
+    )
+    matches = (_YEAR_PARTITION.match(name) for (name,) in cur.fetchall())
+    return sorted(int(m.group(1)) for m in matches if m)
+
+
+def _create_year(cur, year: int, parent: str = TABLE) -> None:
+    name, table, default = _q(partition_name(year)), _q(parent), _q(DEFAULT_PARTITION)
+    bounds = f"FOR VALUES FROM ('{date(year, 1, 1)}') TO ('{date(year + 1, 1, 1)}')"
+    in_year = "date >= %s AND date < %s"
+    params = [date(year, 1, 1), date(year + 1, 1, 1)]
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_year})", params)
+    if not cur.fetchone()[0]:
+        cur.execute(f"CREATE TABLE {name} PARTITION OF {table} {bounds}")
+        return
+    # the year's rows sit in the default partition: move them into a new
+    # table and attach that (the partition's indexes are built on attach)
+    cur.execute(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cur.execute(
+        f"WITH moved AS (DELETE FROM {default} WHERE {in_year} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        params,
+    )
+    cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}")
+
+
+@transaction.atomic
+def ensure_partitions(until_year: int, from_year: Optional[int] = None) -> List[str]:
+    """
+    Create the missing year partitions from `from_year` (default: the oldest
+    existing one) through `until_year`; returns the names created.
+    """
+    with connection.cursor() as cur:
+        existing = set(_partition_years(cur))
+        if from_year is None:
+            from_year = min(existing, default=until_year)
+        created = []
+        for year in range(from_year, until_year + 1):
+            if year not in existing:
+                _create_year(cur, year)
+                created.append(partition_name(year))
+        return created
+
+
+@transaction.atomic
+def prepare_partitioned_ledger(*, years_ahead: int = YEARS_AHEAD) -> bool:
+    """
+    Create the empty partitioned table STAGED beside the plain ledger, with
+    its keys, indexes and year partitions, and start logging the ids the
+    plain table's writes touch into CHANGES. Returns False (and does
+    nothing) when the ledger is partitioned or already being converted.
+    """
+    table, staged = _q(TABLE), _q(STAGED)
+    with connection.cursor() as cur:
+        if _relkind(cur, TABLE) == "p" or _relkind(cur, STAGED):
+            return False
+        cur.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')",
+            [TABLE],
+        )
+        constraints = cur.fetchall()
+        pkey = next(name for name, kind, _ in constraints if kind == "p")
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, pkey],
+        )
+        indexes = cur.fetchall()
+        cur.execute(f"SELECT min(date) FROM {table}")
+        first_date = cur.fetchone()[0]
+
+        cur.execute(
+            f"CREATE TABLE {staged} (LIKE {table} INCLUDING DEFAULTS "
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS) "
+            f"PARTITION BY RANGE (date)"
+        )
+        # LIKE copies the identity's default, not the identity: the swap sets it
+        cur.execute(f"ALTER TABLE {staged} ALTER COLUMN id DROP DEFAULT")
+        cur.execute(
+            f"ALTER TABLE {staged} ADD CONSTRAINT {_q(f'{STAGED}_pkey')} "
+            f"PRIMARY KEY (id, date)"
+        )
+        for name, kind, sql in constraints:
+            if kind == "f":  # constraint names are per table: keep them
+                cur.execute(f"ALTER TABLE {staged} ADD CONSTRAINT {_q(name)} {sql}")
+        for name, sql in indexes:
+            create, _, using = _INDEX_DEF.match(sql).groups()
+            cur.execute(f"{create} {_q(_staged_index_name(name))} ON {staged} {using}")
+
+        cur.execute(
+            f"CREATE TABLE {_q(DEFAULT_PARTITION)} PARTITION OF {staged} DEFAULT"
+        )
+        this_year = timezone.localdate().year
+        first_year = first_date.year if first_date else this_year
+        for year in range(min(first_year, this_year), this_year + years_ahead + 1):
+            _create_year(cur, year, parent=STAGED)
+
+        changes, log = _q(CHANGES), _q(f"{CHANGES}_log")
+        cur.execute(f"CREATE TABLE {changes} (id bigint NOT NULL)")
+        cur.execute(
+            f"CREATE FUNCTION {log}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"IF TG_OP <> 'INSERT' THEN INSERT INTO {changes} VALUES (OLD.id); END IF; "
+            f"IF TG_OP <> 'DELETE' THEN INSERT INTO {changes} VALUES (NEW.id); END IF; "
+            f"RETURN NULL; END $$"
+        )
+        cur.execute(
+            f"CREATE TRIGGER {log} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {log}()"
+        )
+        return True
+
+
+def _copied_until(cur) -> int:
+    cur.execute(f"SELECT coalesce(max(id), 0) FROM {_q(STAGED)}")
+    return cur.fetchone()[0]
+
+
+def copy_ledger_rows(
+    *,
+    batch_size: int = MOVE_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Copy the plain ledger's rows into STAGED in `batch_size` chunks (keyset
+    on id), committing each chunk on its own; returns the number copied.
+    Rows written meanwhile are logged and fixed up by the swap, so readers
+    and writers of the ledger are never blocked.
+    """
+    table, staged = _q(TABLE), _q(STAGED)
+    copied = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO {staged} SELECT * FROM {table} "
+                f"WHERE id > %s ORDER BY id LIMIT %s RETURNING 1",
+                [_copied_until(cur), batch_size],
+            )
+            count = len(cur.fetchall())
+        if not count:
+            return copied
+        copied += count
+        if progress:
+            progress(copied)
+
+
+@transaction.atomic
+def swap_partitioned_ledger() -> int:
+    """
+    Replace the plain ledger by STAGED: under an exclusive lock on the plain
+    table, copy the rows written since their batch was copied (and any not
+    copied yet), drop the plain table and its change log, and give STAGED
+    the ledger's name, key, index names and id sequence. Returns the
+    number of rows copied under the lock.
+    """
+    table, staged, changes = _q(TABLE), _q(STAGED), _q(CHANGES)
+    with connection.cursor() as cur:
+        cur.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cur.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [TABLE],
+        )
+        pkey = cur.fetchone()[0]
+        cur.execute(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, pkey],
+        )
+        indexes = [name for (name,) in cur.fetchall()]
+
+        until = _copied_until(cur)
+        cur.execute(f"DELETE FROM {staged} WHERE id IN (SELECT id FROM {changes})")
+        cur.execute(
+            f"INSERT INTO {staged} SELECT * FROM {table} "
+            f"WHERE id > %s OR id IN (SELECT id FROM {changes}) RETURNING 1",
+            [until],
+        )
+        copied = len(cur.fetchall())
+        cur.execute(f"SELECT max(id) FROM {table}")
+        last_id = cur.fetchone()[0]
+
+        # the plain table takes its trigger, indexes, key and identity along
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"DROP TABLE {changes}")
+        cur.execute(f"DROP FUNCTION {_q(f'{CHANGES}_log')}()")
+        cur.execute(f"ALTER TABLE {staged} RENAME TO {table}")
+        cur.execute(
+            f"ALTER TABLE {table} RENAME CONSTRAINT {_q(f'{STAGED}_pkey')} TO {_q(pkey)}"
+        )
+        for name in indexes:
+            cur.execute(
+                f"ALTER INDEX {_q(_staged_index_name(name))} RENAME TO {_q(name)}"
+            )
+        sequence = _q(f"{TABLE}_id_seq")
+        cur.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+        if last_id is not None:
+            cur.execute("SELECT setval(%s, %s)", [sequence, last_id])
+        cur.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)"
+        )
+        return copied
+
+
+def partition_ledger(
+    *,
+    batch_size: int = MOVE_BATCH_SIZE,
+    years_ahead: int = YEARS_AHEAD,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Convert the plain ledger end to end (prepare, copy, swap), resuming a
+    conversion already under way; returns the number of rows copied. On a
+    partitioned table it does nothing.
+    """
+    if is_partitioned():
+        return 0
+    prepare_partitioned_ledger(years_ahead=years_ahead)
+    copied = copy_ledger_rows(batch_size=batch_size, progress=progress)
+    return copied + swap_partitioned_ledger()
@@ -0,0 +1,333 @@
+"""
+Period reports over whole months, read from FinanceMonthlyRollup (one
+GROUPING SETS query each, so the cost depends on the number of months and
+accounts/categories, not on the number of ledger entries):
+
+- trial_balance: debit / credit totals per finance account and per category
+- income_statement: revenue and expense per category, per month and for
+  the whole period
+- cash_flow: money in / out per finance account and month, with the
+  opening and closing balances
+
+report_table() flattens a report into (headers, rows) for the XLSX output.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import (
+    AccountSection,
+    AccountType,
+    FinanceAccount,
+    FinanceBalanceSnapshot,
+    FinanceMonthlyRollup,
+)
+
+ZERO = Decimal("0")
+
+
+@dataclass(frozen=True)
+class Period:
+    start: date  # first day of the first month
+    end: date  # first day of the last month
+
+    @classmethod
+    def parse(cls, raw_from: Optional[str], raw_to: Optional[str]) -> "Period":
+        """?from=YYYY-MM&to=YYYY-MM; defaults to the current year up to this month."""
+        today = timezone.localdate()
+        start = _month(raw_from, "from") or date(today.year, 1, 1)
+        end = _month(raw_to, "to") or today.replace(day=1)
+        if end < start:
+            raise ValidationError({"to": "Must not be before 'from'."})
+        return cls(start, end)
+
+    def as_dict(self) -> dict:
+        return {"from": f"{self.start:%Y-%m}", "to": f"{self.end:%Y-%m}"}
+
+
+def _month(raw: Optional[str], param: str) -> Optional[date]:
+    if not raw:
+        return None
+    try:
+        return datetime.strptime(raw, "%Y-%m").date()
+    except ValueError:
+        raise ValidationError({param: "Must be a month as YYYY-MM."})
+
+
+def _fetch(sql: str, params: Sequence) -> List[tuple]:
+    tables = {
+        "rollup": FinanceMonthlyRollup._meta.db_table,
+        "account": FinanceAccount._meta.db_table,
+        "category": AccountType._meta.db_table,
+    }
+    with connection.cursor() as cur:
+        cur.execute(
+            sql.format(**{k: connection.ops.quote_name(v) for k, v in tables.items()}),
+            params,
+        )
+        return cur.fetchall()
+
+
+def trial_balance(institute_id: int, period: Period) -> dict:
+    """
+    Incoming money debits the finance account and credits the category,
+    outgoing money the reverse - so debits and credits always balance.
+    """
+    rows = _fetch(
+        """
+        SELECT GROUPING(a.id), GROUPING(c.id), a.id, a.name,
+               c.id, c.acc_category, c.section, SUM(r.inflow), SUM(r.outflow)
+        FROM {rollup} r
+        JOIN {account} a ON a.id = r.account_id
+        JOIN {category} c ON c.id = r.category_id
+        WHERE r.institute_id = %s AND r.month BETWEEN %s AND %s AND r.entries <> 0
+        GROUP BY GROUPING SETS ((a.id, a.name), (c.id, c.acc_category, c.section), ())
+        ORDER BY a.name, c.acc_category
+        """,
+        [institute_id, period.start, period.end],
+    )
+    accounts, categories = [], []
+    totals = {"debit": ZERO, "credit": ZERO}
+    for row in rows:
+        g_acc, g_cat, acc_id, acc_name, cat_id, cat_name, section = row[:7]
+        inflow, outflow = row[7:]
+        if g_acc and g_cat:
+            totals = {"debit": inflow + outflow, "credit": inflow + outflow}
+        elif not g_acc:
+            accounts.append(
+                {
+                    "id": acc_id,
+                    "name": acc_name,
+                    "debit": inflow,
+                    "credit": outflow,
+                    "balance": inflow - outflow,
+                }
+            )
+        else:
+            categories.append(
+                {
+                    "id": cat_id,
+                    "name": cat_name,
+                    "section": section,
+                    "debit": outflow,
+                    "credit": inflow,
+                    "balance": outflow - inflow,
+                }
+            )
+    return {
+        **period.as_dict(),
+        "accounts": accounts,
+        "categories": categories,
+        "totals": totals,
+    }
+
+
+def _statement_part() -> dict:
+    return {
+        "revenue": {"lines": [], "total": ZERO},
+        "expense": {"lines": [], "total": ZERO},
+        "net": ZERO,
+    }
+
+
+def income_statement(institute_id: int, period: Period) -> dict:
+    """Revenue vs expense per category; expenses are reported as positive amounts."""
+    rows = _fetch(
+        """
+        SELECT GROUPING(r.month), GROUPING(c.id), r.month, c.section,
+               c.id, c.acc_category, SUM(r.inflow - r.outflow)
+        FROM {rollup} r
+        JOIN {category} c ON c.id = r.category_id
+        WHERE r.institute_id = %s AND r.month BETWEEN %s AND %s AND r.entries <> 0
+          AND c.section IN (%s, %s)
+        GROUP BY GROUPING SETS (
+            (r.month, c.section, c.id, c.acc_category), (r.month, c.section),
+            (c.section, c.id, c.acc_category), (c.section)
+        )
+        ORDER BY r.month, c.section, c.acc_category
+        """,
+        [
+            institute_id,
+            period.start,
+            period.end,
+            AccountSection.REVENUE,
+            AccountSection.EXPENSE,
+        ],
+    )
+    months: Dict[date, dict] = {}
+    whole = _statement_part()
+    for g_month, g_cat, month, section, cat_id, cat_name, amount in rows:
+        part = whole if g_month else months.setdefault(month, _statement_part())
+        side = part["revenue" if section == AccountSection.REVENUE else "expense"]
+        if section == AccountSection.EXPENSE:
+            amount = -amount
+        if g_cat:
+            side["total"] = amount
+        else:
+            side["lines"].append(
+                {"category": cat_id, "name": cat_name, "amount": amount}
+            )
+    for part in (whole, *months.values()):
+        part["net"] = part["revenue"]["total"] - part["expense"]["total"]
+    return {
+        **period.as_dict(),
+        "months": [
+            {"month": f"{m:%Y-%m}", **part} for m, part in sorted(months.items())
+        ],
+        "period": whole,
+    }
+
+
+def _opening_balances(institute_id: int, start: date) -> Dict[int, Tuple[str, Decimal]]:
+    """account -> (name, balance before `start`) from the last closing snapshot."""
+    return {
+        account_id: (name, closing)
+        for account_id, name, closing in FinanceBalanceSnapshot.all_objects.filter(
+            institute_id=institute_id, month__lt=start
+        )
+        .order_by("account_id", "-month")
+        .distinct("account_id")
+        .values_list("account_id", "account__name", "closing")
+    }
+
+
+def cash_flow(institute_id: int, period: Period) -> dict:
+    rows = _fetch(
+        """
+        SELECT GROUPING(r.month), a.id, a.name, r.month,
+               SUM(r.inflow), SUM(r.outflow)
+        FROM {rollup} r
+        JOIN {account} a ON a.id = r.account_id
+        WHERE r.institute_id = %s AND r.month BETWEEN %s AND %s AND r.entries <> 0
+        GROUP BY GROUPING SETS ((a.id, a.name, r.month), (a.id, a.name))
+        ORDER BY a.name, a.id, r.month
+        """,
+        [institute_id, period.start, period.end],
+    )
+    opening = _opening_balances(institute_id, period.start)
+    accounts: Dict[int, dict] = {}
+
+    def account(account_id: int, name: str) -> dict:
+        if account_id not in accounts:
+            start = opening.get(account_id, (name, ZERO))[1]
+            accounts[account_id] = {
+                "account": account_id,
+                "name": name,
+                "opening": start,
+                "inflow": ZERO,
+                "outflow": ZERO,
+                "net": ZERO,
+                "closing": start,
+                "months": [],
+            }
+        return accounts[account_id]
+
+    for g_month, acc_id, name, month, inflow, outflow in rows:
+        flows = {"inflow": inflow, "outflow": outflow, "net": inflow - outflow}
+        entry = account(acc_id, name)
+        if g_month:
+            entry.update(flows, closing=entry["opening"] + flows["net"])
+        else:
+            entry["months"].append({"month": f"{month:%Y-%m}", **flows})
+    for account_id, (name, _) in opening.items():
+        account(account_id, name)  # no movement in the period
+
+    listed = sorted(accounts.values(), key=lambda a: (a["name"], a["account"]))
+    totals = {
+        key: sum((a[key] for a in listed), ZERO)
+        for key in ("opening", "inflow", "outflow", "net", "closing")
+    }
+    return {**period.as_dict(), "accounts": listed, "totals": totals}
+
+
+REPORTS = {
+    "trial-balance": trial_balance,
+    "income-statement": income_statement,
+    "cash-flow": cash_flow,
+}
+
+
+def report_table(name: str, report: dict) -> Tuple[List[str], List[list]]:
+    """One report as a flat sheet: (headers, rows)."""
+    if name == "trial-balance":
+        headers = ["kind", "id", "name", "section", "debit", "credit", "balance"]
+        rows = [
+            ["account", a["id"], a["name"], "", a["debit"], a["credit"], a["balance"]]
+            for a in report["accounts"]
+        ]
+        rows += [
+            [
+                "category",
+                c["id"],
+                c["name"],
+                c["section"],
+                c["debit"],
+                c["credit"],
+                c["balance"],
+            ]
+            for c in report["categories"]
+        ]
+        rows.append(
+            [
+                "total",
+                "",
+                "",
+                "",
+                report["totals"]["debit"],
+                report["totals"]["credit"],
+                "",
+            ]
+        )
+    elif name == "income-statement":
+        headers = ["month", "section", "category", "amount"]
+        rows = []
+        parts = [(m["month"], m) for m in report["months"]]
+        parts.append((f"{report['from']}..{report['to']}", report["period"]))
+        for label, part in parts:
+            for section in ("revenue", "expense"):
+                rows += [
+                    [label, section, line["name"], line["amount"]]
+                    for line in part[section]["lines"]
+                ]
+                rows.append([label, section, "total", part[section]["total"]])
+            rows.append([label, "net", "", part["net"]])
+    else:
+        headers = ["account", "month", "opening", "inflow", "outflow", "net", "closing"]
+        rows = []
+        for a in report["accounts"]:
+            rows += [
+                [a["name"], m["month"], "", m["inflow"], m["outflow"], m["net"], ""]
+                for m in a["months"]
+            ]
+            rows.append(
+                [
+                    a["name"],
+                    "total",
+                    a["opening"],
+                    a["inflow"],
+                    a["outflow"],
+                    a["net"],
+                    a["closing"],
+                ]
+            )
+        t = report["totals"]
+        rows.append(
+            [
+                "total",
+                "",
+                t["opening"],
+                t["inflow"],
+                t["outflow"],
+                t["net"],
+                t["closing"],
+            ]
+        )
+    return headers, rows
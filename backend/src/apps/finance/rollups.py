@@ -0,0 +1,84 @@
+"""
+FinanceMonthlyRollup: ledger totals per (month, account, category), the
+source of the period reports (apps/finance/reports.py).
+
+apply_ledger_changes() is the one hook the ledger writers call - it keeps
+both this table and the account balances (apps/finance/balances.py) in step
+with the entries added / removed. `manage.py rebuild_finance_rollups`
+recounts the table from the ledger.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import connection, transaction
+
+from apps.common.upserts import upsert_add
+
+from .balances import apply_balance_deltas, entry_deltas, entry_values, month_start
+from .models import FinanceMonthlyRollup
+
+# (institute_id, month, account_id, category_id)
+RollupKey = Tuple[int, date, int, int]
+
+
+def rollup_deltas(
+    added: Iterable = (), removed: Iterable = ()
+) -> Dict[RollupKey, List]:
+    """Per-bucket [inflow, outflow, entries] change of adding/removing entries."""
+    deltas: Dict[RollupKey, List] = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+    for sign, entries in ((1, added), (-1, removed)):
+        for entry in entries:
+            iid, account_id, category_id, d, amount = entry_values(entry)
+            bucket = deltas[(iid, month_start(d), account_id, category_id)]
+            amount = Decimal(amount)
+            bucket[0 if amount > 0 else 1] += sign * abs(amount)
+            bucket[2] += sign
+    return deltas
+
+
+def apply_rollup_deltas(deltas: Dict[RollupKey, List]) -> None:
+    """Add the [inflow, outflow, entries] deltas to their monthly buckets."""
+    upsert_add(
+        FinanceMonthlyRollup,
+        ("institute_id", "month", "account_id", "category_id"),
+        ("inflow", "outflow", "entries"),
+        ((k, d) for k, d in deltas.items() if any(d)),
+    )
+
+
+def apply_ledger_changes(added: Iterable = (), removed: Iterable = ()) -> None:
+    """
+    Bring the balances, snapshots and monthly rollups in line with ledger
+    entries added / removed (entries or balances.EntryValues tuples).
+    Call inside the transaction that writes the entries.
+    """
+    added, removed = list(added), list(removed)
+    apply_balance_deltas(entry_deltas(added, removed))
+    apply_rollup_deltas(rollup_deltas(added, removed))
+
+
+REBUILD_SQL = """
+INSERT INTO finance_monthly_rollup
+    (institute_id, month, account_id, category_id, inflow, outflow, entries)
+SELECT institute_id, date_trunc('month', date)::date, account_id, category_id,
+       COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+       COALESCE(-SUM(amount) FILTER (WHERE amount < 0), 0),
+       COUNT(*)
+FROM finance_ledger_entry
+WHERE %(where)s
+GROUP BY institute_id, date_trunc('month', date), account_id, category_id
+"""
+
+
+@transaction.atomic
+def rebuild_rollups(institute_id: int) -> int:
+    """Recount the institute's monthly rollup from its ledger (one grouped insert)."""
+    FinanceMonthlyRollup.all_objects.filter(institute_id=institute_id).delete()
+    with connection.cursor() as cur:
+        cur.execute(REBUILD_SQL % {"where": "institute_id = %s"}, [institute_id])
+        return cur.rowcount
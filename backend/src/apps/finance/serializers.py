@@ -1,5 +1,8 @@
 from decimal import Decimal
 from rest_framework import serializers
+from apps.common.serializers import PageContextListSerializer
+from .account_types import account_types
+from .balances import running_balances
 from .models import AccountType, FinanceAccount, FinanceLedgerEntry
 
 
@@ -38,12 +41,32 @@ class AccountTypeLiteSerializer(serializers.ModelSerializer):
         fields = ["id", "code", "acc_category", "section"]
 
 
+class RegisteredAccountTypeField(serializers.PrimaryKeyRelatedField):
+    """An active AccountType by pk, resolved from the process-wide registry."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", AccountType.objects.filter(is_active=True))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        account_type = account_types().active(pk)
+        if account_type is None:
+            self.fail("does_not_exist", pk_value=data)
+        return account_type
+
+
 class LedgerEntryWriteSerializer(serializers.ModelSerializer):
     # make FKs explicit; queryset is narrowed in __init__ by institute
     account = serializers.PrimaryKeyRelatedField(
         queryset=FinanceAccount.all_objects.all()
     )
-    category = serializers.PrimaryKeyRelatedField(queryset=AccountType.objects.all())
+    category = RegisteredAccountTypeField()
 
     class Meta:
         model = FinanceLedgerEntry
@@ -88,7 +111,6 @@ class LedgerEntryWriteSerializer(serializers.ModelSerializer):
             self.fields["account"].queryset = FinanceAccount.all_objects.filter(
                 institute_id=iid, is_active=True
             )
-        self.fields["category"].queryset = AccountType.objects.filter(is_active=True)
 
     def validate(self, attrs):
         """Defensive check that account belongs to the current institute."""
@@ -111,6 +133,18 @@ class LedgerEntryWriteSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+RUNNING_BALANCES = "running_balances"
+
+
+class RunningBalanceListSerializer(PageContextListSerializer):
+    """Each entry's account balance after it, from one window query per page."""
+
+    context_key = RUNNING_BALANCES
+
+    def resolve(self, items):
+        return running_balances(items[0].institute_id, items)
+
+
 class LedgerEntryReadSerializer(serializers.ModelSerializer):
     account = FinanceAccountLiteSerializer(read_only=True)
     category = AccountTypeLiteSerializer(read_only=True)
@@ -118,9 +152,11 @@ class LedgerEntryReadSerializer(serializers.ModelSerializer):
     credit_finance_account = FinanceAccountLiteSerializer(read_only=True)
     debit_category = AccountTypeLiteSerializer(read_only=True)
     credit_category = AccountTypeLiteSerializer(read_only=True)
+    running_balance = serializers.SerializerMethodField()
 
     class Meta:
         model = FinanceLedgerEntry
+        list_serializer_class = RunningBalanceListSerializer
         fields = [
             "id",
             "institute",
@@ -138,8 +174,16 @@ class LedgerEntryReadSerializer(serializers.ModelSerializer):
             "created_by_id",
             "created_at",
             "updated_at",
+            "running_balance",
         ]
 
+    def get_running_balance(self, obj) -> Decimal:
+        """Balance of the account after this entry (entries ordered by date, id)."""
+        balances = self.context.get(RUNNING_BALANCES)
+        if balances is None:  # single object
+            balances = running_balances(obj.institute_id, [obj])
+        return balances.get(obj.pk)
+
 
 class TransferRequestSerializer(serializers.Serializer):
     from_account = serializers.IntegerField()
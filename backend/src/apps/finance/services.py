@@ -1,7 +1,9 @@
 import uuid
 from decimal import Decimal
 from django.db import transaction
-from .models import FinanceLedgerEntry, AccountType, AccountSection
+from .account_types import account_types
+from .models import FinanceLedgerEntry, AccountSection
+from .rollups import apply_ledger_changes
 
 
 class LedgerService:
@@ -22,34 +24,32 @@ class LedgerService:
             raise ValueError("Source and target accounts must differ.")
 
         # pick any active LFB category (or you can pin a code like 'bank_liquid_funds')
-        lfb = AccountType.objects.filter(
-            section=AccountSection.LIQUID_FUNDS_BANKS, is_active=True
-        ).first()
+        lfb = account_types().first_active(AccountSection.LIQUID_FUNDS_BANKS)
         if not lfb:
             raise ValueError("No active 'Liquid funds – Banks' category configured.")
 
         t_id = uuid.uuid4()
 
-        out_entry = FinanceLedgerEntry.objects.create(
-            institute_id=institute_id,
-            account_id=from_account_id,
-            date=date,
-            counterparty=counterparty,
-            comment=comment or "",
-            amount=-abs(Decimal(amount_positive)),
-            category=lfb,
-            transfer_id=t_id,
-            created_by_id=created_by_id,
-        )
-        in_entry = FinanceLedgerEntry.objects.create(
-            institute_id=institute_id,
-            account_id=to_account_id,
-            date=date,
-            counterparty=counterparty,
-            comment=comment or "",
-            amount=abs(Decimal(amount_positive)),
-            category=lfb,
-            transfer_id=t_id,
-            created_by_id=created_by_id,
-        )
+        entries = [
+            FinanceLedgerEntry(
+                institute_id=institute_id,
+                account_id=account_id,
+                date=date,
+                counterparty=counterparty,
+                comment=comment or "",
+                amount=amount,
+                category=lfb,
+                transfer_id=t_id,
+                created_by_id=created_by_id,
+            )
+            for account_id, amount in (
+                (from_account_id, -abs(Decimal(amount_positive))),
+                (to_account_id, abs(Decimal(amount_positive))),
+            )
+        ]
+        for entry in entries:
+            entry.full_clean()
+        # bulk_create skips save(): both legs update the aggregates in one go
+        out_entry, in_entry = FinanceLedgerEntry.all_objects.bulk_create(entries)
+        apply_ledger_changes(added=entries)
         return out_entry, in_entry
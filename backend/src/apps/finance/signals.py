@@ -1,5 +1,5 @@
 from django.db import transaction
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.db.models import Q
 
@@ -7,6 +7,14 @@ from .models import AccountType
 from .constants import DEFAULT_ACCOUNT_TYPES
 
 
+@receiver(post_save, sender=AccountType)
+@receiver(post_delete, sender=AccountType)
+def invalidate_account_type_registry(sender, **kwargs):
+    from .account_types import invalidate_account_types
+
+    invalidate_account_types()
+
+
 @receiver(post_migrate)
 def ensure_default_account_types(sender, **kwargs):
     """
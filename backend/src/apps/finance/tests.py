@@ -0,0 +1,509 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.institutes.models import Institute
+
+from .account_types import _registry
+from .balances import balances_as_of, verify_balances
+from .models import (
+    AccountType,
+    FinanceAccount,
+    FinanceBalanceSnapshot,
+    FinanceLedgerEntry,
+    FinanceMonthlyRollup,
+)
+from .partitions import (
+    DEFAULT_PARTITION,
+    copy_ledger_rows,
+    ensure_partitions,
+    is_partitioned,
+    partition_ledger,
+    partition_name,
+    partition_years,
+    prepare_partitioned_ledger,
+    swap_partitioned_ledger,
+)
+from .rollups import rebuild_rollups
+from .services import LedgerService
+
+
+class FinanceTestCase(TestCase):
+    """One institute and a user of it; a cash and a bank account per test."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.institute = Institute.objects.create(name="Test institute")
+        cls.user = get_user_model().objects.create_user(
+            username="registrar", password="x", institute=cls.institute
+        )
+
+    def _client(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    def setUp(self):
+        self.cash = FinanceAccount.all_objects.create(
+            institute=self.institute, kind="CASHBOX", name="Cash"
+        )
+        self.bank = FinanceAccount.all_objects.create(
+            institute=self.institute, kind="BANK", name="Bank"
+        )
+        self.tuition = AccountType.objects.get(code="tuition")
+        self.supplies = AccountType.objects.get(code="supplies")
+
+    def _entry(self, account, day, amount):
+        return FinanceLedgerEntry.all_objects.create(
+            institute=self.institute,
+            account=account,
+            date=day,
+            amount=Decimal(amount),
+            category=self.tuition if Decimal(amount) > 0 else self.supplies,
+            created_by_id="1",
+        )
+
+    def _ledger_balance(self, account, on=None):
+        qs = FinanceLedgerEntry.all_objects.filter(account=account)
+        if on:
+            qs = qs.filter(date__lte=on)
+        return qs.aggregate(s=Sum("amount"))["s"] or Decimal("0")
+
+
+class BalanceTests(FinanceTestCase):
+    def test_balances_and_snapshots_follow_ledger_writes(self):
+        self._entry(self.cash, date(2025, 1, 5), "100.00")
+        late = self._entry(self.cash, date(2025, 3, 20), "-30.00")
+        self._entry(self.bank, date(2025, 2, 1), "500.00")
+        early = self._entry(self.cash, date(2025, 2, 10), "40.00")
+        LedgerService.transfer_between_accounts(
+            institute_id=self.institute.id,
+            from_account_id=self.bank.id,
+            to_account_id=self.cash.id,
+            date=date(2025, 2, 15),
+            amount_positive=Decimal("200"),
+            comment="",
+            created_by_id="1",
+        )
+        # back-dated edit across months and accounts, then a delete
+        early.date, early.account = date(2024, 12, 31), self.bank
+        early.save()
+        late.amount = Decimal("-35.00")
+        late.save()
+        self._entry(self.bank, date(2025, 3, 1), "-20.00").delete()
+
+        self.assertEqual(verify_balances(self.institute.id), [])
+        for on in (date(2024, 12, 31), date(2025, 2, 14), date(2025, 3, 19), date(2025, 3, 31)):
+            got = balances_as_of(self.institute.id, on)
+            for account in (self.cash, self.bank):
+                self.assertEqual(
+                    got.get(account.id, Decimal("0")), self._ledger_balance(account, on)
+                )
+
+        with CaptureQueriesContext(connection) as ctx:
+            listed = self._client().get("/api/finance/accounts/").json()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(
+            {a["name"]: Decimal(a["balance"]) for a in listed},
+            {"Cash": Decimal("265.00"), "Bank": Decimal("340.00")},
+        )
+        rows = self._client().get("/api/finance/ledger/balance/?as_of=2025-02-14").json()
+        self.assertEqual(
+            {r["account__name"]: Decimal(r["balance"]) for r in rows},
+            {"Cash": Decimal("100.00"), "Bank": Decimal("540.00")},
+        )
+
+    def test_balance_lists_only_accounts_with_entries(self):
+        self._entry(self.cash, date(2025, 1, 5), "100.00")
+        self._entry(self.bank, date(2025, 2, 1), "500.00").delete()
+        client = self._client()
+
+        rows = client.get("/api/finance/ledger/balance/").json()
+        self.assertEqual(
+            [(r["account__name"], Decimal(r["balance"])) for r in rows],
+            [("Cash", Decimal("100.00"))],
+        )
+        rows = client.get("/api/finance/ledger/balance/?as_of=2025-03-01").json()
+        self.assertEqual([r["account__name"] for r in rows], ["Cash"])
+
+    def test_verify_command_detects_and_repairs_drift(self):
+        self._entry(self.cash, date(2025, 1, 5), "100.00")
+        self._entry(self.cash, date(2025, 2, 5), "50.00")
+        FinanceBalanceSnapshot.all_objects.filter(month=date(2025, 1, 1)).update(closing=1)
+
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("verify_finance_balances", stdout=out)
+        self.assertIn("2025-01", out.getvalue())
+        call_command("verify_finance_balances", "--repair", stdout=io.StringIO())
+        call_command("verify_finance_balances", stdout=io.StringIO())
+
+
+class RunningBalanceTests(FinanceTestCase):
+    def test_running_balance_on_every_page(self):
+        amounts = ["100.00", "-15.50", "42.00", "-7.25", "60.00"]
+        for i in range(30):
+            account = self.cash if i % 3 else self.bank
+            self._entry(account, date(2024, 1 + i // 3, 1 + i % 5), amounts[i % 5])
+
+        expected, totals = {}, {}
+        for e in FinanceLedgerEntry.all_objects.order_by("date", "id"):
+            totals[e.account_id] = totals.get(e.account_id, Decimal("0")) + e.amount
+            expected[e.id] = totals[e.account_id]
+
+        client = self._client()
+        url, seen, queries = "/api/finance/ledger/?page_size=7", {}, []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                page = client.get(url).json()
+            queries.append(len(ctx.captured_queries))
+            seen.update({r["id"]: Decimal(r["running_balance"]) for r in page["results"]})
+            url = page["next"]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(set(queries[:-1])), 1)  # deep pages cost the same
+
+        rows = client.get(
+            "/api/finance/ledger/?date_from=2024-03-01&date_to=2024-04-30"
+        ).json()
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(
+            all("2024-03-01" <= r["date"] <= "2024-04-30" for r in rows)
+        )
+        self.assertEqual(
+            {r["id"]: Decimal(r["running_balance"]) for r in rows},
+            {r["id"]: expected[r["id"]] for r in rows},
+        )
+        one = client.get(f"/api/finance/ledger/{rows[0]['id']}/").json()
+        self.assertEqual(Decimal(one["running_balance"]), expected[rows[0]["id"]])
+
+
+class FinanceReportTests(FinanceTestCase):
+    def test_period_reports_from_monthly_rollup(self):
+        self._entry(self.cash, date(2024, 12, 20), "70.00")  # before the period
+        self._entry(self.cash, date(2025, 1, 5), "100.00")
+        self._entry(self.cash, date(2025, 1, 9), "-30.00")
+        self._entry(self.bank, date(2025, 2, 1), "500.00")
+        moved = self._entry(self.bank, date(2025, 2, 3), "-45.00")
+        LedgerService.transfer_between_accounts(
+            institute_id=self.institute.id,
+            from_account_id=self.bank.id,
+            to_account_id=self.cash.id,
+            date=date(2025, 2, 15),
+            amount_positive=Decimal("200"),
+            comment="",
+            created_by_id="1",
+        )
+        moved.date, moved.amount = date(2025, 3, 3), Decimal("-40.00")
+        moved.save()
+        self._entry(self.cash, date(2025, 3, 1), "-5.00").delete()
+
+        incremental = sorted(
+            FinanceMonthlyRollup.all_objects.filter(entries__gt=0).values_list(
+                "month", "account_id", "category_id", "inflow", "outflow", "entries"
+            )
+        )
+        rebuild_rollups(self.institute.id)
+        self.assertEqual(
+            incremental,
+            sorted(
+                FinanceMonthlyRollup.all_objects.values_list(
+                    "month", "account_id", "category_id", "inflow", "outflow", "entries"
+                )
+            ),
+        )
+
+        client = self._client()
+        base = "/api/finance/reports/{}/?from=2025-01&to=2025-03"
+        with CaptureQueriesContext(connection) as ctx:
+            tb = client.get(base.format("trial-balance")).json()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(Decimal(tb["totals"]["debit"]), Decimal("1070.00"))
+        self.assertEqual(tb["totals"]["debit"], tb["totals"]["credit"])
+        self.assertEqual(
+            {a["name"]: Decimal(a["balance"]) for a in tb["accounts"]},
+            {"Cash": Decimal("270.00"), "Bank": Decimal("260.00")},
+        )
+
+        inc = client.get(base.format("income-statement")).json()
+        self.assertEqual(
+            [(m["month"], Decimal(m["net"])) for m in inc["months"]],
+            [("2025-01", Decimal("70.00")), ("2025-02", Decimal("500.00")),
+             ("2025-03", Decimal("-40.00"))],
+        )
+        self.assertEqual(Decimal(inc["period"]["revenue"]["total"]), Decimal("600.00"))
+        self.assertEqual(Decimal(inc["period"]["expense"]["total"]), Decimal("70.00"))
+
+        flow = client.get(base.format("cash-flow")).json()
+        cash = next(a for a in flow["accounts"] if a["name"] == "Cash")
+        self.assertEqual(
+            [Decimal(cash[k]) for k in ("opening", "inflow", "outflow", "closing")],
+            [Decimal("70.00"), Decimal("300.00"), Decimal("30.00"), Decimal("340.00")],
+        )
+        self.assertEqual([m["month"] for m in cash["months"]], ["2025-01", "2025-02"])
+        self.assertEqual(Decimal(flow["totals"]["closing"]), Decimal("600.00"))
+
+        resp = client.get(base.format("cash-flow") + "&export_format=xlsx")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("spreadsheetml", resp["Content-Type"])
+        self.assertEqual(
+            client.get("/api/finance/reports/trial-balance/?from=2025-13").status_code,
+            400,
+        )
+
+
+class LedgerImportTests(FinanceTestCase):
+    def test_statement_import_and_json_batch(self):
+        csv_text = (
+            "Date,Money_in,Money_out,Category,Counterparty,Comment\n"
+            "2025-01-03,\"1,250.00\",,tuition,Parent A,\n"
+            "2025-01-04,,80.50,Supplies expense,Shop,chalk\n"
+            "2025-01-05,,10,tuition,Bad sign,\n"
+            "2025-13-01,5,,tuition,,\n"
+            ",,,,,\n"
+        )
+        upload = lambda: SimpleUploadedFile(  # noqa: E731
+            "statement.csv", csv_text.encode("utf-8"), content_type="text/csv"
+        )
+        client = self._client()
+        url = f"/api/finance/ledger/import/?account={self.bank.id}"
+
+        dry = client.post(url, {"file": upload()}, format="multipart").json()
+        self.assertEqual(
+            (dry["summary"]["validated"], dry["summary"]["errors"]), (2, 2)
+        )
+        self.assertEqual(
+            [(r["row_number"], sorted(r["errors"])) for r in dry["rows"]],
+            [(2, []), (3, []), (4, ["category"]), (5, ["date"])],
+        )
+        resp = client.post(
+            url + "&commit=1&atomic=1", {"file": upload()}, format="multipart"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(FinanceLedgerEntry.all_objects.exists())
+
+        # unreadable uploads are a 400 report, not a server error
+        for name, content in (
+            ("statement.xlsx", b"not a workbook"),
+            ("statement.txt", csv_text.encode("utf-8")),
+            ("statement.csv", b"date,amount,category\n" + b"x" * 200_000),
+        ):
+            bad = SimpleUploadedFile(name, content)
+            resp = client.post(url, {"file": bad}, format="multipart")
+            self.assertEqual(resp.status_code, 400, name)
+            self.assertEqual(resp.json()["summary"]["errors"], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            done = client.post(
+                url + "&commit=1", {"file": upload()}, format="multipart"
+            ).json()
+        self.assertLess(len(ctx.captured_queries), 12)
+        self.assertEqual(done["summary"]["created"], 2)
+        entry = FinanceLedgerEntry.all_objects.get(pk=done["rows"][1]["instance_id"])
+        self.assertEqual(
+            (entry.amount, entry.debit_category_id, entry.credit_finance_account_id),
+            (Decimal("-80.50"), self.supplies.id, self.bank.id),
+        )
+
+        batch = client.post(
+            "/api/finance/ledger/batch/",
+            {
+                "entries": [
+                    {"account": "cash", "date": "2025-02-01", "amount": "40",
+                     "category": self.tuition.id},
+                    {"account": self.cash.id, "date": "2025-02-02", "amount": -15,
+                     "category": "supplies"},
+                    {"account": "nope", "date": "2025-02-02", "amount": 1,
+                     "category": "tuition"},
+                    {"account": "cash", "date": "2025-02-03", "amount": 1,
+                     "category": "tuition", "counterparty": "x" * 257},
+                ]
+            },
+            format="json",
+        ).json()
+        self.assertEqual(
+            [r["action"] for r in batch["rows"]],
+            ["created", "created", "error", "error"],
+        )
+        self.assertEqual(list(batch["rows"][3]["errors"]), ["counterparty"])
+        self.assertEqual(
+            batch["rows"][2]["errors"], {"account": "Unknown or inactive account."}
+        )
+        self.assertEqual(verify_balances(self.institute.id), [])
+
+
+class AccountTypeRegistryTests(FinanceTestCase):
+    def test_account_type_registry_replaces_lookups(self):
+        _registry.clear()
+        client = self._client()
+        client.get("/api/finance/ledger/categories-for-amount/?amount=5")  # load
+
+        def type_queries(call):
+            with CaptureQueriesContext(connection) as ctx:
+                result = call()
+            # joins of the list query are fine: no lookup of its own
+            lookup = 'FROM "finance_accounttype"'
+            hits = [q for q in ctx.captured_queries if lookup in q["sql"]]
+            return result, len(hits)
+
+        resp, hits = type_queries(
+            lambda: client.get("/api/finance/ledger/categories-for-amount/?amount=-5")
+        )
+        self.assertEqual(hits, 0)
+        self.assertEqual(
+            [c["code"] for c in resp.json()], ["lfb", "salaries", "supplies"]
+        )
+        resp, hits = type_queries(
+            lambda: client.post(
+                "/api/finance/ledger/",
+                {
+                    "account": self.cash.id,
+                    "date": "2025-01-02",
+                    "amount": "12.00",
+                    "category": self.tuition.id,
+                },
+                format="json",
+            )
+        )
+        self.assertEqual((resp.status_code, hits), (201, 0))
+        _, hits = type_queries(
+            lambda: client.get(f"/api/finance/ledger/?category={self.tuition.id}")
+        )
+        self.assertEqual(hits, 0)
+        _, hits = type_queries(
+            lambda: LedgerService.transfer_between_accounts(
+                institute_id=self.institute.id,
+                from_account_id=self.cash.id,
+                to_account_id=self.bank.id,
+                date=date(2025, 1, 3),
+                amount_positive=Decimal("5"),
+                comment="",
+                created_by_id="1",
+            )
+        )
+        self.assertEqual(hits, 0)
+
+        # a write bumps the stamp: the next lookup sees it
+        self.supplies.is_active = False
+        self.supplies.save()
+        codes = [
+            c["code"]
+            for c in client.get(
+                "/api/finance/ledger/categories-for-amount/?amount=-5"
+            ).json()
+        ]
+        self.assertEqual(codes, ["lfb", "salaries"])
+        self.assertEqual(
+            client.get(f"/api/finance/ledger/?category={self.supplies.id}").status_code,
+            400,
+        )
+        self.assertTrue(AccountType.objects.filter(pk=self.supplies.pk).exists())
+
+
+class LedgerPartitionTests(FinanceTestCase):
+    def test_ledger_is_partitioned_by_year(self):
+        def partition_of(entry):
+            with connection.cursor() as cur:
+                cur.execute(
+                    "SELECT tableoid::regclass::text FROM finance_ledger_entry "
+                    "WHERE id = %s",
+                    [entry.pk],
+                )
+                return cur.fetchone()[0]
+
+        self.assertTrue(is_partitioned())
+        this_year = date.today().year
+        self.assertIn(this_year + 1, partition_years())
+        current = self._entry(self.cash, date(this_year, 1, 5), "40.00")
+        self.assertEqual(partition_of(current), partition_name(this_year))
+
+        # a year without a partition lands in the default one until it is created
+        old_year = partition_years()[0] - 1
+        old = self._entry(self.cash, date(old_year, 3, 1), "15.00")
+        self.assertEqual(partition_of(old), DEFAULT_PARTITION)
+        created = ensure_partitions(this_year, from_year=old_year)
+        self.assertEqual(created, [partition_name(old_year)])
+        self.assertEqual(partition_of(old), partition_name(old_year))
+
+        # updates move rows between partitions; the pk alone still finds them
+        old.date = date(this_year, 2, 1)
+        old.save()
+        self.assertEqual(partition_of(old), partition_name(this_year))
+        self.assertEqual(
+            FinanceLedgerEntry.all_objects.get(pk=old.pk).amount, Decimal("15.00")
+        )
+        self.assertEqual(self.cash.current_balance.balance, Decimal("55.00"))
+
+    def test_partition_ledger_copies_a_plain_table(self):
+        kept = self._entry(self.cash, date(2021, 6, 1), "5.00")
+        dropped = self._entry(self.cash, date(2021, 6, 2), "7.00")
+        with connection.cursor() as cur:
+            # back to the pre-0005 layout: a plain table with an identity id
+            cur.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cur.execute(
+                "CREATE TABLE plain_ledger AS SELECT * FROM finance_ledger_entry"
+            )
+            cur.execute("DROP TABLE finance_ledger_entry CASCADE")
+            cur.execute(
+                "CREATE TABLE finance_ledger_entry (LIKE plain_ledger INCLUDING ALL)"
+            )
+            cur.execute(
+                "ALTER TABLE finance_ledger_entry ADD PRIMARY KEY (id), "
+                "ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY"
+            )
+            cur.execute(
+                "CREATE INDEX ledger_plain_inst_date ON finance_ledger_entry "
+                "(institute_id, date)"
+            )
+            cur.execute("INSERT INTO finance_ledger_entry SELECT * FROM plain_ledger")
+            cur.execute(
+                "SELECT setval(pg_get_serial_sequence('finance_ledger_entry', 'id'), "
+                "(SELECT max(id) FROM finance_ledger_entry))"
+            )
+        self.assertFalse(is_partitioned())
+
+        self.assertTrue(prepare_partitioned_ledger())
+        self.assertFalse(prepare_partitioned_ledger())
+        copied = []
+        self.assertEqual(copy_ledger_rows(batch_size=1, progress=copied.append), 2)
+        self.assertEqual(copied, [1, 2])
+
+        # writes go on while the copy runs: the swap catches up with them
+        kept.amount = Decimal("6.00")
+        kept.save()
+        dropped.delete()
+        added = self._entry(self.cash, date(2022, 1, 3), "2.00")
+        self.assertEqual(copy_ledger_rows(), 1)  # resumes after the last id
+        self.assertEqual(swap_partitioned_ledger(), 2)  # kept and added again
+        self.assertTrue(is_partitioned())
+        self.assertEqual(partition_ledger(), 0)
+
+        with connection.cursor() as cur:
+            cur.execute(
+                "SELECT tableoid::regclass::text FROM finance_ledger_entry "
+                "UNION SELECT indexname FROM pg_indexes "
+                "WHERE indexname = 'ledger_plain_inst_date' "
+                "UNION SELECT to_regclass('finance_ledger_entry_staged')::text "
+                "UNION SELECT to_regclass('finance_ledger_entry_changes')::text"
+            )
+            found = {name for (name,) in cur.fetchall()}
+        self.assertEqual(
+            found,
+            {
+                "finance_ledger_entry_y2021",
+                "finance_ledger_entry_y2022",
+                "ledger_plain_inst_date",
+                None,
+            },
+        )
+        new = self._entry(self.cash, date(2021, 7, 1), "1.00")
+        self.assertGreater(new.pk, added.pk)
+        self.assertEqual(self.cash.current_balance.balance, Decimal("9.00"))
@@ -1,19 +1,30 @@
 from decimal import Decimal, InvalidOperation
-from drf_spectacular.utils import extend_schema
-from django.db.models import Q, Sum, OuterRef, Subquery, Value, ProtectedError
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Value, ProtectedError
 from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, BasePermission
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.utils.dateparse import parse_date
 
 from apps.common.permissions import (
+    HasInstitute,
     IsSuperuser,
     IsSuperuserOrInstituteAdminOfSameInstitute,
 )
+from apps.common.export import ExportMixin, xlsx_response
+from apps.common.imports import AtomicImportError, error_report
 from apps.common.views import ScopedModelViewSet
 from apps.finance.filters import LedgerEntryFilter
+from .account_types import account_types
+from .balances import balances_as_of, current_balances
+from .ledger_import import MAX_BATCH_ENTRIES, import_ledger_rows, statement_rows
 from .models import AccountType, FinanceAccount, FinanceLedgerEntry, AccountSection
 from .serializers import (
     AccountTypeSerializer,
@@ -23,8 +34,23 @@ from .serializers import (
     TransferRequestSerializer,
     TransferResponseSerializer,
 )
+from .reports import REPORTS, Period, report_table
 from .services import LedgerService
 
+REPORT_PARAMETERS = [
+    OpenApiParameter("from", OpenApiTypes.STR, description="First month, YYYY-MM"),
+    OpenApiParameter("to", OpenApiTypes.STR, description="Last month, YYYY-MM"),
+    OpenApiParameter(
+        "export_format", OpenApiTypes.STR, enum=("json", "xlsx"), default="json"
+    ),
+]
+
+
+def _flag(raw, default: bool) -> bool:
+    if raw is None:
+        return default
+    return raw.lower() in {"1", "true", "yes"}
+
 
 # ---- Permissions composition helpers ----
 
@@ -61,24 +87,35 @@ class FinanceAccountViewSet(ScopedModelViewSet):
     serializer_class = FinanceAccountSerializer
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        sum_qs = (
-            FinanceLedgerEntry.all_objects.filter(
-                account_id=OuterRef("pk"), institute_id=OuterRef("institute_id")
+        # materialized in FinanceAccountBalance (apps/finance/balances.py)
+        return (
+            super()
+            .get_queryset()
+            .annotate(
+                balance=Coalesce(F("current_balance__balance"), Value(Decimal("0")))
             )
-            .values("account_id")
-            .annotate(b=Coalesce(Sum("amount"), Value(Decimal("0"))))
-            .values("b")[:1]
         )
-        return qs.annotate(balance=Coalesce(Subquery(sum_qs), Value(Decimal("0"))))
 
 
-class LedgerEntryViewSet(ScopedModelViewSet):
+class LedgerEntryViewSet(ExportMixin, ScopedModelViewSet):
     """
     Institute-scoped ledger (cashbook/bankbook).
     """
 
     model = FinanceLedgerEntry
+    export_filename = "ledger"
+    export_columns = (
+        ("id", "id"),
+        ("date", "date"),
+        ("account", "account__name"),
+        ("amount", "amount"),
+        ("category", "category__acc_category"),
+        ("section", "category__section"),
+        ("counterparty", "counterparty"),
+        ("comment", "comment"),
+        ("transfer_id", "transfer_id"),
+        ("created_at", "created_at"),
+    )
     serializer_class = LedgerEntryReadSerializer  # default read
 
     filter_backends = [
@@ -135,20 +172,14 @@ class LedgerEntryViewSet(ScopedModelViewSet):
         if amount == 0:
             return Response({"detail": "amount cannot be zero"}, status=400)
 
-        base = AccountType.objects.filter(is_active=True)
-        if amount > 0:
-            qs = base.filter(
-                Q(section=AccountSection.REVENUE)
-                | Q(section=AccountSection.LIQUID_FUNDS_BANKS)
-            )
-        else:
-            qs = base.filter(
-                Q(section=AccountSection.EXPENSE)
-                | Q(section=AccountSection.LIQUID_FUNDS_BANKS)
-            )
-
+        sections = (
+            AccountSection.REVENUE if amount > 0 else AccountSection.EXPENSE,
+            AccountSection.LIQUID_FUNDS_BANKS,
+        )
         return Response(
-            AccountTypeSerializer(qs.order_by("acc_category"), many=True).data
+            AccountTypeSerializer(
+                account_types().in_sections(*sections), many=True
+            ).data
         )
 
     @extend_schema(
@@ -178,13 +209,147 @@ class LedgerEntryViewSet(ScopedModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    def _import(self, rows, *, account=None, commit: bool, atomic: bool):
+        try:
+            with transaction.atomic():
+                report = import_ledger_rows(
+                    self.get_institute_id(),
+                    rows,
+                    created_by_id=str(getattr(self.request.user, "id", "")),
+                    account=account,
+                    commit=commit,
+                    atomic=atomic,
+                )
+        except AtomicImportError as e:
+            return Response(e.report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_statement(self, request):
+        """
+        POST /api/finance/ledger/import/?account=<id|name>&commit=0|1&atomic=0|1
+        Bank statement as a .csv or .xlsx 'file' with the columns
+        date, category, amount (or money_in / money_out) and optionally
+        account, counterparty, comment. commit=0 (default) only validates.
+        """
+        file = request.FILES.get("file")
+        if not file:
+            return Response({"detail": "Upload a file as 'file'."}, status=400)
+        try:
+            rows = statement_rows(file)
+        except ValueError as e:
+            return Response(error_report(1, {"header": str(e)}), status=400)
+        return self._import(
+            rows,
+            account=request.query_params.get("account"),
+            commit=_flag(request.query_params.get("commit"), False),
+            atomic=_flag(request.query_params.get("atomic"), False),
+        )
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """
+        POST /api/finance/ledger/batch/?commit=0|1&atomic=0|1
+        {"entries": [{"account", "date", "amount", "category",
+        "counterparty", "comment"}, ...]} - creates them (commit defaults to 1);
+        rows are numbered from 1 in the report.
+        """
+        entries = (
+            request.data.get("entries") if isinstance(request.data, dict) else None
+        )
+        if not isinstance(entries, list) or not all(
+            isinstance(e, dict) for e in entries
+        ):
+            return Response(
+                {"entries": "A list of entry objects is required."}, status=400
+            )
+        if len(entries) > MAX_BATCH_ENTRIES:
+            return Response(
+                {"entries": f"At most {MAX_BATCH_ENTRIES} entries per batch."},
+                status=400,
+            )
+        return self._import(
+            list(enumerate(entries, start=1)),
+            commit=_flag(request.query_params.get("commit"), True),
+            atomic=_flag(request.query_params.get("atomic"), False),
+        )
+
     @action(detail=False, methods=["get"], url_path="balance")
     def balance(self, request):
+        """
+        Balance per account (accounts with entries), from the materialized
+        balances; ?as_of=YYYY-MM-DD gives the balances at the end of that day.
+        """
         iid = self.get_institute_id()
-        rows = (
-            FinanceLedgerEntry.all_objects.filter(institute_id=iid)
-            .values("account__id", "account__name")
-            .annotate(balance=Sum("amount"))
-            .order_by("account__name")
+        raw = request.query_params.get("as_of")
+        # balance rows outlive their entries: list the accounts with entries
+        entries = FinanceLedgerEntry.all_objects.filter(
+            institute_id=iid, account_id=OuterRef("pk")
+        )
+        if raw:
+            try:
+                as_of = parse_date(raw)
+            except ValueError:
+                as_of = None
+            if as_of is None:
+                return Response({"detail": "as_of must be YYYY-MM-DD."}, status=400)
+            balances = balances_as_of(iid, as_of)
+            entries = entries.filter(date__lte=as_of)
+        else:
+            balances = current_balances(iid)
+        names = (
+            FinanceAccount.all_objects.filter(
+                Exists(entries), institute_id=iid, id__in=balances
+            )
+            .order_by("name")
+            .values_list("id", "name")
+        )
+        return Response(
+            [
+                {"account__id": pk, "account__name": name, "balance": balances[pk]}
+                for pk, name in names
+            ]
         )
-        return Response(list(rows))
+
+
+class FinanceReportViewSet(viewsets.ViewSet):
+    """
+    GET /api/finance/reports/<report>/?from=YYYY-MM&to=YYYY-MM&export_format=json|xlsx
+    Period reports read from the monthly rollup (apps/finance/reports.py).
+    """
+
+    permission_classes = [IsAuthenticated, HasInstitute]
+
+    def _report(self, request, name):
+        fmt = request.query_params.get("export_format", "json").lower()
+        if fmt not in ("json", "xlsx"):
+            raise ValidationError({"export_format": "Must be one of: json, xlsx."})
+        period = Period.parse(
+            request.query_params.get("from"), request.query_params.get("to")
+        )
+        report = REPORTS[name](request.user.institute_id, period)
+        if fmt == "json":
+            return Response(report)
+        headers, rows = report_table(name, report)
+        filename = f"{name}_{period.start:%Y-%m}_{period.end:%Y-%m}"
+        return xlsx_response(headers, rows, filename, name)
+
+    @extend_schema(parameters=REPORT_PARAMETERS, responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["get"], url_path="trial-balance")
+    def trial_balance(self, request):
+        return self._report(request, "trial-balance")
+
+    @extend_schema(parameters=REPORT_PARAMETERS, responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["get"], url_path="income-statement")
+    def income_statement(self, request):
+        return self._report(request, "income-statement")
+
+    @extend_schema(parameters=REPORT_PARAMETERS, responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["get"], url_path="cash-flow")
+    def cash_flow(self, request):
+        return self._report(request, "cash-flow")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InstitutesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.institutes"
+
+    def ready(self):
+        # Import signal handlers (logo cache invalidation)
+        from . import signals  # noqa: F401
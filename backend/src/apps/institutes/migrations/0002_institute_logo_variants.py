@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institutes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='institute',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
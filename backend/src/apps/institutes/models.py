@@ -54,6 +54,8 @@ class Institute(TimeStampedModel):
 
     # Logo
     logo_key = models.CharField(max_length=512, null=True, blank=True)  # storage key
+    # variant name -> storage key (apps/common/images.py)
+    logo_variants = models.JSONField(default=dict, blank=True)
 
     # validators
     _phone_chars = RegexValidator(
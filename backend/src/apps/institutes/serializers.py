@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from apps.common.images import pick_variant, requested_size
 from apps.common.media import public_media_url
 from .models import Institute
 
@@ -41,7 +42,8 @@ class InstituteReadSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at", "logo_key", "logo_url"]
 
     def get_logo_url(self, obj):
-        return public_media_url(obj.logo_key)
+        size = requested_size(self.context.get("request"))
+        return public_media_url(pick_variant(obj.logo_key, obj.logo_variants, size))
 
 
 class InstituteWriteSerializer(serializers.ModelSerializer):
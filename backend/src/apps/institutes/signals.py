@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.images import variants_changed
+from apps.common.media import invalidate_institute_logo
+
+from .models import Institute
+
+
+@receiver(post_save, sender=Institute)
+@receiver(post_delete, sender=Institute)
+def institute_logo_changed(sender, instance, **kwargs):
+    """Every process drops its cached logo (the fallback for photo-less students)."""
+    fields = kwargs.get("update_fields")
+    if fields and not {"logo_key", "logo_variants"} & set(fields):
+        return
+    invalidate_institute_logo(instance.pk)
+
+
+@receiver(variants_changed, sender=Institute)
+def institute_logo_variants_changed(sender, pk, **kwargs):
+    invalidate_institute_logo(pk)
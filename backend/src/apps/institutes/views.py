@@ -17,6 +17,8 @@ from .serializers import (
     InstituteLogoUploadSerializer,
     InstituteLogoUploadResponseSerializer,
 )
+from apps.common.direct_upload import DirectUploadMixin
+from apps.common.images import schedule_variants
 from apps.common.media import public_media_url
 
 
@@ -66,22 +68,39 @@ class InstituteAdminViewSet(viewsets.ModelViewSet):
         saved_key = default_storage.save(key, file)
         institute.logo_key = saved_key
         institute.save(update_fields=["logo_key"])
+        schedule_variants(
+            institute,
+            source_field="logo_key",
+            variants_field="logo_variants",
+            source_key=saved_key,
+        )
 
         return Response({"logo_url": public_media_url(institute.logo_key)}, status=200)
 
 
 class InstituteViewSet(
-    mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet
+    DirectUploadMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.GenericViewSet,
 ):
     """
     GET    /api/institutes/{id}/
     PATCH  /api/institutes/{id}/
     POST   /api/institutes/{id}/logo/
+    POST   /api/institutes/{id}/upload-url/      (presigned direct upload)
+    POST   /api/institutes/{id}/upload-confirm/
     """
 
     queryset = Institute.objects.all()
     serializer_class = InstituteReadSerializer
     permission_classes = [IsSuperuserOrInstituteAdminOrDirectorOfSameInstitute]
+    upload_source_field = "logo_key"
+    upload_variants_field = "logo_variants"
+    upload_response_keys = ("photo_url", "logo_url")
+
+    def direct_upload_stem(self, obj):
+        return f"institutes/{obj.id}"  # same key as the logo action
 
     @action(
         detail=True,
@@ -127,6 +146,12 @@ class InstituteViewSet(
             setattr(inst, "logo_key", saved)
             inst.save(update_fields=["logo_key"])
             key = saved
+            schedule_variants(
+                inst,
+                source_field="logo_key",
+                variants_field="logo_variants",
+                source_key=saved,
+            )
 
         url = public_media_url(key)
         # Return both keys for maximum compatibility with existing UI widgets
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from apps.students.models import StudentStatus
+from apps.students.services.current_state import (
+    status_term_expression,
+    sync_state_terms,
+)
+from apps.students.services.enrollment_stats import rebuild_enrollment_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill StudentStatus.term for existing rows in id ranges (one UPDATE per "
+        "batch), then copy them to the current-state rows and recount the "
+        "enrollment rollup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, help="Only this institute id.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Status ids per UPDATE/transaction (default: 10000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        qs = StudentStatus.all_objects.all()
+        if options["institute"]:
+            qs = qs.filter(institute_id=options["institute"])
+        bounds = qs.aggregate(lo=Min("id"), hi=Max("id"))
+        if bounds["lo"] is None:
+            self.stdout.write("No status rows.")
+            return
+
+        started = time.perf_counter()
+        updated = 0
+        for lo in range(bounds["lo"], bounds["hi"] + 1, batch_size):
+            with transaction.atomic():
+                updated += qs.filter(id__gte=lo, id__lt=lo + batch_size).update(
+                    term=status_term_expression()
+                )
+            self.stdout.write(f"  {updated} rows...")
+
+        institutes = qs.order_by().values_list("institute_id", flat=True).distinct()
+        for iid in institutes:
+            with transaction.atomic():
+                sync_state_terms(iid)
+                rebuild_enrollment_rollup(iid)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Resolved terms of {updated} status rows in {elapsed:.1f}s "
+                f"({updated / max(elapsed, 1e-9):.0f} rows/s)."
+            )
+        )
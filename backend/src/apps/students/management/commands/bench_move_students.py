@@ -0,0 +1,139 @@
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.courses.models import Course, CourseClass
+from apps.institutes.models import Institute
+from apps.students.models import Status, Student, StudentCurrentState, StudentStatus
+from apps.students.services.current_state import refresh_student_states
+from apps.terms.calendar import get_term_calendar
+from apps.terms.transitions import execute_move
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_move(institute_id, next_term):
+    """The previous per-student loop: one UPDATE and one INSERT per student."""
+    states = StudentCurrentState.all_objects.filter(
+        institute_id=institute_id, status=Status.ACTIVE, is_active=True
+    ).select_related("status_row")
+    moved_ids = []
+    for state in states:
+        latest_status = state.status_row
+        latest_status.is_active = False
+        latest_status.save(update_fields=["is_active"])
+        StudentStatus.all_objects.create(
+            student_id=state.student_id,
+            status=Status.ACTIVE,
+            course_class_id=state.course_class_id,
+            effective_at=datetime.combine(
+                next_term.start_date, datetime.min.time(), tzinfo=dt_timezone.utc
+            ),
+            is_active=True,
+            note=f"Moved to term {next_term.name} by term transition",
+            institute_id=institute_id,
+        )
+        moved_ids.append(state.student_id)
+    refresh_student_states(moved_ids)
+    return moved_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the 'move students' term transition on seeded ACTIVE students "
+        "(everything is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, required=True)
+        parser.add_argument("--students", type=int, default=3000)
+        parser.add_argument("--classes", type=int, default=6)
+        parser.add_argument(
+            "--mode",
+            choices=["legacy", "set", "both"],
+            default="both",
+            help="legacy = per-student loop, set = set-based statements.",
+        )
+
+    def _seed(self, iid, n, n_classes):
+        course = Course.objects.create(
+            institute_id=iid, name="Bench move", total_classes=n_classes
+        )
+        classes = [
+            CourseClass.objects.create(course=course, index=i + 1, name=f"Bench move-{i + 1}")
+            for i in range(n_classes)
+        ]
+        students = Student.all_objects.bulk_create(
+            [
+                Student(
+                    institute_id=iid,
+                    first_name="Bench",
+                    last_name=f"Move{i:06d}",
+                    date_of_birth=date(2005, 1, 1) + timedelta(days=i % 3650),
+                    spin=f"BM{i:06d}",
+                )
+                for i in range(n)
+            ],
+            batch_size=2000,
+        )
+        at = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+        StudentStatus.all_objects.bulk_create(
+            [
+                StudentStatus(
+                    institute_id=iid,
+                    student=st,
+                    course_class=classes[i % n_classes],
+                    status=Status.ACTIVE,
+                    effective_at=at,
+                    is_active=True,
+                )
+                for i, st in enumerate(students)
+            ],
+            batch_size=2000,
+        )
+        refresh_student_states([st.id for st in students])
+
+    def _run(self, mode, iid, o):
+        calendar = get_term_calendar(iid)
+        next_term = calendar.next_after(date(2000, 1, 1))
+        if next_term is None:
+            raise CommandError(f"Institute {iid} has no term to move students into.")
+        try:
+            with transaction.atomic():
+                self._seed(iid, o["students"], o["classes"])
+                # only the seeded rows: other ACTIVE students would skew both modes
+                expected = StudentCurrentState.all_objects.filter(
+                    institute_id=iid, status=Status.ACTIVE, is_active=True
+                ).count()
+                move = _legacy_move if mode == "legacy" else execute_move
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    moved = len(move(iid, next_term))
+                    elapsed = time.perf_counter() - started
+                if moved != expected:
+                    raise CommandError(f"{mode}: moved {moved}, expected {expected}.")
+                raise _Rollback
+        except _Rollback:
+            pass
+        return moved, len(ctx.captured_queries), elapsed
+
+    def handle(self, *args, **o):
+        iid = o["institute"]
+        if not Institute.objects.filter(pk=iid).exists():
+            raise CommandError(f"Institute {iid} does not exist.")
+
+        modes = ["legacy", "set"] if o["mode"] == "both" else [o["mode"]]
+        for mode in modes:
+            moved, queries, elapsed = self._run(mode, iid, o)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{mode:>6}: moved {moved} students with {queries} statements "
+                    f"in {elapsed:.2f}s -> {moved / max(elapsed, 1e-9):.0f} students/s "
+                    f"(rolled back)"
+                )
+            )
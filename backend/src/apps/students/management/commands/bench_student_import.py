@@ -0,0 +1,99 @@
+import io
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from openpyxl import Workbook, load_workbook
+
+from apps.institutes.models import Institute
+from apps.students.services.import_xlsx import (
+    CANONICAL_COLUMNS,
+    DEFAULT_CHUNK_SIZE,
+    import_student_rows,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the batched student XLSX importer on a synthetic intake file "
+        "(rolled back unless --keep)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--institute", type=int, required=True)
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate only (commit=0)."
+        )
+        parser.add_argument(
+            "--atomic", action="store_true", help="All-or-nothing commit (atomic=1)."
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the imported students."
+        )
+
+    def _workbook(self, n: int) -> io.BytesIO:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("students")
+        ws.append(CANONICAL_COLUMNS)
+        stamp = int(time.time())
+        base = date(2005, 1, 1)
+        for i in range(n):
+            row = {
+                "first_name": f"Bench{stamp}",
+                "last_name": f"Row{i:06d}",
+                "date_of_birth": (base + timedelta(days=i % 3650)).isoformat(),
+                "gender": "male" if i % 2 else "female",
+                "phone_number": f"555{i:07d}",
+                "entry_date": date.today().isoformat(),
+                "comments": "bench_student_import",
+            }
+            ws.append([row.get(c, "") for c in CANONICAL_COLUMNS])
+        buf = io.BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+        return buf
+
+    def handle(self, *args, **o):
+        iid = o["institute"]
+        if not Institute.objects.filter(pk=iid).exists():
+            raise CommandError(f"Institute {iid} does not exist.")
+
+        buf = self._workbook(o["rows"])
+        commit = not o["dry_run"]
+
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                wb = load_workbook(buf, read_only=True, data_only=True)
+                report = import_student_rows(
+                    iid,
+                    wb.active.iter_rows(values_only=True),
+                    commit=commit,
+                    atomic=o["atomic"],
+                    chunk_size=o["chunk_size"],
+                )
+                elapsed = time.perf_counter() - started
+                if not o["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        s = report["summary"]
+        self.stdout.write(
+            f"rows={s['total_rows']} created={s['created']} "
+            f"validated={s['validated']} errors={s['errors']} "
+            f"chunk_size={o['chunk_size']}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{elapsed:.2f}s -> {s['total_rows'] / max(elapsed, 1e-9):.0f} rows/s"
+                + ("" if o["keep"] else " (rolled back)")
+            )
+        )
@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.students.services.import_jobs import (
+    claim_next_job,
+    fail_stale_jobs,
+    run_import_job,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued student XLSX import jobs (Postgres-backed queue, "
+        "safe to run several workers in parallel)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the queue is empty (default: 5).",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Fail RUNNING jobs without progress for this long (default: 30).",
+        )
+
+    def handle(self, *args, **options):
+        stale = timedelta(minutes=options["stale_minutes"])
+        while True:
+            failed = fail_stale_jobs(stale)
+            if failed:
+                self.stdout.write(self.style.WARNING(f"Failed {failed} stale job(s)."))
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing import job {job.pk} ({job.file_name})...")
+            started = time.perf_counter()
+            run_import_job(job)
+            job.refresh_from_db(
+                fields=["status", "processed_rows", "created_rows", "error_rows"]
+            )
+            self.stdout.write(
+                f"  job {job.pk}: {job.status}, {job.processed_rows} rows "
+                f"({job.created_rows} created, {job.error_rows} errors) "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.students.models import StudentStatus
+from apps.students.services.enrollment_stats import rebuild_enrollment_rollup
+
+
+class Command(BaseCommand):
+    help = "Recount the EnrollmentRollup table (statistics) from StudentStatus."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--institute", type=int, help="Only rebuild this institute id."
+        )
+
+    def handle(self, *args, **options):
+        if options["institute"]:
+            institutes = [options["institute"]]
+        else:
+            institutes = list(
+                StudentStatus.all_objects.order_by()
+                .values_list("institute_id", flat=True)
+                .distinct()
+            )
+        for iid in institutes:
+            started = time.perf_counter()
+            buckets = rebuild_enrollment_rollup(iid)
+            self.stdout.write(
+                f"  institute {iid}: {buckets} buckets "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt enrollment rollup of {len(institutes)} institutes.")
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.students.models import Student
+from apps.students.services.current_state import refresh_student_states
+
+
+class Command(BaseCommand):
+    help = "Rebuild the StudentCurrentState projection from StudentStatus, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--institute", type=int, help="Only rebuild students of this institute id."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Students per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        qs = Student.all_objects.order_by("id")
+        if options["institute"]:
+            qs = qs.filter(institute_id=options["institute"])
+
+        last_id = 0
+        students = states = 0
+        while True:
+            ids = list(
+                qs.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                states += refresh_student_states(ids)
+            students += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"  processed {students} students...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt current state for {students} students ({states} with a status)."
+            )
+        )
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Initial fill of the projection (latest active status, otherwise latest overall).
+# Later repairs: `manage.py rebuild_student_state`.
+BACKFILL_SQL = """
+INSERT INTO students_studentcurrentstate
+    (institute_id, student_id, status_row_id, status, course_class_id,
+     term_id, is_active, effective_at, updated_at)
+SELECT DISTINCT ON (s.student_id)
+    s.institute_id, s.student_id, s.id, s.status, s.course_class_id,
+    CASE
+        WHEN s.status = 'active' THEN (
+            SELECT t.id FROM students_academicterm t
+            WHERE t.institute_id = s.institute_id
+              AND t.start_date <= (s.effective_at AT TIME ZONE 'UTC')::date
+              AND t.end_date >= (s.effective_at AT TIME ZONE 'UTC')::date
+            ORDER BY t.start_date DESC LIMIT 1
+        )
+        WHEN s.status IN ('enquire', 'accepted') THEN (
+            SELECT t.id FROM students_academicterm t
+            WHERE t.institute_id = s.institute_id
+              AND t.start_date > (s.effective_at AT TIME ZONE 'UTC')::date
+            ORDER BY t.start_date ASC LIMIT 1
+        )
+    END,
+    s.is_active, s.effective_at, now()
+FROM students_studentstatus s
+ORDER BY s.student_id, s.is_active DESC, s.effective_at DESC, s.id DESC;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_alter_courseclass_certificate_type'),
+        ('institutes', '0001_initial'),
+        ('students', '0010_studentstatus_created_by'),
+        ('terms', '0005_lowtermcountalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentCurrentState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('enquire', 'Enquire'), ('accepted', 'Accepted'), ('not_accepted', 'Not accepted'), ('no_show', 'No show'), ('active', 'Active'), ('retake', 'Retake'), ('failed', 'Failed'), ('graduate', 'Graduate'), ('drop_out', 'Drop out'), ('expelled', 'Expelled')], max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('effective_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course_class', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='courses.courseclass')),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+                ('status_row', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.studentstatus')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='current_state', to='students.student')),
+                ('term', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='terms.academicterm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['institute', 'status', 'is_active'], name='stu_state_inst_status_idx'), models.Index(fields=['institute', 'course_class'], name='stu_state_inst_class_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
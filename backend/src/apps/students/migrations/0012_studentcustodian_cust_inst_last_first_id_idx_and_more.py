@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_alter_courseclass_certificate_type'),
+        ('employees', '0013_employeecareer_emp_car_inst_start_id_idx'),
+        ('institutes', '0001_initial'),
+        ('students', '0011_studentcurrentstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentcustodian',
+            index=models.Index(fields=['institute', 'last_name', 'first_name', 'id'], name='cust_inst_last_first_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentstatus',
+            index=models.Index(fields=['institute', '-is_active', '-effective_at', '-id'], name='status_inst_act_eff_id_idx'),
+        ),
+    ]
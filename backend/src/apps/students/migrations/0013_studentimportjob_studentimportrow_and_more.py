@@ -0,0 +1,75 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institutes', '0001_initial'),
+        ('students', '0012_studentcustodian_cust_inst_last_first_id_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('commit', models.BooleanField(default=False)),
+                ('atomic', models.BooleanField(default=False)),
+                ('file_name', models.CharField(blank=True, default='', max_length=255)),
+                ('file_data', models.BinaryField(blank=True, null=True)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('created_rows', models.PositiveIntegerField(default=0)),
+                ('validated_rows', models.PositiveIntegerField(default=0)),
+                ('skipped_rows', models.PositiveIntegerField(default=0)),
+                ('error_rows', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('action', models.CharField(max_length=10)),
+                ('errors', models.JSONField(blank=True, default=dict)),
+                ('instance_id', models.IntegerField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='students.studentimportjob')),
+            ],
+            options={
+                'ordering': ['row_number', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='studentimportjob',
+            index=models.Index(fields=['status', 'id'], name='stu_import_job_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentimportjob',
+            index=models.Index(fields=['institute', '-created_at', '-id'], name='stu_import_job_inst_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentimportrow',
+            index=models.Index(fields=['job', 'row_number', 'id'], name='stu_import_row_job_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentimportrow',
+            index=models.Index(fields=['job', 'action'], name='stu_import_row_action_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:54
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_pg_trgm'),
+        ('institutes', '0001_initial'),
+        ('students', '0013_studentimportjob_studentimportrow_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('first_name'), name='gin_trgm_ops'), name='stu_first_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('last_name'), name='gin_trgm_ops'), name='stu_last_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcustodian',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('first_name'), name='gin_trgm_ops'), name='cust_first_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcustodian',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('last_name'), name='gin_trgm_ops'), name='cust_last_trgm_idx'),
+        ),
+    ]
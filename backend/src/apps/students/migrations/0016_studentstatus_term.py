@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_alter_courseclass_certificate_type'),
+        ('employees', '0015_employee_photo_variants'),
+        ('institutes', '0002_institute_logo_variants'),
+        ('students', '0015_student_photo_variants'),
+        ('terms', '0005_lowtermcountalert'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentstatus',
+            name='term',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='terms.academicterm'),
+        ),
+        migrations.AddIndex(
+            model_name='studentstatus',
+            index=models.Index(fields=['term', 'status'], name='status_term_status_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_alter_courseclass_certificate_type'),
+        ('institutes', '0002_institute_logo_variants'),
+        ('students', '0016_studentstatus_term'),
+        ('terms', '0005_lowtermcountalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('enquire', 'Enquire'), ('accepted', 'Accepted'), ('not_accepted', 'Not accepted'), ('no_show', 'No show'), ('active', 'Active'), ('retake', 'Retake'), ('failed', 'Failed'), ('graduate', 'Graduate'), ('drop_out', 'Drop out'), ('expelled', 'Expelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('course_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.courseclass')),
+                ('institute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='institutes.institute')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='terms.academicterm')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('institute', 'term', 'course_class', 'status'), name='uq_enrollment_rollup_key')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
 from apps.common.models import InstituteScopedModel
 from django.utils import timezone
 from django.db.models import Q
@@ -24,6 +27,8 @@ class Student(InstituteScopedModel):
     # identifiers/media
     spin = models.CharField(max_length=32)
     photo = models.ImageField(upload_to="students/", null=True, blank=True)
+    # variant name -> storage key (apps/common/images.py)
+    photo_variants = models.JSONField(default=dict, blank=True)
 
     # OPTIONAL fields -> null/blank allowed
     gender = models.CharField(
@@ -76,6 +81,15 @@ class Student(InstituteScopedModel):
                 name="stu_inst_last_first_idx",
             ),
             models.Index(fields=["spin"], name="stu_spin_idx"),
+            # fuzzy search / duplicate candidates (apps/common/search.py)
+            GinIndex(
+                OpClass(Lower("first_name"), name="gin_trgm_ops"),
+                name="stu_first_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Lower("last_name"), name="gin_trgm_ops"),
+                name="stu_last_trgm_idx",
+            ),
         ]
 
     def clean(self):
@@ -137,6 +151,18 @@ class StudentCustodian(InstituteScopedModel):
                 fields=["last_name", "first_name"],
                 name="cust_last_first_idx",
             ),
+            models.Index(
+                fields=["institute", "last_name", "first_name", "id"],
+                name="cust_inst_last_first_id_idx",
+            ),
+            GinIndex(
+                OpClass(Lower("first_name"), name="gin_trgm_ops"),
+                name="cust_first_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Lower("last_name"), name="gin_trgm_ops"),
+                name="cust_last_trgm_idx",
+            ),
         ]
 
     def __str__(self):
@@ -217,14 +243,32 @@ class StudentStatus(InstituteScopedModel):
         help_text="Employee who created this status change"
     )
 
+    # Term the row belongs to (services.current_state.status_term), resolved on
+    # write and re-derived when the institute's terms change
+    term = models.ForeignKey(
+        "terms.AcademicTerm",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        db_index=False,  # served by status_term_status_idx
+    )
+
     class Meta:
         ordering = ["-effective_at", "-id"]
         indexes = [
+            # per-term rosters / counts
+            models.Index(fields=["term", "status"], name="status_term_status_idx"),
             models.Index(
                 fields=["student", "course_class", "-effective_at"],
                 name="status_student_class_eff_idx",
             ),
             models.Index(fields=["course_class"], name="status_class_idx"),
+            # keyset pagination on (-is_active, -effective_at, -id)
+            models.Index(
+                fields=["institute", "-is_active", "-effective_at", "-id"],
+                name="status_inst_act_eff_id_idx",
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -246,6 +290,15 @@ class StudentStatus(InstituteScopedModel):
     def __str__(self):
         return f"{self.student_id}:{self.course_class_id}:{self.status}"
 
+    def save(self, *args, update_fields=None, **kwargs):
+        # the term is re-resolved from these on every save (signals.py), so a
+        # partial save of them must write it too
+        if update_fields is not None and {"status", "effective_at", "institute"} & set(
+            update_fields
+        ):
+            update_fields = {*update_fields, "term"}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     def clean(self):
         """
         Validate per-class transition and protect "second life":
@@ -282,3 +335,156 @@ class StudentStatus(InstituteScopedModel):
             raise ValidationError(
                 f"Effect date must be after the previous status's effect date ({prev.effective_at.strftime('%Y-%m-%d %H:%M:%S')})."
             )
+
+
+class StudentCurrentState(InstituteScopedModel):
+    """
+    Denormalized projection of a student's "current" status:
+    latest active status, otherwise latest status overall.
+    One row per student (students without any status have no row).
+    Maintained in the same transaction as the status writes, see
+    services/current_state.py; rebuild with `manage.py rebuild_student_state`.
+    """
+
+    student = models.OneToOneField(
+        "students.Student", on_delete=models.CASCADE, related_name="current_state"
+    )
+    status_row = models.OneToOneField(
+        StudentStatus, on_delete=models.CASCADE, related_name="+"
+    )
+    status = models.CharField(max_length=20, choices=Status.choices)
+    course_class = models.ForeignKey(
+        "courses.CourseClass", on_delete=models.PROTECT, related_name="+"
+    )
+    term = models.ForeignKey(
+        "terms.AcademicTerm",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    is_active = models.BooleanField(default=True)
+    effective_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["institute", "status", "is_active"],
+                name="stu_state_inst_status_idx",
+            ),
+            models.Index(
+                fields=["institute", "course_class"],
+                name="stu_state_inst_class_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}:{self.course_class_id}:{self.status}"
+
+
+class EnrollmentRollup(InstituteScopedModel):
+    """
+    Number of StudentStatus rows per (term, course class, status) - the
+    enrollment statistics. A row counts in its stored term, or (terminal
+    statuses, which have none) in the last term started by its effective date.
+    Kept up to date by services/enrollment_stats.py; rebuild with
+    `manage.py rebuild_enrollment_rollup`.
+    """
+
+    term = models.ForeignKey(
+        "terms.AcademicTerm", on_delete=models.CASCADE, related_name="+"
+    )
+    course_class = models.ForeignKey(
+        "courses.CourseClass", on_delete=models.CASCADE, related_name="+"
+    )
+    status = models.CharField(max_length=20, choices=Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["institute", "term", "course_class", "status"],
+                name="uq_enrollment_rollup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term_id}:{self.course_class_id}:{self.status}={self.count}"
+
+
+class StudentImportJob(InstituteScopedModel):
+    """
+    Queued XLSX import (POST /api/students/import-xlsx/?async=1).
+    The workbook is kept in the row until the worker
+    (`manage.py process_import_jobs`) has processed it.
+    """
+
+    class JobStatus(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    status = models.CharField(
+        max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED
+    )
+    commit = models.BooleanField(default=False)
+    atomic = models.BooleanField(default=False)
+
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    file_data = models.BinaryField(null=True, blank=True, editable=False)
+
+    total_rows = models.PositiveIntegerField(default=0)  # estimate from the sheet
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    validated_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    error_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "id"], name="stu_import_job_queue_idx"),
+            models.Index(
+                fields=["institute", "-created_at", "-id"],
+                name="stu_import_job_inst_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"import#{self.pk} {self.status} ({self.processed_rows}/{self.total_rows})"
+
+
+class StudentImportRow(models.Model):
+    """Row-level outcome of a StudentImportJob (same shape as the sync report)."""
+
+    job = models.ForeignKey(
+        StudentImportJob, on_delete=models.CASCADE, related_name="rows"
+    )
+    row_number = models.PositiveIntegerField()
+    action = models.CharField(max_length=10)  # validated | created | skipped | error
+    errors = models.JSONField(default=dict, blank=True)
+    instance_id = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["row_number", "id"]
+        indexes = [
+            models.Index(
+                fields=["job", "row_number", "id"], name="stu_import_row_job_idx"
+            ),
+            models.Index(fields=["job", "action"], name="stu_import_row_action_idx"),
+        ]
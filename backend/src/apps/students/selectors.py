@@ -0,0 +1,10 @@
+from django.db.models import QuerySet
+
+
+def with_current_state(qs: QuerySet) -> QuerySet:
+    """
+    Join each student's StudentCurrentState projection (plus its class) so the
+    current status and class cost no extra query per student; the term name
+    comes from the cached term calendar.
+    """
+    return qs.select_related("current_state", "current_state__course_class")
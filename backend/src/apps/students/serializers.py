@@ -2,12 +2,27 @@ from rest_framework import serializers
 
 from apps.courses.models import CourseClass
 
-from .models import Status, Student, StudentCustodian, StudentStatus
+from .models import (
+    Status,
+    Student,
+    StudentCurrentState,
+    StudentCustodian,
+    StudentImportJob,
+    StudentImportRow,
+    StudentStatus,
+)
+from .services.bulk_status import MAX_BULK_STUDENTS
 from .services.photos import ensure_student_photo_or_default
 from .services.dedup import has_potential_duplicate
 
-from apps.common.media import public_media_url
+from apps.common.images import pick_variant
+from apps.common.media import MediaUrlResolver
+from apps.employees.serializers import (
+    CreatedByFieldsMixin,
+    CreatorFunctionListSerializer,
+)
 from apps.common.generate_pin import generate_student_pin
+from apps.terms.calendar import get_term_calendar
 
 
 def mgr(model):
@@ -75,144 +90,46 @@ class StudentReadSerializer(serializers.ModelSerializer):
         timestamp = None
         if hasattr(obj, "updated_at") and obj.updated_at:
             timestamp = str(int(obj.updated_at.timestamp()))
-        return public_media_url(key, obj.institute_id, timestamp)
+        # one resolver per response: the institute logo fallback is looked up once
+        media = MediaUrlResolver.for_context(self.context)
+        if key:
+            key = pick_variant(key, obj.photo_variants, media.size)
+        return media.url(key, obj.institute_id, timestamp)
 
-    def get_current_status(self, obj):
+    def _current_state(self, obj):
         """
-        Get the current status of the student.
-        Priority: latest active status, otherwise latest status overall.
+        The student's StudentCurrentState projection (latest active status,
+        otherwise latest status overall), or None when the student has no status.
+        StudentViewSet joins it via select_related; otherwise it costs one query.
         """
-        # First try to get the latest active status
-        active_status = (
-            mgr(StudentStatus)
-            .filter(student=obj, is_active=True)
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        if active_status:
-            return active_status.status
-
-        # If no active status, get the latest status overall
-        latest_status = (
-            mgr(StudentStatus)
-            .filter(student=obj)
-            .order_by("-effective_at", "-id")
-            .first()
-        )
+        try:
+            return obj.current_state
+        except StudentCurrentState.DoesNotExist:
+            return None
 
-        return latest_status.status if latest_status else None
+    def get_current_status(self, obj):
+        state = self._current_state(obj)
+        return state.status if state else None
 
     def get_current_course_class(self, obj):
-        """
-        Get the ID of the current course class.
-        Priority: latest active status, otherwise latest status overall.
-        """
-        # First try to get the latest active status
-        active_status = (
-            mgr(StudentStatus)
-            .filter(student=obj, is_active=True)
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        if active_status:
-            return active_status.course_class_id
-
-        # If no active status, get the latest status overall
-        latest_status = (
-            mgr(StudentStatus)
-            .filter(student=obj)
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        return latest_status.course_class_id if latest_status else None
+        state = self._current_state(obj)
+        return state.course_class_id if state else None
 
     def get_current_course_class_name(self, obj):
-        """
-        Get the name of the current course class.
-        Priority: latest active status, otherwise latest status overall.
-        """
-        # First try to get the latest active status
-        active_status = (
-            mgr(StudentStatus)
-            .filter(student=obj, is_active=True)
-            .select_related("course_class")
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        if active_status:
-            return active_status.course_class.name if active_status.course_class else None
-
-        # If no active status, get the latest status overall
-        latest_status = (
-            mgr(StudentStatus)
-            .filter(student=obj)
-            .select_related("course_class")
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        return latest_status.course_class.name if latest_status and latest_status.course_class else None
+        state = self._current_state(obj)
+        return state.course_class.name if state and state.course_class else None
 
     def get_current_term_name(self, obj):
         """
-        Get the term name for the current student status.
-        Logic: Based on the status and effective_at date:
-        - For active status: find term where effective_at falls within term dates
-        - For enquire/accepted status: find the next future term after effective_at
+        Term of the current status, resolved when the status was written:
+        - For active status: the term where effective_at falls within term dates
+        - For enquire/accepted status: the next future term after effective_at
         """
-        from apps.terms.models import AcademicTerm
-
-        # First try to get the latest active status
-        active_status = (
-            mgr(StudentStatus)
-            .filter(student=obj, is_active=True)
-            .order_by("-effective_at", "-id")
-            .first()
-        )
-
-        if not active_status:
-            # If no active status, get the latest status overall
-            active_status = (
-                mgr(StudentStatus)
-                .filter(student=obj)
-                .order_by("-effective_at", "-id")
-                .first()
-            )
-
-        if not active_status or not active_status.effective_at:
+        state = self._current_state(obj)
+        if not state or not state.term_id:
             return None
-
-        status_code = active_status.status
-        effective_date = active_status.effective_at.date() if hasattr(active_status.effective_at, 'date') else active_status.effective_at
-
-        # For active students, find the term where effective_at falls within term dates
-        if status_code == Status.ACTIVE:
-            term = (
-                AcademicTerm.objects
-                .filter(
-                    institute_id=obj.institute_id,
-                    start_date__lte=effective_date,
-                    end_date__gte=effective_date
-                )
-                .first()
-            )
-            return term.name if term else None
-
-        # For enquire/accepted students, find the next future term after effective_at
-        if status_code in {Status.ENQUIRE, Status.ACCEPTED}:
-            next_term = (
-                AcademicTerm.objects
-                .filter(institute_id=obj.institute_id, start_date__gt=effective_date)
-                .order_by("start_date")
-                .first()
-            )
-            return next_term.name if next_term else None
-
-        return None
+        term = get_term_calendar(obj.institute_id).get(state.term_id)
+        return term.name if term else None
 
 
 class StudentWriteSerializer(serializers.ModelSerializer):
@@ -335,6 +252,29 @@ class StudentCustodianSerializer(serializers.ModelSerializer):
         return value
 
 
+def active_course_classes(institute_id):
+    """
+    Course classes statuses can be written for: those of active courses
+    (valid_until is NULL OR valid_until > today).
+    """
+    from django.utils import timezone
+    from django.db.models import Q
+
+    today = timezone.now().date()
+    return mgr(CourseClass).filter(course__institute_id=institute_id).filter(
+        Q(course__valid_until__isnull=True) | Q(course__valid_until__gt=today)
+    )
+
+
+def validate_not_past(value):
+    """Effective dates must not be in the past (5 minutes tolerance for clock skew)."""
+    from django.utils import timezone
+
+    if value and value < timezone.now() - timezone.timedelta(minutes=5):
+        raise serializers.ValidationError("Effective date cannot be in the past.")
+    return value
+
+
 class StudentStatusWriteSerializer(serializers.ModelSerializer):
     student = serializers.PrimaryKeyRelatedField(queryset=mgr(Student).none())
     course_class = serializers.PrimaryKeyRelatedField(
@@ -362,22 +302,10 @@ class StudentStatusWriteSerializer(serializers.ModelSerializer):
         req = self.context.get("request")
         iid = getattr(getattr(req, "user", None), "institute_id", None)
         if iid:
-            from django.utils import timezone
-            from django.db.models import Q
-
-            today = timezone.now().date()
             self.fields["student"].queryset = mgr(Student).filter(institute_id=iid)
-            # Only show course classes from active courses
-            # Active = valid_until is NULL OR valid_until > today
-            self.fields["course_class"].queryset = mgr(CourseClass).filter(
-                course__institute_id=iid
-            ).filter(
-                Q(course__valid_until__isnull=True) | Q(course__valid_until__gt=today)
-            )
+            self.fields["course_class"].queryset = active_course_classes(iid)
 
     def validate(self, attrs):
-        from django.utils import timezone
-
         req = self.context["request"]
         iid = req.user.institute_id
         student = attrs["student"]
@@ -386,15 +314,10 @@ class StudentStatusWriteSerializer(serializers.ModelSerializer):
         new_effective_at = attrs.get("effective_at")
 
         # Validate effective_at: must not be in the past
-        if new_effective_at:
-            now = timezone.now()
-            # Allow some tolerance for timezone issues (5 minutes)
-            if new_effective_at < now - timezone.timedelta(minutes=5):
-                raise serializers.ValidationError(
-                    {
-                        "effective_at": "Effective date cannot be in the past."
-                    }
-                )
+        try:
+            validate_not_past(new_effective_at)
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({"effective_at": e.detail})
 
         # current (in this class)
         last = (
@@ -446,6 +369,85 @@ class StudentStatusWriteSerializer(serializers.ModelSerializer):
         raise serializers.ValidationError("Invalid status code.")
 
 
+class StudentStatusBulkSerializer(serializers.Serializer):
+    """POST /api/student-statuses/bulk/: one transition for many students of a class."""
+
+    students = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_STUDENTS,
+    )
+    course_class = serializers.PrimaryKeyRelatedField(queryset=mgr(CourseClass).none())
+    status = serializers.ChoiceField(choices=Status.choices)
+    effective_at = serializers.DateTimeField(
+        required=False, validators=[validate_not_past]
+    )
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+    commit = serializers.BooleanField(default=True)
+    atomic = serializers.BooleanField(default=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        req = self.context.get("request")
+        iid = getattr(getattr(req, "user", None), "institute_id", None)
+        if iid:
+            self.fields["course_class"].queryset = active_course_classes(iid)
+
+
+class AllowedNextPairSerializer(serializers.Serializer):
+    student = serializers.IntegerField(min_value=1)
+    course_class = serializers.IntegerField(min_value=1)
+
+
+class AllowedNextBatchSerializer(serializers.Serializer):
+    """
+    Either `pairs`, or `course_class` with optional `students`
+    (without them: every student with a status in the class).
+    Students are checked against context["institute_id"].
+    """
+
+    pairs = AllowedNextPairSerializer(many=True, required=False)
+    course_class = serializers.IntegerField(min_value=1, required=False)
+    students = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+
+    def validate(self, attrs):
+        pairs = [(p["student"], p["course_class"]) for p in attrs.get("pairs", [])]
+        if pairs and attrs.get("course_class") and not attrs.get("students"):
+            raise serializers.ValidationError(
+                "Pass either pairs or a whole course_class, not both."
+            )
+        if attrs.get("students"):
+            if not attrs.get("course_class"):
+                raise serializers.ValidationError(
+                    {"course_class": "Required together with students."}
+                )
+            pairs += [(sid, attrs["course_class"]) for sid in attrs["students"]]
+            attrs["course_class"] = None
+        if not pairs and not attrs.get("course_class"):
+            raise serializers.ValidationError("Pass pairs, or a course_class.")
+        if len(pairs) > MAX_BULK_STUDENTS:
+            raise serializers.ValidationError(
+                f"At most {MAX_BULK_STUDENTS} pairs per request."
+            )
+        iid = self.context.get("institute_id")
+        wanted = {sid for sid, _ in pairs}
+        if iid and wanted:
+            known = set(
+                Student.all_objects.filter(institute_id=iid, pk__in=wanted).values_list(
+                    "pk", flat=True
+                )
+            )
+            unknown = sorted(wanted - known)
+            if unknown:
+                raise serializers.ValidationError(
+                    {"students": f"Unknown students: {unknown}"}
+                )
+        attrs["pairs"] = pairs
+        return attrs
+
+
 class CourseClassMinSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source="course.name", read_only=True)
 
@@ -454,7 +456,7 @@ class CourseClassMinSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "course_name")
 
 
-class StudentStatusReadSerializer(serializers.ModelSerializer):
+class StudentStatusReadSerializer(CreatedByFieldsMixin, serializers.ModelSerializer):
     course_class = CourseClassMinSerializer(read_only=True)
     class_name = serializers.CharField(source="course_class.name", read_only=True)
     term = serializers.SerializerMethodField()
@@ -476,75 +478,38 @@ class StudentStatusReadSerializer(serializers.ModelSerializer):
             "created_by_name",
             "created_by_function",
         )
-
-    def get_created_by_name(self, obj):
-        """Get the full name of the employee who created this status."""
-        if not obj.created_by:
-            return None
-        return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip()
-
-    def get_created_by_function(self, obj):
-        """Get the current function/role of the employee who created this status."""
-        if not obj.created_by:
-            return None
-
-        from django.utils import timezone
-        from apps.employees.models import EmployeeCareer
-
-        # Get the most recent function assignment for this employee
-        today = timezone.now().date()
-        current_function = (
-            EmployeeCareer.all_objects
-            .filter(
-                employee=obj.created_by,
-                start_date__lte=today
-            )
-            .order_by("-start_date", "-id")
-            .select_related("function")
-            .first()
-        )
-
-        if current_function and current_function.function:
-            return current_function.function.name
-
-        return None
+        list_serializer_class = CreatorFunctionListSerializer
 
     def get_term(self, obj):
-        """
-        Get the academic term name for this status record.
-        Logic: Based on the status and effective_at date:
-        - For active status: find term where effective_at falls within term dates
-        - For enquire/accepted status: find the next future term after effective_at
-        """
-        from apps.terms.models import AcademicTerm
+        """Name of the term stored on the row (resolved when it was written)."""
+        term = get_term_calendar(obj.institute_id).get(obj.term_id)
+        return term.name if term else None
 
-        if not obj.effective_at:
-            return None
 
-        status_code = obj.status
-        effective_date = obj.effective_at.date() if hasattr(obj.effective_at, 'date') else obj.effective_at
-
-        # For active students, find the term where effective_at falls within term dates
-        if status_code == Status.ACTIVE:
-            term = (
-                AcademicTerm.objects
-                .filter(
-                    institute_id=obj.institute_id,
-                    start_date__lte=effective_date,
-                    end_date__gte=effective_date
-                )
-                .first()
-            )
-            return term.name if term else None
-
-        # For enquire/accepted students, find the next future term after effective_at
-        if status_code in {Status.ENQUIRE, Status.ACCEPTED}:
-            next_term = (
-                AcademicTerm.objects
-                .filter(institute_id=obj.institute_id, start_date__gt=effective_date)
-                .order_by("start_date")
-                .first()
-            )
-            return next_term.name if next_term else None
+class StudentImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StudentImportJob
+        fields = [
+            "id",
+            "status",
+            "commit",
+            "atomic",
+            "file_name",
+            "total_rows",
+            "processed_rows",
+            "created_rows",
+            "validated_rows",
+            "skipped_rows",
+            "error_rows",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
 
-        return None
+class StudentImportRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StudentImportRow
+        fields = ["row_number", "action", "errors", "instance_id"]
@@ -0,0 +1,162 @@
+# apps/students/services/bulk_status.py
+"""
+One status transition for many students of a course class (graduate a whole
+class, ...). A constant number of statements whatever the number of students:
+lock the students, read their latest row in the class (DISTINCT ON), validate
+in memory against StudentStatus.ALLOWED, then one UPDATE (deactivate), one
+INSERT, one rollup upsert, one UPDATE of the formal dates and the
+current-state refresh.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.courses.models import CourseClass
+from apps.students.models import Status, Student, StudentStatus
+from apps.students.services.current_state import (
+    assign_status_term,
+    refresh_student_states,
+)
+from apps.students.services.enrollment_stats import apply_rollup_deltas, count_rows
+
+MAX_BULK_STUDENTS = 1000
+
+TERMINAL_EXIT = {Status.DROP_OUT, Status.GRADUATE, Status.EXPELLED, Status.FAILED}
+
+
+@dataclass
+class StudentOutcome:
+    student: int
+    action: str  # "validated" | "created" | "error"
+    errors: Dict[str, Any] = field(default_factory=dict)
+    status_id: Optional[int] = None
+
+
+def formal_date_updates(cc: CourseClass, new_status: str) -> Dict[str, Any]:
+    """Set-wise counterpart of statuses._apply_formal_dates, as QuerySet.update() kwargs."""
+    if new_status == Status.ENQUIRE:
+        return {"entry_date": Value(cc.start_date)}
+    if new_status in (Status.NOT_ACCEPTED, Status.NO_SHOW):
+        return {"exit_date": Value(cc.start_date)}
+    if new_status in TERMINAL_EXIT:
+        return {"exit_date": Value(cc.end_date)}
+    if new_status == Status.RETAKE:
+        return {"exit_date": None}
+    if new_status == Status.ACTIVE:
+        return {
+            "entry_date": Coalesce(F("entry_date"), Value(cc.start_date)),
+            "exit_date": None,
+        }
+    return {}
+
+
+def _check(prev: Optional[StudentStatus], new_status: str, effective_at) -> Dict[str, str]:
+    """The per-class rules of StudentStatusWriteSerializer.validate, in memory."""
+    prev_code = prev.status if prev else None
+    if new_status not in StudentStatus.ALLOWED.get(prev_code, set()):
+        return {
+            "status": f"Transition from '{prev_code or '∅'}' to '{new_status}' "
+            f"is not allowed for this class."
+        }
+    if prev and effective_at <= prev.effective_at:
+        return {
+            "effective_at": "Effect date must be after the previous status's "
+            f"effect date ({prev.effective_at.strftime('%Y-%m-%d %H:%M:%S')})."
+        }
+    return {}
+
+
+def bulk_set_status(
+    *,
+    institute_id: int,
+    student_ids: Sequence[int],
+    course_class: CourseClass,
+    new_status: str,
+    effective_at=None,
+    note: str = "",
+    created_by_id: Optional[int] = None,
+    commit: bool = True,
+    atomic: bool = False,
+) -> List[StudentOutcome]:
+    """
+    Apply `new_status` in `course_class` to every student that allows it.
+    Outcomes come back in input order; with `atomic`, one error writes nothing.
+    """
+    ids = list(dict.fromkeys(student_ids))
+    effective_at = effective_at or timezone.now()
+
+    with transaction.atomic():
+        # lock the students (as set_student_status does) - serializes writers
+        known = set(
+            Student.all_objects.select_for_update()
+            .filter(institute_id=institute_id, id__in=ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        latest = {
+            s.student_id: s
+            for s in StudentStatus.all_objects.filter(
+                institute_id=institute_id,
+                course_class=course_class,
+                student_id__in=known,
+            )
+            .order_by("student_id", "-is_active", "-effective_at", "-id")
+            .distinct("student_id")
+        }
+
+        outcomes: List[StudentOutcome] = []
+        for sid in ids:
+            if sid not in known:
+                errors = {"student": "Student not found in this institute."}
+            else:
+                errors = _check(latest.get(sid), new_status, effective_at)
+            outcomes.append(
+                StudentOutcome(
+                    student=sid,
+                    action="error" if errors else "validated",
+                    errors=errors,
+                )
+            )
+
+        ok = [o for o in outcomes if o.action != "error"]
+        if not commit or not ok or (atomic and len(ok) != len(outcomes)):
+            return outcomes
+
+        ok_ids = [o.student for o in ok]
+        StudentStatus.all_objects.filter(
+            institute_id=institute_id,
+            course_class=course_class,
+            student_id__in=ok_ids,
+            is_active=True,
+        ).update(is_active=False)
+
+        rows = []
+        for sid in ok_ids:
+            row = StudentStatus(
+                institute_id=institute_id,
+                student_id=sid,
+                course_class=course_class,
+                status=new_status,
+                is_active=True,
+                note=note or "",
+                effective_at=effective_at,
+                created_by_id=created_by_id,
+            )
+            assign_status_term(row)  # bulk_create skips the pre_save receiver
+            rows.append(row)
+        created = StudentStatus.all_objects.bulk_create(rows)
+        apply_rollup_deltas(count_rows(created))
+
+        if updates := formal_date_updates(course_class, new_status):
+            Student.all_objects.filter(id__in=ok_ids).update(**updates)
+        refresh_student_states(ok_ids)
+
+        for o, row in zip(ok, created):
+            o.action, o.status_id = "created", row.id
+    return outcomes
@@ -0,0 +1,145 @@
+# apps/students/services/current_state.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from django.db.models import Case, DateField, OuterRef, Subquery, When
+from django.db.models.functions import Cast
+
+from apps.students.models import Status, StudentCurrentState, StudentStatus
+from apps.terms.calendar import TermCalendar, TermEntry, get_term_calendar
+from apps.terms.models import AcademicTerm
+
+# Statuses that belong to the term starting after their effective date
+UPCOMING_TERM_STATUSES = {Status.ENQUIRE, Status.ACCEPTED}
+
+STATE_FIELDS = [
+    "institute",
+    "status_row",
+    "status",
+    "course_class",
+    "term",
+    "is_active",
+    "effective_at",
+    "updated_at",
+]
+
+
+def status_term(
+    calendar: TermCalendar, status: Optional[str], effective_at
+) -> Optional[TermEntry]:
+    """
+    Term a status row belongs to:
+    - ACTIVE: the term whose dates contain effective_at
+    - ENQUIRE/ACCEPTED: the next term starting after effective_at
+    - anything else: None
+    """
+    if not status or not effective_at:
+        return None
+    d: date = effective_at.date() if isinstance(effective_at, datetime) else effective_at
+
+    if status == Status.ACTIVE:
+        return calendar.containing(d)
+    if status in UPCOMING_TERM_STATUSES:
+        return calendar.next_after(d)
+    return None
+
+
+def assign_status_term(row: StudentStatus) -> None:
+    """Set row.term from its status / effective_at (cached calendar, no query)."""
+    term = status_term(get_term_calendar(row.institute_id), row.status, row.effective_at)
+    row.term_id = term.id if term else None
+
+
+def status_term_expression():
+    """
+    SQL counterpart of status_term() for UPDATEs over rows that carry
+    institute_id / status / effective_at columns.
+    """
+    # the connection runs in UTC, so the cast matches effective_at.date()
+    eff_date = Cast(OuterRef("effective_at"), output_field=DateField())
+    terms = AcademicTerm.objects.filter(institute_id=OuterRef("institute_id"))
+    containing = (
+        terms.filter(start_date__lte=eff_date, end_date__gte=eff_date)
+        .order_by("-start_date")
+        .values("id")[:1]
+    )
+    upcoming = (
+        terms.filter(start_date__gt=eff_date).order_by("start_date").values("id")[:1]
+    )
+    return Case(
+        When(status=Status.ACTIVE, then=Subquery(containing)),
+        When(status__in=UPCOMING_TERM_STATUSES, then=Subquery(upcoming)),
+        default=None,
+    )
+
+
+def refresh_student_states(student_ids: Iterable[int]) -> int:
+    """
+    Recompute the StudentCurrentState rows of the given students.
+    Costs one DISTINCT ON select and one upsert regardless of the number of
+    students (terms are the rows' stored ones). Call it inside the
+    transaction that wrote the statuses.
+    """
+    ids = sorted(set(student_ids))
+    if not ids:
+        return 0
+
+    rows = list(
+        StudentStatus.all_objects.filter(student_id__in=ids)
+        .order_by("student_id", "-is_active", "-effective_at", "-id")
+        .distinct("student_id")
+    )
+
+    states = [
+        StudentCurrentState(
+            institute_id=r.institute_id,
+            student_id=r.student_id,
+            status_row_id=r.id,
+            status=r.status,
+            course_class_id=r.course_class_id,
+            term_id=r.term_id,
+            is_active=r.is_active,
+            effective_at=r.effective_at,
+        )
+        for r in rows
+    ]
+    if states:
+        StudentCurrentState.all_objects.bulk_create(
+            states,
+            update_conflicts=True,
+            unique_fields=["student"],
+            update_fields=STATE_FIELDS,
+        )
+
+    if len(states) != len(ids):
+        # students whose last status row is gone
+        StudentCurrentState.all_objects.filter(student_id__in=ids).exclude(
+            student_id__in=[s.student_id for s in states]
+        ).delete()
+
+    return len(states)
+
+
+def rederive_status_terms(institute_id: int) -> int:
+    """Re-resolve StudentStatus.term for the institute's rows (one UPDATE)."""
+    return StudentStatus.all_objects.filter(institute_id=institute_id).update(
+        term=status_term_expression()
+    )
+
+
+def sync_state_terms(institute_id: int) -> int:
+    """Copy each current-state row's term from the status row it points to."""
+    row_term = StudentStatus.all_objects.filter(pk=OuterRef("status_row_id")).values(
+        "term_id"
+    )[:1]
+    return StudentCurrentState.all_objects.filter(institute_id=institute_id).update(
+        term=Subquery(row_term)
+    )
+
+
+def rederive_state_terms(institute_id: int) -> int:
+    """Re-resolve the stored terms after the institute's AcademicTerm rows changed."""
+    rederive_status_terms(institute_id)
+    return sync_state_terms(institute_id)
@@ -1,6 +1,7 @@
-from typing import Iterable
+from typing import Dict, Iterable, List
+from apps.common.search import exact_name_pairs, similar_name_pairs
 from apps.students.models import Status, Student, StudentStatus
-from django.db.models import Q
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 
 # Define the “order” from the Access list to express "<= active"
 STATUS_ORDER = {
@@ -39,24 +40,53 @@ def has_potential_duplicate(
     AND has an active status in {enquire, accepted, active}.
     Also guard when first/last names are swapped.
     """
-    fn = _clean(first_name)
-    ln = _clean(last_name)
-
     # Candidate set by names (normal + swapped) + DOB in the same institute
-    base = Student.all_objects.filter(
-        institute_id=institute_id,
-        date_of_birth=date_of_birth,
-    ).filter(
-        Q(first_name__iexact=fn, last_name__iexact=ln)
-        | Q(first_name__iexact=ln, last_name__iexact=fn)  # swapped
+    base = exact_name_pairs(
+        Student.all_objects.filter(
+            institute_id=institute_id,
+            date_of_birth=date_of_birth,
+        ),
+        _clean(first_name),
+        _clean(last_name),
     )
 
-    if not base.exists():
-        return False
-
     # Require current status in ACTIVE_OR_PRIOR
     return StudentStatus.all_objects.filter(
-        student__in=base,
+        student__in=base.values("id"),
         is_active=True,
         status__in=ACTIVE_OR_PRIOR,
     ).exists()
+
+
+def possible_duplicates(
+    institute_id: int, first_name: str, last_name: str, date_of_birth, *, limit=10
+) -> List[Dict]:
+    """
+    Ranked near-duplicates (trigram-similar names, also swapped) for review:
+    same date of birth first, then by name similarity. Advisory only; the
+    blocking rule stays has_potential_duplicate().
+    """
+    qs = (
+        similar_name_pairs(
+            Student.all_objects.filter(institute_id=institute_id),
+            _clean(first_name),
+            _clean(last_name),
+        )
+        .annotate(
+            same_date_of_birth=ExpressionWrapper(
+                Q(date_of_birth=date_of_birth), output_field=BooleanField()
+            )
+        )
+        .order_by("-same_date_of_birth", "-similarity", "id")
+        .values(
+            "id",
+            "spin",
+            "first_name",
+            "last_name",
+            "date_of_birth",
+            "similarity",
+            "same_date_of_birth",
+            current_status=F("current_state__status"),
+        )[:limit]
+    )
+    return [{**row, "similarity": round(row["similarity"], 3)} for row in qs]
@@ -0,0 +1,134 @@
+# apps/students/services/enrollment_stats.py
+"""
+Enrollment statistics: StudentStatus rows counted per (term, course class,
+status) in the EnrollmentRollup table.
+
+- single-row writes adjust the counts from the StudentStatus signals
+  (apps/students/signals.py), bulk writers call apply_rollup_deltas()
+- an AcademicTerm change moves rows between terms: the institute's rollup
+  is rebuilt, like `manage.py rebuild_enrollment_rollup` does
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DateField, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce
+
+from apps.common.upserts import upsert_add
+from apps.students.models import ALL_STATUS_VALUES, EnrollmentRollup, StudentStatus
+from apps.terms.calendar import get_term_calendar
+from apps.terms.models import AcademicTerm
+
+# (institute_id, term_id, course_class_id, status)
+RollupKey = Tuple[int, int, int, str]
+
+
+def rollup_key(row: StudentStatus) -> Optional[RollupKey]:
+    """
+    Rollup bucket of a status row: its stored term, else (terminal statuses)
+    the last term started by its effective date. None outside any term.
+    """
+    term_id = row.term_id
+    if not term_id and row.effective_at:
+        eff = row.effective_at
+        d: date = eff.date() if isinstance(eff, datetime) else eff
+        term = get_term_calendar(row.institute_id).last_started(d)
+        term_id = term.id if term else None
+    if not term_id or not row.course_class_id:
+        return None
+    return (row.institute_id, term_id, row.course_class_id, row.status)
+
+
+def count_rows(rows: Iterable[StudentStatus]) -> Counter:
+    """+1 per row in its bucket, for apply_rollup_deltas()."""
+    return Counter(key for key in map(rollup_key, rows) if key)
+
+
+def apply_rollup_deltas(deltas: Dict[Optional[RollupKey], int]) -> None:
+    """Add the per-bucket status counts (None keys: outside any term, skipped)."""
+    upsert_add(
+        EnrollmentRollup,
+        ("institute_id", "term_id", "course_class_id", "status"),
+        ("count",),
+        ((k, (n,)) for k, n in deltas.items() if k and n),
+    )
+
+
+@transaction.atomic
+def rebuild_enrollment_rollup(institute_id: int) -> int:
+    """Recount the institute's buckets from StudentStatus (one grouped select)."""
+    eff_date = Cast(OuterRef("effective_at"), output_field=DateField())
+    last_started = (
+        AcademicTerm.objects.filter(
+            institute_id=OuterRef("institute_id"), start_date__lte=eff_date
+        )
+        .order_by("-start_date", "-id")
+        .values("id")[:1]
+    )
+    counts = (
+        StudentStatus.all_objects.filter(institute_id=institute_id)
+        .annotate(rollup_term=Coalesce("term", Subquery(last_started)))
+        .filter(rollup_term__isnull=False)
+        .values("rollup_term", "course_class", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    rows = [
+        EnrollmentRollup(
+            institute_id=institute_id,
+            term_id=c["rollup_term"],
+            course_class_id=c["course_class"],
+            status=c["status"],
+            count=c["n"],
+        )
+        for c in counts
+    ]
+    EnrollmentRollup.all_objects.filter(institute_id=institute_id).delete()
+    EnrollmentRollup.all_objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def enrollment_stats(
+    institute_id: int,
+    *,
+    term_id: Optional[int] = None,
+    course_class_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    One entry per (term, course class) with the count of every status,
+    oldest term first.
+    """
+    qs = EnrollmentRollup.all_objects.filter(institute_id=institute_id, count__gt=0)
+    if term_id:
+        qs = qs.filter(term_id=term_id)
+    if course_class_id:
+        qs = qs.filter(course_class_id=course_class_id)
+    if course_id:
+        qs = qs.filter(course_class__course_id=course_id)
+    rows = qs.order_by(
+        "term__start_date", "term_id", "course_class__name", "course_class_id"
+    ).values_list(
+        "term_id", "term__name", "course_class_id", "course_class__name", "status", "count"
+    )
+
+    out: List[dict] = []
+    for term, term_name, cc, cc_name, status, n in rows:
+        if not out or (out[-1]["term"], out[-1]["course_class"]) != (term, cc):
+            out.append(
+                {
+                    "term": term,
+                    "term_name": term_name,
+                    "course_class": cc,
+                    "course_class_name": cc_name,
+                    "counts": dict.fromkeys(ALL_STATUS_VALUES, 0),
+                    "total": 0,
+                }
+            )
+        out[-1]["counts"][status] = n
+        out[-1]["total"] += n
+    return out
@@ -0,0 +1,210 @@
+# apps/students/services/import_jobs.py
+from __future__ import annotations
+
+import io
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.common.imports import AtomicImportError, RowOutcome
+from apps.students.models import StudentImportJob, StudentImportRow
+from apps.students.services.import_xlsx import import_student_rows
+
+logger = logging.getLogger(__name__)
+
+JobStatus = StudentImportJob.JobStatus
+
+COUNTER_FIELDS = {
+    "created": "created_rows",
+    "validated": "validated_rows",
+    "skipped": "skipped_rows",
+    "error": "error_rows",
+}
+
+
+def enqueue_import_job(
+    *, institute_id: int, user, file_obj, commit: bool, atomic: bool
+) -> StudentImportJob:
+    """Store the uploaded workbook as a queued job (picked up by process_import_jobs)."""
+    return StudentImportJob.all_objects.create(
+        institute_id=institute_id,
+        requested_by=user if getattr(user, "pk", None) else None,
+        commit=commit,
+        atomic=atomic,
+        file_name=getattr(file_obj, "name", "") or "",
+        file_data=file_obj.read(),
+    )
+
+
+def claim_next_job() -> Optional[StudentImportJob]:
+    """
+    Take the oldest queued job. SKIP LOCKED lets several workers drain the
+    queue without waiting on each other or double-claiming a job.
+    """
+    with transaction.atomic():
+        job = (
+            StudentImportJob.all_objects.select_for_update(skip_locked=True)
+            .filter(status=JobStatus.QUEUED)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = JobStatus.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+        return job
+
+
+def fail_stale_jobs(older_than: timedelta) -> int:
+    """Jobs left RUNNING by a dead worker (no progress for `older_than`)."""
+    return StudentImportJob.all_objects.filter(
+        status=JobStatus.RUNNING, updated_at__lt=timezone.now() - older_than
+    ).update(
+        status=JobStatus.FAILED,
+        error="Worker stopped before the import finished.",
+        finished_at=timezone.now(),
+        file_data=None,
+    )
+
+
+def _counts(outcomes: List[RowOutcome]) -> Dict[str, int]:
+    counts = {"processed_rows": len(outcomes)}
+    for action, column in COUNTER_FIELDS.items():
+        counts[column] = sum(1 for o in outcomes if o.action == action)
+    return counts
+
+
+def _store_rows(job: StudentImportJob, outcomes: List[RowOutcome]) -> None:
+    StudentImportRow.objects.bulk_create(
+        [
+            StudentImportRow(
+                job=job,
+                row_number=o.row_number,
+                action=o.action,
+                errors=o.errors or {},
+                instance_id=o.instance_id,
+            )
+            for o in outcomes
+        ]
+    )
+
+
+def _record(job: StudentImportJob, outcomes: List[RowOutcome]) -> None:
+    """Persist one settled chunk of outcomes and bump the progress counters."""
+    if not outcomes:
+        return
+    _store_rows(job, outcomes)
+    counts = {c: F(c) + n for c, n in _counts(outcomes).items() if n}
+    StudentImportJob.all_objects.filter(pk=job.pk).update(
+        updated_at=timezone.now(), **counts
+    )
+
+
+def _record_all(job: StudentImportJob, outcomes: List[RowOutcome]) -> None:
+    """An atomic job's row report, stored once its transaction is over."""
+    _store_rows(job, outcomes)
+    StudentImportJob.all_objects.filter(pk=job.pk).update(
+        updated_at=timezone.now(), **_counts(outcomes)
+    )
+
+
+@contextmanager
+def _progress_connection() -> Iterator:
+    """
+    A separate (autocommit) connection for an atomic job's progress: the
+    import's transaction would hide the counters until it commits, and would
+    hold the job row's lock (stalling fail_stale_jobs) for its whole run.
+    """
+    conn = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _bump_progress(conn, job: StudentImportJob, outcomes: List[RowOutcome]) -> None:
+    """Counters only; the rows follow in _record_all() after the commit."""
+    if not outcomes:
+        return
+    counts = {c: n for c, n in _counts(outcomes).items() if n}
+    q = conn.ops.quote_name
+    sets = ", ".join(f"{q(c)} = {q(c)} + %s" for c in counts)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"UPDATE {q(StudentImportJob._meta.db_table)} "
+            f"SET {sets}, {q('updated_at')} = %s WHERE id = %s",
+            [*counts.values(), timezone.now(), job.pk],
+        )
+
+
+def _finish(job: StudentImportJob, status: str, error: str = "") -> None:
+    StudentImportJob.all_objects.filter(pk=job.pk).update(
+        status=status,
+        error=error,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+        file_data=None,  # the row report is kept, the upload is not
+    )
+
+
+def run_import_job(job: StudentImportJob) -> None:
+    """
+    Import a claimed job's workbook, recording progress chunk by chunk.
+
+    Atomic jobs count their progress on a separate connection while the
+    import runs; their row report is stored when the transaction is over.
+    """
+    try:
+        wb = load_workbook(
+            io.BytesIO(bytes(job.file_data or b"")), read_only=True, data_only=True
+        )
+    except Exception as e:
+        _finish(job, JobStatus.FAILED, f"Could not read workbook: {e}")
+        return
+
+    try:
+        ws = wb.active
+        StudentImportJob.all_objects.filter(pk=job.pk).update(
+            total_rows=max((ws.max_row or 1) - 1, 0)
+        )
+        rows = ws.iter_rows(values_only=True)
+
+        if job.commit and job.atomic:
+            with _progress_connection() as conn, transaction.atomic():
+                report = import_student_rows(
+                    job.institute_id, rows, commit=True, atomic=True,
+                    on_progress=lambda outcomes: _bump_progress(conn, job, outcomes),
+                )
+        else:
+            report = import_student_rows(
+                job.institute_id, rows, commit=job.commit, atomic=False,
+                on_progress=lambda outcomes: _record(job, outcomes),
+            )
+    except AtomicImportError as e:
+        _record_all(job, [RowOutcome(**r) for r in e.report["rows"]])
+        _finish(job, JobStatus.FAILED, str(e))
+        return
+    except Exception as e:
+        logger.exception("Student import job %s failed", job.pk)
+        if job.commit and job.atomic:
+            _record_all(job, [])  # rolled back: drop the in-flight progress
+        _finish(job, JobStatus.FAILED, str(e))
+        return
+    finally:
+        wb.close()
+
+    if report["summary"].get("total_rows") is None:
+        # header-level failure (e.g. missing required columns): nothing was streamed
+        _record(job, [RowOutcome(**r) for r in report["rows"]])
+        _finish(job, JobStatus.FAILED, str(report["rows"][0]["errors"]))
+        return
+    if job.commit and job.atomic:
+        _record_all(job, [RowOutcome(**r) for r in report["rows"]])
+    _finish(job, JobStatus.DONE)
@@ -1,16 +1,27 @@
 # apps/students/services/import_xlsx.py
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import date, datetime
 
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.utils.dateparse import parse_date
 from openpyxl import load_workbook
+from rest_framework import serializers
 
+from apps.common.generate_pin import generate_student_pin, reserve_student_pins
+from apps.common.imports import (
+    AtomicImportError,
+    RowOutcome,
+    error_report,
+    import_report,
+)
 from apps.students.serializers import StudentWriteSerializer
-from apps.students.models import Student
+from apps.students.models import Student, StudentStatus
+from apps.students.services.dedup import ACTIVE_OR_PRIOR
+from apps.students.services.photos import ensure_student_photo_or_default
 
 
 # --- Import contract (columns) -------------------------------------------------
@@ -23,6 +34,17 @@ from apps.students.models import Student
 
 REQUIRED = {"first_name", "last_name", "date_of_birth"}
 
+# Rows validated / inserted per batch (one dedup query, one PIN reservation and
+# one INSERT per chunk).
+DEFAULT_CHUNK_SIZE = 500
+
+DUPLICATE_MSG = (
+    "A student with the same name and birth date already exists (status ≤ active)."
+)
+UNIQUE_MSG = (
+    'duplicate key value violates unique constraint "uq_student_person_like"'
+)
+
 CANONICAL_COLUMNS = [
     "first_name",
     "last_name",
@@ -46,14 +68,6 @@ CANONICAL_COLUMNS = [
 ]
 
 
-@dataclass
-class RowOutcome:
-    row_number: int
-    action: str  # "validated" | "created" | "skipped" | "error"
-    errors: Dict[str, Any] = field(default_factory=dict)
-    instance_id: Optional[int] = None
-
-
 def _coerce_date(val: Any) -> Optional[date]:
     """
     Accepts Excel-native datetime/date or ISO-like strings. Returns date or None.
@@ -105,140 +119,267 @@ def _validate_required(payload: Dict[str, Any]) -> Dict[str, str]:
     return errors
 
 
-def import_students_xlsx(
-    request,
-    file_obj,
-    *,
-    commit: bool = False,
-    atomic: bool = False,
-) -> Dict[str, Any]:
+def _report(outcomes: List[RowOutcome], *, commit: bool, atomic: bool) -> Dict[str, Any]:
+    return {
+        **import_report(outcomes, commit=commit, atomic=atomic),
+        "expected_columns": CANONICAL_COLUMNS,
+    }
+
+
+def _fold(name: Optional[str]) -> str:
+    # the lower() folding of apps.common.search.exact_name_pairs (upper() and
+    # lower() disagree on some Unicode names)
+    return (name or "").strip().lower()
+
+
+@dataclass
+class _ReadyRow:
+    outcome: RowOutcome
+    data: Dict[str, Any]
+
+
+class _DuplicateIndex:
     """
-    Perform a dry-run (commit=False) or actual import (commit=True).
-    If atomic=True and commit=True -> single transaction over all rows.
-    Otherwise we use per-row transactions so good rows are not blocked by bad ones.
+    The import's view of existing students, loaded once per chunk by DOB.
 
-    Returns a summary with row-level outcomes.
+    - `blocking`: (first, last, dob), lower-cased, of students holding an active status in
+      ACTIVE_OR_PRIOR -> has_potential_duplicate() semantics (case-insensitive,
+      swapped names included)
+    - `exact`: (first, last, dob) of all students and of rows accepted earlier
+      in the file -> the uq_student_person_like constraint
     """
-    iid = getattr(request.user, "institute_id", None)
-    if not iid:
-        return {
-            "summary": {"created": 0, "validated": 0, "skipped": 0, "errors": 1},
-            "rows": [
-                RowOutcome(
-                    row_number=0,
-                    action="error",
-                    errors={"institute": "User has no institute assigned."},
-                ).__dict__
-            ],
-        }
 
-    wb = load_workbook(file_obj, read_only=True, data_only=True)
-    ws = wb.active
+    def __init__(self, institute_id: int):
+        self.institute_id = institute_id
+        self.blocking: Set[Tuple[str, str, date]] = set()
+        self.exact: Set[Tuple[str, str, date]] = set()
+        self._loaded_dobs: Set[date] = set()
 
-    # header row
-    headers: List[str] = []
-    first = True
-    outcomes: List[RowOutcome] = []
-    created = validated = skipped = errors = 0
+    def load(self, dobs: Iterable[date]) -> None:
+        todo = set(dobs) - self._loaded_dobs
+        if not todo:
+            return
+        active = StudentStatus.all_objects.filter(
+            student_id=OuterRef("pk"), is_active=True, status__in=ACTIVE_OR_PRIOR
+        )
+        rows = (
+            Student.all_objects.filter(
+                institute_id=self.institute_id, date_of_birth__in=todo
+            )
+            .annotate(_blocking=Exists(active))
+            .values_list("first_name", "last_name", "date_of_birth", "_blocking")
+        )
+        for fn, ln, dob, blocking in rows:
+            self.exact.add((fn, ln, dob))
+            if blocking:
+                self.blocking.add((_fold(fn), _fold(ln), dob))
+        self._loaded_dobs |= todo
+
+    def check(self, data: Dict[str, Any]) -> Optional[str]:
+        fn, ln, dob = data["first_name"], data["last_name"], data["date_of_birth"]
+        first, last = _fold(fn), _fold(ln)
+        if (first, last, dob) in self.blocking or (last, first, dob) in self.blocking:
+            return DUPLICATE_MSG
+        if (fn, ln, dob) in self.exact:
+            return UNIQUE_MSG
+        return None
+
+    def add(self, data: Dict[str, Any]) -> None:
+        self.exact.add((data["first_name"], data["last_name"], data["date_of_birth"]))
 
-    # Pre-create a consistent serializer context (respects your domain rules)
-    context = {"request": request}
 
-    def _process_row(row_idx: int, values: List[Any]) -> RowOutcome:
+def _validate_chunk(
+    chunk: List[Tuple[int, List[Any]]],
+    headers: List[str],
+    dups: _DuplicateIndex,
+    validator: StudentWriteSerializer,
+) -> Tuple[List[RowOutcome], List[_ReadyRow]]:
+    """
+    Field validation per row (pure Python), then duplicates against the
+    prefetched index. `validator` is one serializer reused for every row:
+    building a ModelSerializer's fields costs more than validating a row.
+    """
+    outcomes: List[RowOutcome] = []
+    checked: List[_ReadyRow] = []
+    for row_idx, values in chunk:
         payload = _row_to_payload(headers, values)
         req_errs = _validate_required(payload)
         if req_errs:
-            return RowOutcome(row_number=row_idx, action="error", errors=req_errs)
+            outcomes.append(
+                RowOutcome(row_number=row_idx, action="error", errors=req_errs)
+            )
+            continue
+        try:
+            data = validator.run_validation(payload)
+        except serializers.ValidationError as exc:
+            outcomes.append(
+                RowOutcome(row_number=row_idx, action="error", errors=exc.detail)
+            )
+            continue
+        outcome = RowOutcome(row_number=row_idx, action="validated")
+        outcomes.append(outcome)
+        checked.append(_ReadyRow(outcome=outcome, data=dict(data)))
+
+    dups.load(r.data["date_of_birth"] for r in checked)
+    ready: List[_ReadyRow] = []
+    for r in checked:
+        msg = dups.check(r.data)
+        if msg:
+            r.outcome.action = "error"
+            r.outcome.errors = {"non_field_errors": [msg]}
+            continue
+        dups.add(r.data)  # later rows of the same file collide with this one
+        ready.append(r)
+    return outcomes, ready
 
-        # Serializer will:
-        # - enforce required fields again
-        # - check dedup via has_potential_duplicate(...)
-        # - set institute_id + spin
-        # - create initial StudentStatus (ENQUIRE) with nearest term
-        ser = StudentWriteSerializer(data=payload, context=context)
-        if not ser.is_valid():
-            return RowOutcome(row_number=row_idx, action="error", errors=ser.errors)
 
-        if not commit:
-            return RowOutcome(row_number=row_idx, action="validated")
+def _insert_chunk(institute_id: int, ready: List[_ReadyRow]) -> None:
+    """One PIN block reservation + one INSERT for the whole chunk."""
+    pins = reserve_student_pins(institute_id=institute_id, count=len(ready))
+    students = [
+        Student(institute_id=institute_id, spin=pin.pin, **r.data)
+        for r, pin in zip(ready, pins)
+    ]
+    Student.all_objects.bulk_create(students)
+    for r, student in zip(ready, students):
+        ensure_student_photo_or_default(student, None)
+        r.outcome.action = "created"
+        r.outcome.instance_id = student.id
 
-        # Commit path
+
+def _insert_rows_one_by_one(institute_id: int, ready: List[_ReadyRow]) -> None:
+    """Fallback when a chunk INSERT hits a constraint (e.g. a concurrent import)."""
+    for r in ready:
         try:
-            obj: Student = ser.save()
-            return RowOutcome(row_number=row_idx, action="created", instance_id=obj.id)
+            with transaction.atomic():
+                spin = generate_student_pin(institute_id=institute_id).pin
+                student = Student.all_objects.create(
+                    institute_id=institute_id, spin=spin, **r.data
+                )
+                ensure_student_photo_or_default(student, None)
         except Exception as e:  # keep granular later if desired
-            return RowOutcome(
-                row_number=row_idx,
-                action="error",
-                errors={"non_field_errors": [str(e)]},
-            )
-
-    # Iterate rows
-    for i, row in enumerate(ws.iter_rows(values_only=True), start=1):
-        if first:
-            headers = [str(c or "").strip() for c in row]
-            first = False
-            # quick sanity check for required columns present
-            missing = REQUIRED.difference({h.lower() for h in headers})
-            if missing:
-                msg = f"Missing required columns: {', '.join(sorted(missing))}"
-                return {
-                    "summary": {
-                        "created": 0,
-                        "validated": 0,
-                        "skipped": 0,
-                        "errors": 1,
-                    },
-                    "rows": [
-                        RowOutcome(
-                            row_number=1, action="error", errors={"header": msg}
-                        ).__dict__
-                    ],
-                }
+            r.outcome.action = "error"
+            r.outcome.errors = {"non_field_errors": [str(e)]}
             continue
+        r.outcome.action = "created"
+        r.outcome.instance_id = student.id
+
 
+def _chunks(
+    rows: Iterable[Iterable[Any]], size: int
+) -> Iterable[List[Tuple[int, List[Any]]]]:
+    chunk: List[Tuple[int, List[Any]]] = []
+    for i, row in enumerate(rows, start=2):
         # skip empty lines
         if not any(x not in (None, "", 0) for x in row):
             continue
+        chunk.append((i, list(row)))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-        if commit and atomic:
-            # single transaction around entire import (handled outside)
-            outcome = _process_row(i, list(row))
-        elif commit:
-            # per-row transaction (good rows survive)
-            with transaction.atomic():
-                outcome = _process_row(i, list(row))
-        else:
-            # dry-run
-            outcome = _process_row(i, list(row))
 
-        outcomes.append(outcome)
-        if outcome.action == "created":
-            created += 1
-        elif outcome.action == "validated":
-            validated += 1
-        elif outcome.action == "skipped":
-            skipped += 1
-        else:
-            errors += 1
+def _commit_chunk(institute_id: int, ready: List[_ReadyRow], *, atomic: bool) -> None:
+    if not ready:
+        return
+    if atomic:
+        _insert_chunk(institute_id, ready)
+        return
+    try:
+        with transaction.atomic():
+            _insert_chunk(institute_id, ready)
+    except Exception:  # constraint race, no terms for the SPIN, ...
+        _insert_rows_one_by_one(institute_id, ready)
 
-    if commit and atomic:
-        # If any error and atomic file-level, rollback everything
-        if errors > 0:
-            raise transaction.TransactionManagementError(
-                "Atomic import failed; nothing was created."
-            )
 
-    return {
-        "summary": {
-            "created": created,
-            "validated": validated,
-            "skipped": skipped,
-            "errors": errors,
-            "total_rows": len(outcomes),
-            "commit": bool(commit),
-            "atomic": bool(atomic),
-        },
-        "rows": [o.__dict__ for o in outcomes],
-        "expected_columns": CANONICAL_COLUMNS,
-    }
+def import_student_rows(
+    institute_id: int,
+    rows: Iterable[Iterable[Any]],
+    *,
+    commit: bool = False,
+    atomic: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[List[RowOutcome]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Batched import engine over worksheet-like rows (header row first).
+
+    Rows are validated in chunks; duplicates are resolved against one
+    prefetched candidate set per chunk; each committed chunk reserves its
+    SPINs in one counter update and is inserted with bulk_create.
+
+    - commit=False: dry-run, duplicates are reported as well
+    - commit=True, atomic=False: each chunk in its own transaction; a chunk
+      hitting a constraint falls back to per-row savepoints so good rows survive
+    - commit=True, atomic=True: nothing is written when any row fails
+      (run inside the caller's transaction); raises AtomicImportError
+
+    `on_progress` receives each chunk's final outcomes once they are settled
+    (for atomic commits: after the whole file has been inserted).
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return _report([], commit=commit, atomic=atomic)
+    headers: List[str] = [str(c or "").strip() for c in header]
+    # quick sanity check for required columns present
+    missing = REQUIRED.difference({h.lower() for h in headers})
+    if missing:
+        msg = f"Missing required columns: {', '.join(sorted(missing))}"
+        return error_report(1, {"header": msg})
+
+    dups = _DuplicateIndex(institute_id)
+    validator = StudentWriteSerializer()
+    all_or_nothing = commit and atomic
+    outcomes: List[RowOutcome] = []
+    deferred: List[Tuple[List[RowOutcome], List[_ReadyRow]]] = []
+
+    for chunk in _chunks(rows, chunk_size):
+        chunk_outcomes, ready = _validate_chunk(chunk, headers, dups, validator)
+        outcomes += chunk_outcomes
+        if all_or_nothing:
+            deferred.append((chunk_outcomes, ready))
+            continue
+        if commit:
+            _commit_chunk(institute_id, ready, atomic=False)
+        if on_progress:
+            on_progress(chunk_outcomes)
+
+    if all_or_nothing:
+        if any(o.action == "error" for o in outcomes):
+            # file-level all-or-nothing: fail before writing anything
+            raise AtomicImportError(_report(outcomes, commit=commit, atomic=atomic))
+        for chunk_outcomes, ready in deferred:
+            _commit_chunk(institute_id, ready, atomic=True)
+            if on_progress:
+                on_progress(chunk_outcomes)
+
+    return _report(outcomes, commit=commit, atomic=atomic)
+
+
+def import_students_xlsx(
+    request,
+    file_obj,
+    *,
+    commit: bool = False,
+    atomic: bool = False,
+) -> Dict[str, Any]:
+    """
+    Perform a dry-run (commit=False) or actual import (commit=True) of the
+    uploaded workbook for the caller's institute. See import_student_rows().
+
+    Returns a summary with row-level outcomes.
+    """
+    iid = getattr(request.user, "institute_id", None)
+    if not iid:
+        return error_report(0, {"institute": "User has no institute assigned."})
+
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        return import_student_rows(
+            iid, wb.active.iter_rows(values_only=True), commit=commit, atomic=atomic
+        )
+    finally:
+        wb.close()
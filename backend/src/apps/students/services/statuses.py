@@ -1,9 +1,13 @@
 # apps/students/services/statuses.py
+from typing import Dict, Iterable, List, Optional, Tuple
+
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.students.models import StudentStatus, Status, Student
 from apps.courses.models import CourseClass
+from apps.students.services.current_state import refresh_student_states
 
 
 def _apply_formal_dates(student: Student, cc: CourseClass, new_status: str) -> None:
@@ -90,6 +94,7 @@ def set_student_status(
     _apply_formal_dates(student, cc, new_status)
     student.save(update_fields=["entry_date", "exit_date"])
 
+    refresh_student_states([student_id])
     return row
 
 
@@ -147,4 +152,47 @@ def second_life_activate(
     _apply_formal_dates(student, cc, Status.ACTIVE)
     student.save(update_fields=["entry_date", "exit_date"])
 
+    refresh_student_states([student_id])
     return row
+
+
+def allowed_next_map(
+    institute_id: int,
+    pairs: Iterable[Tuple[int, int]] = (),
+    *,
+    course_class_id: Optional[int] = None,
+) -> Dict[int, Dict[int, List[str]]]:
+    """
+    student -> course class -> allowed next statuses, for the given
+    (student, course_class) pairs and/or every student with a status in
+    `course_class_id`. One DISTINCT ON query over the
+    (student, course_class, effective_at) index; pairs without history
+    get the first-status choices.
+    """
+    pairs = set(pairs)
+    if not pairs and not course_class_id:
+        return {}
+    wanted_rows = Q()
+    if pairs:
+        wanted_rows |= Q(
+            student_id__in={s for s, _ in pairs},
+            course_class_id__in={c for _, c in pairs},
+        )
+    if course_class_id:
+        wanted_rows |= Q(course_class_id=course_class_id)
+    qs = StudentStatus.all_objects.filter(wanted_rows, institute_id=institute_id)
+
+    latest = {
+        (s, c): code
+        for s, c, code in qs.order_by(
+            "student_id", "course_class_id", "-is_active", "-effective_at", "-id"
+        )
+        .distinct("student_id", "course_class_id")
+        .values_list("student_id", "course_class_id", "status")
+    }
+    wanted = pairs | {k for k in latest if k[1] == course_class_id}
+    out: Dict[int, Dict[int, List[str]]] = {}
+    for s, c in sorted(wanted):
+        allowed = StudentStatus.ALLOWED.get(latest.get((s, c)), set())
+        out.setdefault(s, {})[c] = sorted(allowed)
+    return out
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.terms.models import AcademicTerm
+
+from .models import StudentStatus
+
+# fields that decide a status row's enrollment rollup bucket
+ROLLUP_FIELDS = {"status", "effective_at", "course_class", "term", "institute"}
+
+
+@receiver(post_save, sender=AcademicTerm)
+@receiver(post_delete, sender=AcademicTerm)
+def rederive_terms_on_term_change(sender, instance, **kwargs):
+    """
+    Stored term references depend on the institute's term dates;
+    re-resolve them once the AcademicTerm change is committed.
+    """
+    from .services.current_state import rederive_state_terms
+    from .services.enrollment_stats import rebuild_enrollment_rollup
+
+    iid = instance.institute_id
+
+    def rederive():
+        with transaction.atomic():
+            rederive_state_terms(iid)
+            rebuild_enrollment_rollup(iid)
+
+    transaction.on_commit(rederive)
+
+
+@receiver(pre_save, sender=StudentStatus)
+def resolve_status_term(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Store the row's term on every save (bulk paths set term_id themselves)
+    and remember the rollup bucket an update moves the row out of.
+    """
+    if raw:
+        return
+    from .services.current_state import assign_status_term
+    from .services.enrollment_stats import rollup_key
+
+    instance._rollup_old_key = None
+    if instance.pk and (update_fields is None or ROLLUP_FIELDS & set(update_fields)):
+        old = StudentStatus.all_objects.filter(pk=instance.pk).first()
+        instance._rollup_old_key = rollup_key(old) if old else None
+    assign_status_term(instance)
+
+
+@receiver(post_save, sender=StudentStatus)
+def count_saved_status(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    from .services.enrollment_stats import apply_rollup_deltas, rollup_key
+
+    if not created and update_fields is not None and not ROLLUP_FIELDS & set(update_fields):
+        return
+    old_key, new_key = getattr(instance, "_rollup_old_key", None), rollup_key(instance)
+    if old_key != new_key:
+        apply_rollup_deltas({old_key: -1, new_key: 1})
+
+
+@receiver(post_delete, sender=StudentStatus)
+def uncount_deleted_status(sender, instance, **kwargs):
+    from .services.enrollment_stats import apply_rollup_deltas, rollup_key
+
+    apply_rollup_deltas({rollup_key(instance): -1})
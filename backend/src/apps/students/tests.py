@@ -1,11 +1,20 @@
 # src/apps/students/tests.py (sketch)
 import io
+from datetime import date, datetime, timezone as dt_timezone
+from django.db import connection
+from unittest import skipUnless
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from apps.courses.models import Course, CourseClass
 from apps.institutes.models import Institute
-from .models import Student, StudentStatus, Term
+from apps.terms.models import AcademicTerm
+from .models import Status, Student, StudentStatus
+from .services.current_state import refresh_student_states
 
 
 def test_student_create_without_photo_uses_institute_logo(db, settings):
@@ -22,3 +31,1095 @@ def test_dedup_endpoint(db, api_client_with_jwt):
 def test_status_transitions(db, api_client_with_jwt):
     # create student; create ENROLLED; then SUSPENDED ok; then ENROLLED ok; then GRADUATED ok; try ENROLLED -> 400
     ...
+
+
+@override_settings(MEDIA_PUBLIC_BASE="https://media.test")
+class StudentDataTestCase(TestCase):
+    """One institute with two classes and two terms; students built on demand."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.institute = Institute.objects.create(name="Test institute")
+        cls.user = get_user_model().objects.create_user(
+            username="registrar", password="x", institute=cls.institute
+        )
+        course = Course.objects.create(institute=cls.institute, name="Sewing")
+        cls.cc1 = CourseClass.objects.create(course=course, index=1, name="Sewing-1")
+        cls.cc2 = CourseClass.objects.create(course=course, index=2, name="Sewing-2")
+        AcademicTerm.objects.create(
+            institute=cls.institute,
+            name="T2025_1",
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 4, 30),
+        )
+        AcademicTerm.objects.create(
+            institute=cls.institute,
+            name="T2025_2",
+            start_date=date(2025, 5, 15),
+            end_date=date(2025, 8, 31),
+        )
+
+    def _make_students(self, n, offset=0):
+        for i in range(offset, offset + n):
+            st = Student.all_objects.create(
+                institute=self.institute,
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                date_of_birth=date(2005, 1, 1),
+                spin=f"S251{i:03d}",
+                photo=f"students/S251{i:03d}.jpg",
+            )
+            self._make_statuses(st, i % 4)
+            refresh_student_states([st.id])
+
+    def _make_statuses(self, st, variant):
+        at = lambda m, d: datetime(2025, m, d, 9, tzinfo=dt_timezone.utc)  # noqa: E731
+        if variant == 0:
+            return  # no status at all
+        StudentStatus.all_objects.create(
+            institute=self.institute, student=st, course_class=self.cc1,
+            status=Status.ENQUIRE, effective_at=at(1, 10), is_active=variant != 1,
+        )
+        if variant >= 2:
+            StudentStatus.all_objects.filter(student=st).update(is_active=False)
+            StudentStatus.all_objects.create(
+                institute=self.institute, student=st, course_class=self.cc1,
+                status=Status.ACCEPTED, effective_at=at(2, 1), is_active=variant == 2,
+            )
+        if variant == 3:
+            StudentStatus.all_objects.create(
+                institute=self.institute, student=st, course_class=self.cc2,
+                status=Status.ACTIVE, effective_at=at(6, 1), is_active=True,
+            )
+
+    def _client(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+
+class StudentListQueryCountTests(StudentDataTestCase):
+    def _list(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get("/api/students/")
+        self.assertEqual(resp.status_code, 200)
+        return resp.json(), len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        self._make_students(4)
+        _, small = self._list()
+        self._make_students(40, offset=4)
+        data, large = self._list()
+        self.assertEqual(len(data), 44)
+        self.assertEqual(small, large)
+
+    def _legacy_state(self, student):
+        """Reference: the per-student resolution the serializer used to run."""
+        rows = StudentStatus.all_objects.filter(student=student)
+        cur = (
+            rows.filter(is_active=True).order_by("-effective_at", "-id").first()
+            or rows.order_by("-effective_at", "-id").first()
+        )
+        if not cur:
+            return None, None, None, None
+        d = cur.effective_at.date()
+        terms = AcademicTerm.objects.filter(institute_id=student.institute_id)
+        term = None
+        if cur.status == Status.ACTIVE:
+            term = terms.filter(start_date__lte=d, end_date__gte=d).first()
+        elif cur.status in {Status.ENQUIRE, Status.ACCEPTED}:
+            term = terms.filter(start_date__gt=d).order_by("start_date").first()
+        return (
+            cur.status,
+            cur.course_class_id,
+            cur.course_class.name,
+            term.name if term else None,
+        )
+
+    def test_list_matches_per_student_resolution(self):
+        self._make_students(8)
+        data, _ = self._list()
+        self.assertEqual(len(data), 8)
+        for row in data:
+            expected = self._legacy_state(Student.all_objects.get(pk=row["id"]))
+            got = (
+                row["current_status"],
+                row["current_course_class"],
+                row["current_course_class_name"],
+                row["current_term_name"],
+            )
+            self.assertEqual(got, expected)
+        states = {row["current_term_name"] for row in data}
+        self.assertTrue({None, "T2025_2"} <= states)
+
+    def test_new_term_is_picked_up_by_stored_state(self):
+        self._make_students(3)  # variant 2: accepted on 2025-02-01 -> T2025_2
+        AcademicTerm.objects.filter(name="T2025_2").update(start_date=date(2025, 6, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            AcademicTerm.objects.create(
+                institute=self.institute,
+                name="T2025_3",
+                start_date=date(2025, 5, 1),
+                end_date=date(2025, 5, 31),
+            )
+        data, _ = self._list()
+        accepted = [r for r in data if r["current_status"] == Status.ACCEPTED]
+        self.assertEqual([r["current_term_name"] for r in accepted], ["T2025_3"])
+
+
+class KeysetPaginationTests(StudentDataTestCase):
+    def _walk(self, url, key="next"):
+        """Follow `key` links from url; returns (ids in list order, last body)."""
+        client, ids, body = self._client(), [], None
+        while url:
+            resp = client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            body = resp.json()
+            page = [r["id"] for r in body["results"]]
+            ids = ids + page if key == "next" else page + ids
+            url = body[key]
+        return ids, body
+
+    def test_unpaginated_without_params(self):
+        self._make_students(4)
+        resp = self._client().get("/api/student-statuses/")
+        self.assertIsInstance(resp.json(), list)
+
+    def test_pages_cover_the_ordered_list_both_ways(self):
+        self._make_students(12)
+        full = [r["id"] for r in self._client().get("/api/student-statuses/").json()]
+        self.assertGreater(len(full), 10)
+
+        forward, last = self._walk("/api/student-statuses/?page_size=4")
+        self.assertEqual(forward, full)
+        self.assertIsNone(last["next"])
+
+        tail = [r["id"] for r in last["results"]]
+        backward, first = self._walk(last["previous"], key="previous")
+        self.assertEqual(backward + tail, full)
+        self.assertIsNone(first["previous"])
+
+    def test_pk_tiebreak_on_client_ordering(self):
+        self._make_students(12)  # all share one date_of_birth
+        forward, _ = self._walk("/api/students/?ordering=-date_of_birth&page_size=5")
+        self.assertEqual(forward, sorted(forward, reverse=True))
+        self.assertEqual(len(forward), 12)
+
+    def test_invalid_cursor(self):
+        resp = self._client().get("/api/student-statuses/?cursor=bogus")
+        self.assertEqual(resp.status_code, 404)
+
+
+class StudentImportTests(StudentDataTestCase):
+    def _xlsx(self, rows):
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["first_name", "last_name", "date_of_birth", "gender"])
+        for r in rows:
+            ws.append(list(r))
+        buf = io.BytesIO()
+        wb.save(buf)
+        return SimpleUploadedFile("students.xlsx", buf.getvalue())
+
+    def _import(self, rows, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._client().post(
+                f"/api/students/import-xlsx/?{query}",
+                {"file": self._xlsx(rows)},
+                format="multipart",
+            )
+        self.assertEqual(resp.status_code, 200)
+        return resp.json(), len(ctx.captured_queries)
+
+    def test_outcomes_and_spin_block(self):
+        self._make_students(3)  # First2/Last2 holds an active accepted status
+        rows = [
+            ("Ann", "Able", "2006-01-02", "female"),
+            ("Last2", "First2", "2005-01-01", "male"),  # swapped-name duplicate
+            ("Bob", "", "2006-01-02", "male"),  # missing last_name
+            ("Ann", "Able", "2006-01-02", "female"),  # same key earlier in file
+            ("First0", "Last0", "2005-01-01", "male"),  # existing, no status
+            ("Cid", "Cole", "2006-03-04", "male"),
+        ]
+        report, _ = self._import(rows, commit=1)
+        actions = [r["action"] for r in report["rows"]]
+        self.assertEqual(
+            actions, ["created", "error", "error", "error", "error", "created"]
+        )
+        self.assertEqual([r["row_number"] for r in report["rows"]], list(range(2, 8)))
+        self.assertEqual(report["summary"]["created"], 2)
+        self.assertEqual(report["summary"]["errors"], 4)
+        self.assertIn("last_name", report["rows"][2]["errors"])
+
+        created = Student.all_objects.filter(
+            pk__in=[r["instance_id"] for r in report["rows"] if r["instance_id"]]
+        ).order_by("id")
+        spins = [s.spin for s in created]
+        self.assertEqual(len(set(spins)), 2)
+        self.assertEqual(int(spins[1][-3:]), int(spins[0][-3:]) + 1)
+
+    def test_duplicate_folding_matches_the_database_check(self):
+        from .services.dedup import has_potential_duplicate
+
+        self._make_students(3)  # First2/Last2 holds an active accepted status
+        Student.all_objects.filter(last_name="Last2").update(last_name="Strasse")
+        # "ß" upper-cases to "SS" but lower-cases to itself
+        for last_name in ("STRASSE", "Straße"):
+            blocked = has_potential_duplicate(
+                self.institute.id, "First2", last_name, date(2005, 1, 1)
+            )
+            report, _ = self._import([("First2", last_name, "2005-01-01", "male")])
+            self.assertEqual(report["rows"][0]["action"] == "error", blocked)
+
+    def test_dry_run_writes_nothing(self):
+        report, _ = self._import([("Ann", "Able", "2006-01-02", "female")])
+        self.assertEqual(report["rows"][0]["action"], "validated")
+        self.assertFalse(Student.all_objects.filter(first_name="Ann").exists())
+
+    def test_atomic_rolls_back_on_any_error(self):
+        rows = [("Ann", "Able", "2006-01-02", "female"), ("Bob", "", "2006-01-02", "")]
+        with self.assertRaises(Exception):
+            self._import(rows, commit=1, atomic=1)
+        self.assertFalse(Student.all_objects.filter(first_name="Ann").exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def rows(n, tag):
+            return [(f"{tag}{i}", "Bulk", "2006-01-02", "male") for i in range(n)]
+
+        _, small = self._import(rows(5, "A"), commit=1)
+        report, large = self._import(rows(120, "B"), commit=1)
+        self.assertEqual(report["summary"]["created"], 120)
+        self.assertEqual(small, large)
+
+    def test_async_job_reports_progress_and_paginated_rows(self):
+        from django.core.management import call_command
+
+        rows = [(f"Job{i}", "Queue", "2006-01-02", "male") for i in range(7)]
+        rows.append(("Job0", "Queue", "2006-01-02", "male"))  # in-file duplicate
+        resp = self._client().post(
+            "/api/students/import-xlsx/?commit=1&async=1",
+            {"file": self._xlsx(rows)},
+            format="multipart",
+        )
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["job_id"]
+        self.assertFalse(Student.all_objects.filter(last_name="Queue").exists())
+
+        call_command("process_import_jobs", once=True, stdout=io.StringIO())
+
+        job = self._client().get(f"/api/student-import-jobs/{job_id}/").json()
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(
+            (job["processed_rows"], job["created_rows"], job["error_rows"]), (8, 7, 1)
+        )
+
+        page = self._client().get(
+            f"/api/student-import-jobs/{job_id}/rows/?page_size=5"
+        ).json()
+        self.assertEqual([r["row_number"] for r in page["results"]], [2, 3, 4, 5, 6])
+        self.assertIsNotNone(page["next"])
+        errors = self._client().get(
+            f"/api/student-import-jobs/{job_id}/rows/?action=error"
+        ).json()["results"]
+        self.assertEqual([r["row_number"] for r in errors], [9])
+
+    def test_atomic_job_counts_progress_outside_its_transaction(self):
+        from django.core.management import call_command
+        from apps.students.models import StudentImportJob
+
+        rows = [(f"Atom{i}", "Queue", "2006-01-02", "male") for i in range(7)]
+        resp = self._client().post(
+            "/api/students/import-xlsx/?commit=1&atomic=1&async=1",
+            {"file": self._xlsx(rows)},
+            format="multipart",
+        )
+        job_id = resp.json()["job_id"]
+        table = StudentImportJob._meta.db_table
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("process_import_jobs", once=True, stdout=io.StringIO())
+        # the progress counters went over the side connection, not the import's
+        bumps = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith(f'UPDATE "{table}"')
+            and '"processed_rows" + ' in q["sql"]
+        ]
+        self.assertEqual(bumps, [])
+
+        job = self._client().get(f"/api/student-import-jobs/{job_id}/").json()
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(
+            (job["processed_rows"], job["created_rows"], job["error_rows"]), (7, 7, 0)
+        )
+        rows = self._client().get(f"/api/student-import-jobs/{job_id}/rows/").json()
+        self.assertEqual(len(rows["results"]), 7)
+
+
+class PinAllocationTests(StudentDataTestCase):
+    def test_blocks_and_single_pins_share_one_sequence(self):
+        from apps.common.generate_pin import (
+            generate_employee_pin,
+            generate_student_pin,
+            reserve_employee_pins,
+            reserve_student_pins,
+        )
+        from apps.common.models import PinCounter
+
+        d = date(2025, 3, 1)  # closest term: T2025_1
+        first = generate_student_pin(institute_id=self.institute.id, enquiry_date=d)
+        block = reserve_student_pins(
+            institute_id=self.institute.id, count=3, enquiry_date=d
+        )
+        last = generate_student_pin(institute_id=self.institute.id, enquiry_date=d)
+        seqs = [first.seq] + [p.seq for p in block] + [last.seq]
+        self.assertEqual(seqs, [1, 2, 3, 4, 5])
+        self.assertEqual(block[0].pin, "S251002")
+
+        # employee counters have no term: still a single counter row
+        e = [generate_employee_pin(institute_id=self.institute.id, entry_date=d)]
+        e += reserve_employee_pins(
+            institute_id=self.institute.id, count=2, entry_date=d
+        )
+        self.assertEqual([p.pin for p in e], ["E25001", "E25002", "E25003"])
+        self.assertEqual(
+            PinCounter.objects.filter(institute=self.institute, kind="E").count(), 1
+        )
+
+
+class TermCalendarTests(StudentDataTestCase):
+    def test_lookups_hit_the_db_once_per_request(self):
+        from apps.common.middleware import reset_request_versions
+        from apps.terms.calendar import _calendars
+        from apps.terms.services import get_nearest_term, pick_term_by_closeness
+
+        _calendars.clear()
+        reset_request_versions()
+        try:
+            with self.assertNumQueries(2):  # version stamp + calendar load
+                sel = pick_term_by_closeness(self.institute.id, date(2025, 5, 10))
+            with self.assertNumQueries(0):
+                near = get_nearest_term(self.institute.id, date(2025, 5, 1))
+                again = pick_term_by_closeness(self.institute.id, date(2025, 1, 2))
+        finally:
+            reset_request_versions(active=False)
+        self.assertEqual(sel.chosen.name, "T2025_2")
+        self.assertEqual(near.name, "T2025_2")  # between terms -> upcoming
+        self.assertEqual((again.chosen.name, again.term_no), ("T2025_1", 1))
+
+    def test_term_changes_invalidate_the_calendar(self):
+        from apps.terms.services import get_nearest_term
+
+        dec = date(2025, 12, 1)
+        self.assertEqual(get_nearest_term(self.institute.id, dec).name, "T2025_2")
+        AcademicTerm.objects.create(
+            institute=self.institute,
+            name="T2025_3",
+            start_date=date(2025, 9, 15),
+            end_date=date(2025, 12, 15),
+        )
+        self.assertEqual(get_nearest_term(self.institute.id, dec).name, "T2025_3")
+
+    def test_status_list_term_costs_no_query_per_row(self):
+        def list_statuses():
+            with CaptureQueriesContext(connection) as ctx:
+                data = self._client().get("/api/student-statuses/").json()
+            return data, len(ctx.captured_queries)
+
+        self._make_students(4)
+        _, small = list_statuses()
+        self._make_students(20, offset=4)
+        data, large = list_statuses()
+        self.assertEqual(small, large)
+        self.assertIn("T2025_2", {row["term"] for row in data})
+
+    def test_creator_fields_cost_no_query_per_row(self):
+        from apps.employees.models import Employee, EmployeeCareer, EmployeeFunction
+
+        fn_old = EmployeeFunction.all_objects.create(name="Clerk", code="clerk")
+        fn_new = EmployeeFunction.all_objects.create(name="Registrar", code="reg")
+        creators = []
+        for i in range(3):
+            emp = Employee.all_objects.create(
+                institute=self.institute, first_name=f"Emp{i}", last_name="X",
+                epin=f"E25{i:04d}",
+            )
+            EmployeeCareer.all_objects.create(
+                institute=self.institute, employee=emp, function=fn_old,
+                start_date=date(2020, 1, 1),
+            )
+            if i:
+                EmployeeCareer.all_objects.create(
+                    institute=self.institute, employee=emp, function=fn_new,
+                    start_date=date(2024, 1, 1),
+                )
+            creators.append(emp)
+
+        def list_statuses():
+            with CaptureQueriesContext(connection) as ctx:
+                data = self._client().get("/api/student-statuses/").json()
+            return data, len(ctx.captured_queries)
+
+        def stamp_creators():
+            for i, ss in enumerate(StudentStatus.all_objects.order_by("id")):
+                ss.created_by = creators[i % 3]
+                ss.save(update_fields=["created_by"])
+
+        self._make_students(4)
+        stamp_creators()
+        _, small = list_statuses()
+        self._make_students(20, offset=4)
+        stamp_creators()
+        data, large = list_statuses()
+        self.assertEqual(small, large)
+        by_creator = {(r["created_by_name"], r["created_by_function"]) for r in data}
+        self.assertEqual(
+            by_creator,
+            {("Emp0 X", "Clerk"), ("Emp1 X", "Registrar"), ("Emp2 X", "Registrar")},
+        )
+
+
+class StatusTermTests(StudentDataTestCase):
+    def _terms(self):
+        return dict(
+            StudentStatus.all_objects.values_list("status", "term__name")
+            .order_by("status")
+            .distinct()
+        )
+
+    def test_term_is_stored_on_write_and_filterable(self):
+        self._make_students(4)
+        # ENQUIRE/ACCEPTED in Jan/Feb -> next term; ACTIVE on 1 Jun -> containing
+        self.assertEqual(
+            self._terms(),
+            {"enquire": "T2025_2", "accepted": "T2025_2", "active": "T2025_2"},
+        )
+        t2 = AcademicTerm.objects.get(name="T2025_2")
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self._client().get(f"/api/student-statuses/?term={t2.id}").json()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({r["term"] for r in rows}, {"T2025_2"})
+        self.assertTrue(
+            any('"term_id" = ' in q["sql"] for q in ctx.captured_queries)
+        )
+
+    def test_term_date_change_rederives_stored_terms(self):
+        self._make_students(4)
+        with self.captureOnCommitCallbacks(execute=True):
+            AcademicTerm.objects.create(
+                institute=self.institute,
+                name="T2025_0",
+                start_date=date(2025, 1, 15),
+                end_date=date(2025, 1, 31),
+            )
+        self.assertEqual(
+            self._terms(),
+            {"enquire": "T2025_0", "accepted": "T2025_2", "active": "T2025_2"},
+        )
+        st = Student.all_objects.get(spin="S251002")  # latest status: ACCEPTED (1 Feb)
+        self.assertEqual(st.current_state.term.name, "T2025_2")
+
+    def test_backfill_command_fills_missing_terms(self):
+        from django.core.management import call_command
+
+        self._make_students(4)
+        StudentStatus.all_objects.update(term=None)
+        call_command("backfill_status_terms", batch_size=2, stdout=io.StringIO())
+        self.assertEqual(
+            self._terms(),
+            {"enquire": "T2025_2", "accepted": "T2025_2", "active": "T2025_2"},
+        )
+
+
+class EnrollmentStatsTests(StudentDataTestCase):
+    def _rollup(self):
+        from .models import EnrollmentRollup
+
+        return set(
+            EnrollmentRollup.all_objects.filter(count__gt=0).values_list(
+                "term__name", "course_class__name", "status", "count"
+            )
+        )
+
+    def _assert_matches_rebuild(self):
+        from .services.enrollment_stats import rebuild_enrollment_rollup
+
+        incremental = self._rollup()
+        rebuild_enrollment_rollup(self.institute.id)
+        self.assertEqual(incremental, self._rollup())
+        return incremental
+
+    def test_incremental_rollup_matches_rebuild(self):
+        from apps.common.middleware import set_current_institute_id
+        from .services.statuses import set_student_status
+
+        self._make_students(8)
+        self.assertEqual(
+            self._assert_matches_rebuild(),
+            {
+                ("T2025_2", "Sewing-1", "enquire", 6),
+                ("T2025_2", "Sewing-1", "accepted", 4),
+                ("T2025_2", "Sewing-2", "active", 2),
+            },
+        )
+        # terminal status -> counted in the term it happens in
+        st = Student.all_objects.get(spin="S251003")
+        set_current_institute_id(self.institute.id)
+        try:
+            set_student_status(
+                institute_id=self.institute.id,
+                student_id=st.id,
+                course_class_id=self.cc2.id,
+                new_status=Status.DROP_OUT,
+                effective_at=datetime(2025, 7, 1, 9, tzinfo=dt_timezone.utc),
+            )
+        finally:
+            set_current_institute_id(None)
+        StudentStatus.all_objects.filter(
+            student__spin="S251001", status=Status.ENQUIRE
+        ).get().delete()
+        row = StudentStatus.all_objects.get(student__spin="S251002", status=Status.ACCEPTED)
+        row.effective_at = datetime(2024, 12, 1, 9, tzinfo=dt_timezone.utc)
+        # accepted before T2025_1 -> moves to that term's bucket; a partial
+        # save writes the re-resolved term as well
+        row.save(update_fields=["effective_at"])
+        self.assertEqual(
+            StudentStatus.all_objects.get(pk=row.pk).term.name, "T2025_1"
+        )
+        self.assertEqual(
+            self._assert_matches_rebuild(),
+            {
+                ("T2025_2", "Sewing-1", "enquire", 5),
+                ("T2025_2", "Sewing-1", "accepted", 3),
+                ("T2025_1", "Sewing-1", "accepted", 1),
+                ("T2025_2", "Sewing-2", "active", 2),
+                ("T2025_2", "Sewing-2", "drop_out", 1),
+            },
+        )
+
+    def test_stats_endpoint_reads_the_rollup_once(self):
+        self._make_students(8)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._client().get(f"/api/enrollment-stats/?course_class={self.cc2.id}")
+        self.assertEqual(resp.status_code, 200)
+        rollup_reads = [
+            q for q in ctx.captured_queries if "students_enrollmentrollup" in q["sql"]
+        ]
+        self.assertEqual(len(rollup_reads), 1)
+        (entry,) = resp.json()
+        self.assertEqual(
+            (entry["term_name"], entry["course_class_name"], entry["total"]),
+            ("T2025_2", "Sewing-2", 2),
+        )
+        self.assertEqual(entry["counts"]["active"], 2)
+        self.assertEqual(entry["counts"]["graduate"], 0)
+
+
+class BulkStatusTests(StudentDataTestCase):
+    def _graduate(self, ids, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._client().post(
+                "/api/student-statuses/bulk/",
+                {"students": ids, "course_class": self.cc2.id, "status": "graduate", **extra},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json(), len(ctx.captured_queries)
+
+    def _active_ids(self):
+        return list(
+            StudentStatus.all_objects.filter(status=Status.ACTIVE, is_active=True)
+            .order_by("student_id")
+            .values_list("student_id", flat=True)
+        )
+
+    def test_bulk_transition_costs_constant_statements(self):
+        CourseClass.objects.filter(pk=self.cc2.pk).update(end_date=date(2025, 8, 31))
+        self._make_students(8)
+        _, small = self._graduate(self._active_ids())
+        self._make_students(40, offset=8)
+        ids = self._active_ids()
+        accepted_only = Student.all_objects.get(spin="S251002").id
+        data, large = self._graduate(ids + [accepted_only, 999999])
+        self.assertEqual(small, large)
+        self.assertEqual(data["summary"]["created"], len(ids))
+        self.assertEqual(data["summary"]["errors"], 2)
+        errors = {r["student"]: r["errors"] for r in data["rows"] if r["errors"]}
+        self.assertIn("status", errors[accepted_only])
+        self.assertIn("student", errors[999999])
+
+        self.assertEqual(
+            StudentStatus.all_objects.filter(
+                student_id__in=ids, is_active=True, course_class=self.cc2
+            ).values_list("status", flat=True).distinct().get(),
+            Status.GRADUATE,
+        )
+        st = Student.all_objects.select_related("current_state").get(id=ids[0])
+        self.assertEqual(st.current_state.status, Status.GRADUATE)
+        self.assertEqual(st.exit_date, date(2025, 8, 31))
+
+    def test_atomic_and_dry_run_write_nothing(self):
+        self._make_students(8)
+        ids = self._active_ids()
+        before = StudentStatus.all_objects.count()
+        data, _ = self._graduate(ids, commit=False)
+        self.assertEqual(data["summary"]["validated"], len(ids))
+        data, _ = self._graduate(ids + [999999], atomic=True)
+        self.assertEqual(data["summary"]["created"], 0)
+        self.assertEqual(StudentStatus.all_objects.count(), before)
+
+
+class CourseCatalogTests(StudentDataTestCase):
+    def test_catalog_etag_304_and_invalidation(self):
+        from apps.courses.catalog import _catalogs
+        from apps.courses.models import CourseInstructor
+        from apps.employees.models import Employee
+
+        _catalogs.clear()
+        self._make_students(1)
+        st = Student.all_objects.get()
+        client = self._client()
+        url = f"/api/students/{st.id}/offered-classes/"
+
+        resp = client.get(url)
+        self.assertEqual((resp.status_code, resp.json()), (200, []))
+        etag = resp["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)  # the version stamp
+
+        emp = Employee.all_objects.create(
+            institute=self.institute, first_name="Ina", last_name="Structor", epin="E1"
+        )
+        CourseInstructor.all_objects.create(
+            institute=self.institute, course_class=self.cc2, instructor=emp
+        )
+        resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(
+            resp.json(),
+            [
+                {
+                    "id": self.cc2.id,
+                    "course_name": "Sewing",
+                    "abbr_name": "",
+                    "class_number": 2,
+                    "classes_total": 1,
+                }
+            ],
+        )
+
+    def test_course_and_class_lists_follow_writes(self):
+        client = self._client()
+        classes = client.get(f"/api/course-classes/?course={self.cc1.course_id}").json()
+        self.assertEqual([c["name"] for c in classes], ["Sewing-1", "Sewing-2"])
+
+        CourseClass.objects.filter(pk=self.cc1.pk).get().delete()
+        self.cc2.name = "Sewing-B"
+        self.cc2.save()
+        classes = client.get("/api/course-classes/").json()
+        self.assertEqual([c["name"] for c in classes], ["Sewing-B"])
+        courses = client.get("/api/courses/?q=sew").json()
+        self.assertEqual([c["name"] for c in courses], ["Sewing"])
+        self.assertEqual(client.get("/api/courses/?q=xyz").json(), [])
+
+
+class AllowedNextBatchTests(StudentDataTestCase):
+    def test_allowed_next_batch_matches_single_calls(self):
+        self._make_students(8)
+        client = self._client()
+        ids = list(Student.all_objects.order_by("id").values_list("id", flat=True))
+        pairs = [
+            {"student": s, "course_class": c.id} for s in ids for c in (self.cc1, self.cc2)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            batch = client.post(
+                "/api/students/statuses/allowed-next/", {"pairs": pairs}, format="json"
+            ).json()
+        status_reads = [
+            q for q in ctx.captured_queries if "students_studentstatus" in q["sql"]
+        ]
+        self.assertEqual(len(status_reads), 1)
+        for p in pairs:
+            single = client.get(
+                f"/api/students/{p['student']}/statuses/allowed-next/"
+                f"?course_class={p['course_class']}"
+            ).json()
+            self.assertEqual(batch[str(p["student"])][str(p["course_class"])], single)
+
+        whole = client.post(
+            "/api/students/statuses/allowed-next/",
+            {"course_class": self.cc2.id},
+            format="json",
+        ).json()
+        active = Student.all_objects.filter(spin__in=["S251003", "S251007"])
+        after_active = ["drop_out", "expelled", "failed", "graduate", "retake"]
+        self.assertEqual(
+            whole, {str(st.id): {str(self.cc2.id): after_active} for st in active}
+        )
+
+    def test_allowed_next_batch_rejects_mixed_and_unknown_input(self):
+        self._make_students(2)
+        client = self._client()
+        sid = Student.all_objects.order_by("id").values_list("id", flat=True)[0]
+        pair = {"student": sid, "course_class": self.cc1.id}
+        url = "/api/students/statuses/allowed-next/"
+
+        mixed = client.post(
+            url, {"pairs": [pair], "course_class": self.cc2.id}, format="json"
+        )
+        self.assertEqual(mixed.status_code, 400, mixed.content)
+
+        unknown = client.post(
+            url,
+            {"pairs": [pair, {"student": 999999, "course_class": self.cc1.id}]},
+            format="json",
+        )
+        self.assertEqual(unknown.status_code, 400, unknown.content)
+        self.assertIn("students", unknown.json())
+
+
+class MoveStudentsTests(StudentDataTestCase):
+    def setUp(self):
+        from django.contrib.auth.models import Group
+
+        self._make_students(8)  # i = 3, 7 are ACTIVE in Sewing-2
+        self.user.groups.add(Group.objects.get_or_create(name="institute_admin")[0])
+        self.term = AcademicTerm.objects.get(institute=self.institute, name="T2025_1")
+
+    def test_dry_run_previews_without_writing(self):
+        before = StudentStatus.all_objects.count()
+        res = self._client().post(
+            f"/api/academic-terms/{self.term.id}/move-students/?dry_run=1"
+        )
+        self.assertEqual(res.status_code, 200, res.content)
+        body = res.json()
+        self.assertEqual(body["students_to_move"], 2)
+        self.assertEqual(body["next_term"], "T2025_2")
+        self.assertEqual(
+            body["classes"],
+            [{"course_class": self.cc2.id, "class_name": "Sewing-2",
+              "course_name": "Sewing", "students": 2}],
+        )
+        self.assertFalse(body["window_open"])  # term ended long ago
+        self.assertEqual(StudentStatus.all_objects.count(), before)
+
+    def test_executed_transition_is_reported_before_a_missing_next_term(self):
+        from datetime import timedelta
+        from apps.terms.models import TermTransition
+
+        today = timezone.localdate()
+        term = AcademicTerm.objects.create(
+            institute=self.institute,
+            name="Just ended",
+            start_date=today - timedelta(days=60),
+            end_date=today - timedelta(days=1),
+        )  # no term after it
+        TermTransition.objects.create(
+            term=term,
+            institute=self.institute,
+            transition_executed_at=timezone.now(),
+            executed_by="someone",
+        )
+        res = self._client().post(f"/api/academic-terms/{term.id}/move-students/")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("already moved", res.json()["error"])
+
+    def test_set_based_move_uses_constant_statements(self):
+        from apps.terms.calendar import get_term_calendar
+        from apps.terms.transitions import execute_move
+
+        next_term = get_term_calendar(self.institute.id).next_after(self.term.end_date)
+        self._make_students(20, offset=8)
+        with CaptureQueriesContext(connection) as ctx:
+            moved = execute_move(self.institute.id, next_term)
+        self.assertEqual(len(moved), 7)
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+        active = StudentStatus.all_objects.filter(
+            student_id__in=[m.student_id for m in moved], is_active=True
+        )
+        self.assertEqual(active.count(), 7)
+        for s in active:
+            self.assertEqual((s.status, s.course_class_id), (Status.ACTIVE, self.cc2.id))
+            self.assertEqual(timezone.localdate(s.effective_at), next_term.start_date)
+        self.assertEqual(
+            Student.all_objects.filter(
+                current_state__term_id=next_term.id, id__in=[m.student_id for m in moved]
+            ).count(),
+            7,
+        )
+
+
+class ExportTests(StudentDataTestCase):
+    def _export(self, url):
+        resp = self._client().get(url)
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+    def test_students_csv_streams_with_current_state(self):
+        import csv
+
+        self._make_students(8)
+        resp = self._export("/api/students/export/?export_format=csv")
+        self.assertTrue(resp.streaming)
+        body = b"".join(resp.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 8)
+        active = [r for r in rows if r["current_status"] == Status.ACTIVE]
+        self.assertEqual({r["current_course_class"] for r in active}, {"Sewing-2"})
+
+    def test_status_xlsx_applies_list_filters(self):
+        from openpyxl import load_workbook
+
+        self._make_students(8)
+        resp = self._export(
+            f"/api/student-statuses/export/?export_format=xlsx&status={Status.ACTIVE}"
+        )
+        ws = load_workbook(io.BytesIO(b"".join(resp.streaming_content))).active
+        header, *rows = list(ws.values)
+        self.assertEqual(header[-1], "term")
+        self.assertEqual(len(rows), 2)  # i = 3, 7
+        self.assertEqual({r[-1] for r in rows}, {"T2025_2"})
+
+    def test_unknown_format_is_rejected(self):
+        resp = self._client().get("/api/students/export/?export_format=pdf")
+        self.assertEqual(resp.status_code, 400)
+
+
+class FuzzySearchTests(StudentDataTestCase):
+    def setUp(self):
+        at = datetime(2025, 2, 1, 9, tzinfo=dt_timezone.utc)
+        for i, (first, last, dob) in enumerate(
+            [
+                ("Sarah", "Nakato", date(2006, 3, 1)),
+                ("Sara", "Nakatto", date(2006, 3, 1)),
+                ("Nakato", "Sarah", date(2007, 1, 1)),
+                ("John", "Okello", date(2006, 3, 1)),
+            ]
+        ):
+            st = Student.all_objects.create(
+                institute=self.institute, first_name=first, last_name=last,
+                date_of_birth=dob, spin=f"S25F{i:03d}",
+            )
+            StudentStatus.all_objects.create(
+                institute=self.institute, student=st, course_class=self.cc1,
+                status=Status.ENQUIRE, effective_at=at, is_active=True,
+            )
+
+    def test_search_ranks_near_matches(self):
+        resp = self._client().get("/api/students/search/?q=nakato")
+        self.assertEqual(resp.status_code, 200)
+        names = [(r["first_name"], r["last_name"]) for r in resp.json()]
+        self.assertEqual(len(names), 3)
+        self.assertNotIn(("John", "Okello"), names)
+        self.assertEqual(resp.json()[-1]["last_name"], "Nakatto")
+        self.assertEqual(self._client().get("/api/students/search/?q=a").status_code, 400)
+
+    def test_dedup_keeps_exact_rule_and_ranks_candidates(self):
+        resp = self._client().get(
+            "/api/students/dedup/",
+            {"first_name": "nakato", "last_name": "SARAH", "date_of_birth": "2006-03-01"},
+        )
+        body = resp.json()
+        self.assertTrue(body["duplicate"])  # swapped, case-insensitive exact match
+        ranked = [(c["first_name"], c["same_date_of_birth"]) for c in body["candidates"]]
+        self.assertEqual(ranked, [("Sarah", True), ("Sara", True), ("Nakato", False)])
+        self.assertEqual(body["candidates"][0]["similarity"], 1.0)
+
+        body = self._client().get(
+            "/api/students/dedup/",
+            {"first_name": "Sarra", "last_name": "Nakato", "date_of_birth": "2006-03-01"},
+        ).json()
+        self.assertFalse(body["duplicate"])  # near match only: advisory
+        self.assertEqual(body["candidates"][0]["first_name"], "Sarah")
+
+
+@override_settings(
+    STORAGES={"default": {"BACKEND": "django.core.files.storage.InMemoryStorage"}},
+    IMAGE_VARIANTS_ASYNC=False,
+)
+class PhotoVariantTests(StudentDataTestCase):
+    def _jpeg(self):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotate 90 CW
+        exif[0x010F] = "PhoneCo"
+        buf = io.BytesIO()
+        Image.new("RGB", (3000, 2000), (200, 30, 30)).save(buf, "JPEG", exif=exif)
+        return SimpleUploadedFile("me.jpg", buf.getvalue(), content_type="image/jpeg")
+
+    def test_upload_builds_stripped_variants_after_commit(self):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        self._make_students(1)
+        st = Student.all_objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self._client().post(
+                f"/api/students/{st.id}/photo/",
+                {"photo": self._jpeg()},
+                format="multipart",
+            )
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        st.refresh_from_db()
+        self.assertEqual(set(st.photo_variants), {"thumb", "medium", "original"})
+        self.assertEqual(
+            st.photo_variants["thumb"], "students/variants/S251000/thumb.webp"
+        )
+        sizes = {}
+        for name, key in st.photo_variants.items():
+            with default_storage.open(key) as fh, Image.open(fh) as img:
+                sizes[name] = img.size
+                self.assertEqual(len(img.getexif()), 0)
+        # orientation applied (portrait), longest edge capped per variant
+        self.assertEqual(
+            sizes, {"thumb": (107, 160), "medium": (427, 640), "original": (1365, 2048)}
+        )
+
+        row = self._client().get("/api/students/?photo_size=thumb").json()[0]
+        self.assertTrue(
+            row["photo_url"].startswith(
+                "https://media.test/students/variants/S251000/thumb.webp"
+            )
+        )
+        row = self._client().get("/api/students/").json()[0]
+        self.assertIn("/variants/S251000/original.jpg", row["photo_url"])
+
+
+class MediaUrlResolverTests(StudentDataTestCase):
+    def setUp(self):
+        self.institute.logo_key = "institutes/1/logo.png"
+        self.institute.save(update_fields=["logo_key"])
+        self._make_students(12)
+        Student.all_objects.update(photo="")
+
+    def _list(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._client().get("/api/students/").json()
+        logo_queries = [
+            q for q in ctx.captured_queries
+            if 'FROM "institutes_institute"' in q["sql"]
+            and '"logo_key"' in q["sql"]
+        ]
+        return data, len(logo_queries)
+
+    def test_logo_fallback_is_fetched_at_most_once_per_request(self):
+        from apps.common.media import _logos
+
+        _logos.clear()
+        data, cold = self._list()
+        self.assertEqual(len(data), 12)
+        self.assertEqual(cold, 1)
+        self.assertEqual(
+            {row["photo_url"].split("?")[0] for row in data},
+            {"https://media.test/institutes/1/logo.png"},
+        )
+        _, warm = self._list()  # process cache, stamp unchanged
+        self.assertEqual(warm, 0)
+
+    def test_logo_change_invalidates_the_fallback(self):
+        self._list()
+        self.institute.logo_key = "institutes/1/logo.webp"
+        self.institute.save(update_fields=["logo_key"])
+        data, fetched = self._list()
+        self.assertEqual(fetched, 1)
+        self.assertIn("/institutes/1/logo.webp", data[0]["photo_url"])
+
+        # built variants are picked up as well
+        from apps.common.images import record_variants
+
+        record_variants(
+            Institute, self.institute.pk, "logo_key", "logo_variants",
+            "institutes/1/logo.webp", {"thumb": "institutes/variants/1/thumb.webp"},
+        )
+        row = self._client().get("/api/students/?photo_size=thumb").json()[0]
+        self.assertIn("/institutes/variants/1/thumb.webp", row["photo_url"])
+
+
+try:
+    from moto import mock_aws
+except ImportError:  # optional test dependency
+    mock_aws = None
+
+
+@skipUnless(mock_aws, "moto is not installed")
+@override_settings(
+    STORAGES={"default": {"BACKEND": "storages.backends.s3boto3.S3Boto3Storage"}},
+    AWS_S3_ENDPOINT_URL=None,
+    AWS_STORAGE_BUCKET_NAME="vims-test",
+    AWS_ACCESS_KEY_ID="test",
+    AWS_SECRET_ACCESS_KEY="test",
+    IMAGE_VARIANTS_ASYNC=False,
+)
+class DirectUploadTests(StudentDataTestCase):
+    def setUp(self):
+        import boto3
+
+        self.aws = mock_aws()
+        self.aws.start()
+        self.addCleanup(self.aws.stop)
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket="vims-test")
+        self._make_students(1)
+        self.student = Student.all_objects.get()
+
+    def _png(self, size=(400, 300)):
+        from PIL import Image
+
+        buf = io.BytesIO()
+        Image.new("RGB", size, (10, 120, 200)).save(buf, "PNG")
+        return buf.getvalue()
+
+    def _stage(self, body, content_type="image/png"):
+        """Presign, then put the bytes where the browser's POST would land."""
+        resp = self._client().post(
+            f"/api/students/{self.student.id}/upload-url/",
+            {"content_type": content_type},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        presigned = resp.json()
+        self.assertEqual(presigned["fields"]["Content-Type"], content_type)
+        self.s3.put_object(
+            Bucket="vims-test", Key=presigned["key"], Body=body, ContentType=content_type
+        )
+        return presigned["key"]
+
+    def _confirm(self, key):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self._client().post(
+                f"/api/students/{self.student.id}/upload-confirm/",
+                {"key": key},
+                format="json",
+            )
+
+    def test_presign_confirm_attaches_and_builds_variants(self):
+        key = self._stage(self._png())
+        self.assertEqual(key, "incoming/students/S251000.png")
+        resp = self._confirm(key)
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.photo.name, "students/S251000.png")
+        self.assertIn("thumb", self.student.photo_variants)
+        listed = self.s3.list_objects_v2(Bucket="vims-test")["Contents"]
+        self.assertNotIn(key, {o["Key"] for o in listed})  # staging removed
+
+    def test_confirm_rejects_mismatched_or_foreign_objects(self):
+        key = self._stage(b"not an image")
+        self.assertEqual(self._confirm(key).status_code, 400)
+        key = self._stage(self._png(), content_type="image/jpeg")  # PNG bytes
+        self.assertEqual(self._confirm(key).status_code, 400)
+        key = self._stage(self._png(size=(10, 10)))
+        self.assertEqual(self._confirm(key).status_code, 400)
+        self.assertEqual(self._confirm("incoming/students/OTHER.png").status_code, 400)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.photo.name, "students/S251000.jpg")
@@ -1,36 +1,87 @@
 from pathlib import Path
-from rest_framework import status as drf_status
+from rest_framework import mixins, viewsets, status as drf_status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from django.db import transaction
 from django.db.models import QuerySet
 from django.http import HttpResponse
 from openpyxl import Workbook
 
-from .models import Student, StudentCustodian, StudentStatus
+from .models import Student, StudentCustodian, StudentImportJob, StudentStatus
 from .serializers import (
+    AllowedNextBatchSerializer,
     PhotoUploadResponseSerializer,
+    StudentImportJobSerializer,
+    StudentImportRowSerializer,
     StudentPhotoUploadSerializer,
     StudentReadSerializer,
     StudentCustodianSerializer,
+    StudentStatusBulkSerializer,
     StudentStatusReadSerializer,
     StudentStatusWriteSerializer,
     StudentWriteSerializer,
 )
+from .selectors import with_current_state
+from .services.bulk_status import bulk_set_status
+from .services.current_state import refresh_student_states
+from .services.enrollment_stats import enrollment_stats
+from .services.import_jobs import enqueue_import_job
+from .services.statuses import allowed_next_map
 from .services.import_xlsx import import_students_xlsx, CANONICAL_COLUMNS
+from apps.common.direct_upload import DirectUploadMixin
+from apps.common.export import ExportMixin
+from apps.common.images import schedule_variants
 from apps.common.media import public_media_url
+from apps.common.search import FuzzySearchMixin
+from apps.common.pagination import KeysetPagination
+from apps.common.permissions import HasInstitute
 from apps.common.views import ScopedModelViewSet
 
 
-class StudentViewSet(ScopedModelViewSet):
+class StudentViewSet(
+    DirectUploadMixin, ExportMixin, FuzzySearchMixin, ScopedModelViewSet
+):
     model = Student
+    export_filename = "students"
+    export_columns = (
+        ("spin", "spin"),
+        ("first_name", "first_name"),
+        ("last_name", "last_name"),
+        ("date_of_birth", "date_of_birth"),
+        ("gender", "gender"),
+        ("marital_status", "marital_status"),
+        ("phone_number", "phone_number"),
+        ("email", "email"),
+        ("nationality", "nationality"),
+        ("national_id", "national_id"),
+        ("district", "district"),
+        ("entry_date", "entry_date"),
+        ("exit_date", "exit_date"),
+        ("current_status", "current_state__status"),
+        ("current_course", "current_state__course_class__course__name"),
+        ("current_course_class", "current_state__course_class__name"),
+        ("current_term", "current_state__term__name"),
+    )
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             return StudentWriteSerializer
         return StudentReadSerializer
 
+    def direct_upload_stem(self, obj):
+        return f"students/{obj.spin}"  # same key as upload_photo
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action in ("list", "retrieve", "search"):
+            # current status/class/term through the projection (single join)
+            qs = with_current_state(qs)
+        return qs
+
     @extend_schema(
         request=StudentPhotoUploadSerializer,
         responses={200: PhotoUploadResponseSerializer},
@@ -63,6 +114,12 @@ class StudentViewSet(ScopedModelViewSet):
 
         # Save via Django storage (configured to MinIO below)
         student.photo.save(object_key, file, save=True)
+        schedule_variants(
+            student,
+            source_field="photo",
+            variants_field="photo_variants",
+            source_key=student.photo.name,
+        )
 
         return Response({"photo_url": public_media_url(student.photo.name)}, status=200)
 
@@ -77,42 +134,25 @@ class StudentViewSet(ScopedModelViewSet):
                 {"detail": "first_name, last_name, date_of_birth are required."},
                 status=400,
             )
-        from .services.dedup import has_potential_duplicate
+        from .services.dedup import has_potential_duplicate, possible_duplicates
 
-        exists = has_potential_duplicate(self.get_institute_id(), first, last, dob)
-        return Response({"duplicate": exists})
+        iid = self.get_institute_id()
+        exists = has_potential_duplicate(iid, first, last, dob)
+        # near-duplicates for review; "duplicate" alone decides blocking
+        candidates = possible_duplicates(iid, first, last, dob)
+        return Response({"duplicate": exists, "candidates": candidates})
 
     @action(detail=True, methods=["get"], url_path="offered-classes")
     def offered_classes(self, request, pk=None):
         """
         List classes that currently have >=1 instructor linked.
-        Sorted by course name, class number.
+        Sorted by course name, class number; served from the cached course
+        catalog (ETag / 304).
         """
-        from apps.courses.models import CourseClass, CourseInstructor
-
-        iid = self.get_institute_id()
-
-        cls_ids = (
-            CourseInstructor.all_objects.filter(institute_id=iid)
-            .values_list("course_class_id", flat=True)
-            .distinct()
-        )
+        from apps.courses.catalog import catalog_response
 
-        qs = CourseClass.all_objects.filter(
-            institute_id=iid, id__in=cls_ids
-        ).select_related("course")
-        data = [
-            {
-                "id": cc.id,
-                "course_name": cc.course.name,
-                "abbr_name": cc.course.abbr_name,
-                "class_number": cc.class_number,
-                "classes_total": cc.course.classes_total,
-            }
-            for cc in qs
-        ]
-        return Response(
-            sorted(data, key=lambda x: (x["course_name"], x["class_number"]))
+        return catalog_response(
+            request, self.get_institute_id(), lambda catalog: catalog.offered_classes()
         )
 
     @action(detail=True, methods=["get"], url_path="statuses/allowed-next")
@@ -127,13 +167,42 @@ class StudentViewSet(ScopedModelViewSet):
                 {"detail": "course_class query param is required."}, status=400
             )
 
-        qs = StudentStatus.all_objects.filter(
-            institute_id=iid, student_id=pk, course_class_id=ccid
-        ).order_by("-is_active", "-effective_at", "-id")
-        current = qs.filter(is_active=True).first() or qs.first()
-        code = current.status if current else None
+        # latest active row, otherwise latest row (one indexed lookup)
+        code = (
+            StudentStatus.all_objects.filter(
+                institute_id=iid, student_id=pk, course_class_id=ccid
+            )
+            .order_by("-is_active", "-effective_at", "-id")
+            .values_list("status", flat=True)
+            .first()
+        )
         return Response(sorted(StudentStatus.ALLOWED.get(code, set())))
 
+    @extend_schema(
+        request=AllowedNextBatchSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        summary="Allowed next statuses for many (student, course_class) pairs",
+    )
+    @action(detail=False, methods=["post"], url_path="statuses/allowed-next")
+    def allowed_next_statuses_batch(self, request):
+        """
+        POST /api/students/statuses/allowed-next/
+        {pairs: [{student, course_class}, ...]} | {course_class, students?}
+        -> {"<student>": {"<course_class>": [statuses]}} from one query
+        """
+        iid = self.get_institute_id()
+        s = AllowedNextBatchSerializer(
+            data=request.data, context={"institute_id": iid}
+        )
+        s.is_valid(raise_exception=True)
+        return Response(
+            allowed_next_map(
+                iid,
+                s.validated_data["pairs"],
+                course_class_id=s.validated_data.get("course_class"),
+            )
+        )
+
     @action(
         detail=False,
         methods=["post"],
@@ -142,23 +211,37 @@ class StudentViewSet(ScopedModelViewSet):
     )
     def import_xlsx(self, request):
         """
-        POST /api/students/import-xlsx?commit=0|1&atomic=0|1
+        POST /api/students/import-xlsx?commit=0|1&atomic=0|1&async=0|1
 
         - commit=0 (default): dry-run (validate only)
         - commit=1: create records
         - atomic=1 with commit=1 makes it all-or-nothing
+        - async=1: queue the file and return 202 {job_id}; poll
+          /api/student-import-jobs/{id}/ and page through .../rows/
         """
         file = request.FILES.get("file")
         if not file:
             return Response({"detail": "Upload a file as 'file'."}, status=400)
 
-        commit = request.query_params.get("commit", "0").lower() in {"1", "true", "yes"}
-        atomic = request.query_params.get("atomic", "0").lower() in {"1", "true", "yes"}
+        truthy = {"1", "true", "yes"}
+        commit = request.query_params.get("commit", "0").lower() in truthy
+        atomic = request.query_params.get("atomic", "0").lower() in truthy
+
+        if request.query_params.get("async", "0").lower() in truthy:
+            job = enqueue_import_job(
+                institute_id=self.get_institute_id(),
+                user=request.user,
+                file_obj=file,
+                commit=commit,
+                atomic=atomic,
+            )
+            return Response(
+                {"job_id": job.id, "status": job.status},
+                status=drf_status.HTTP_202_ACCEPTED,
+            )
 
         if commit and atomic:
             # A single transaction for the whole file:
-            from django.db import transaction
-
             with transaction.atomic():
                 payload = import_students_xlsx(request, file, commit=True, atomic=True)
         else:
@@ -211,14 +294,27 @@ class StudentViewSet(ScopedModelViewSet):
         return resp
 
 
-class StudentCustodianViewSet(ScopedModelViewSet):
+class StudentCustodianViewSet(FuzzySearchMixin, ScopedModelViewSet):
     model = StudentCustodian
     serializer_class = StudentCustodianSerializer
     # perform_create inherited sets institute_id
 
 
-class StudentStatusViewSet(ScopedModelViewSet):
+class StudentStatusViewSet(ExportMixin, ScopedModelViewSet):
     model = StudentStatus
+    export_filename = "student_statuses"
+    export_columns = (
+        ("spin", "student__spin"),
+        ("first_name", "student__first_name"),
+        ("last_name", "student__last_name"),
+        ("status", "status"),
+        ("course", "course_class__course__name"),
+        ("course_class", "course_class__name"),
+        ("effective_at", "effective_at"),
+        ("is_active", "is_active"),
+        ("note", "note"),
+        ("term", "term__name"),
+    )
 
     def get_serializer_class(self):
         return (
@@ -232,7 +328,9 @@ class StudentStatusViewSet(ScopedModelViewSet):
             super()
             .get_queryset()
             .filter(institute_id=self.get_institute_id())
-            .select_related("student", "course_class", "course_class__course")
+            .select_related(
+                "student", "course_class", "course_class__course", "created_by"
+            )
             .order_by("-is_active", "-effective_at", "-id")
         )
         p = self.request.query_params
@@ -242,10 +340,13 @@ class StudentStatusViewSet(ScopedModelViewSet):
             qs = qs.filter(course_class_id=ccid)
         if st := p.get("status"):
             qs = qs.filter(status=st)
+        if tid := p.get("term"):
+            qs = qs.filter(term_id=tid)
         if "is_active" in p:
             qs = qs.filter(is_active=p.get("is_active") in {"1", "true", "True"})
         return qs
 
+    @transaction.atomic
     def perform_create(self, serializer):
         # Same-class deactivation remains, service also deactivates defensively
         iid = self.get_institute_id()
@@ -255,3 +356,136 @@ class StudentStatusViewSet(ScopedModelViewSet):
             institute_id=iid, student=student, course_class=cc, is_active=True
         ).update(is_active=False)
         serializer.save(is_active=True, institute_id=iid)
+        refresh_student_states([student.id])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        row = serializer.save()
+        refresh_student_states([row.student_id])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        student_id = instance.student_id
+        instance.delete()
+        refresh_student_states([student_id])
+
+    @extend_schema(
+        request=StudentStatusBulkSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        summary="Apply one status transition to many students of a class",
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        {students: [ids], course_class, status, effective_at?, note?,
+         commit? (false = validate only), atomic? (all or nothing)}
+        -> per-student outcomes, like the XLSX import report.
+        """
+        from apps.employees.models import Employee
+
+        s = StudentStatusBulkSerializer(data=request.data, context={"request": request})
+        s.is_valid(raise_exception=True)
+        d = s.validated_data
+        outcomes = bulk_set_status(
+            institute_id=self.get_institute_id(),
+            student_ids=d["students"],
+            course_class=d["course_class"],
+            new_status=d["status"],
+            effective_at=d.get("effective_at"),
+            note=d["note"],
+            created_by_id=Employee.all_objects.filter(system_user=request.user)
+            .values_list("id", flat=True)
+            .first(),
+            commit=d["commit"],
+            atomic=d["atomic"],
+        )
+        summary = {"created": 0, "validated": 0, "errors": 0}
+        for o in outcomes:
+            summary["errors" if o.action == "error" else o.action] += 1
+        return Response(
+            {
+                "summary": {
+                    **summary,
+                    "total": len(outcomes),
+                    "commit": d["commit"],
+                    "atomic": d["atomic"],
+                },
+                "rows": [o.__dict__ for o in outcomes],
+            }
+        )
+
+
+class EnrollmentStatsViewSet(viewsets.ViewSet):
+    """
+    GET /api/enrollment-stats/?term=&course_class=&course=
+    Status counts per term and course class, read from the EnrollmentRollup table.
+    """
+
+    permission_classes = [IsAuthenticated, HasInstitute]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("term", OpenApiTypes.INT),
+            OpenApiParameter("course_class", OpenApiTypes.INT),
+            OpenApiParameter("course", OpenApiTypes.INT),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        summary="Enrollment statistics by term, course class and status",
+    )
+    def list(self, request):
+        p = request.query_params
+        try:
+            filters = {
+                name: int(p[param])
+                for name, param in (
+                    ("term_id", "term"),
+                    ("course_class_id", "course_class"),
+                    ("course_id", "course"),
+                )
+                if p.get(param)
+            }
+        except ValueError:
+            return Response(
+                {"detail": "term / course_class / course must be ids."},
+                status=drf_status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(enrollment_stats(request.user.institute_id, **filters))
+
+
+class ImportRowPagination(KeysetPagination):
+    opt_in = False  # row reports can be large: always paginated
+    page_size = 100
+
+
+class StudentImportJobViewSet(
+    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """
+    GET /api/student-import-jobs/                progress of queued/finished imports
+    GET /api/student-import-jobs/{id}/
+    GET /api/student-import-jobs/{id}/rows/?action=error
+    """
+
+    permission_classes = [IsAuthenticated, HasInstitute]
+    serializer_class = StudentImportJobSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        iid = getattr(self.request.user, "institute_id", None)
+        if not iid:
+            return StudentImportJob.all_objects.none()
+        return StudentImportJob.all_objects.filter(institute_id=iid).defer(
+            "file_data"
+        )
+
+    @extend_schema(responses={200: StudentImportRowSerializer(many=True)})
+    @action(detail=True, methods=["get"], url_path="rows")
+    def rows(self, request, pk=None):
+        job = self.get_object()
+        qs = job.rows.all()
+        if act := request.query_params.get("action"):
+            qs = qs.filter(action=act)
+        paginator = ImportRowPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        data = StudentImportRowSerializer(page, many=True).data
+        return paginator.get_paginated_response(data)
@@ -9,6 +9,9 @@ class TermsConfig(AppConfig):
     label = "terms"
 
     def ready(self):
+        # Import signal handlers (term calendar invalidation)
+        from . import signals  # noqa: F401
+
         # Check and send low term count alerts on startup
         # Only run once per process (main process only, not autoreloader workers)
         # RUN_MAIN is set by Django's autoreloader to identify the main process
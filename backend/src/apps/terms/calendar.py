@@ -0,0 +1,82 @@
+"""
+Per-institute term calendar: the institute's terms as a sorted array searched
+with bisect, cached per process and invalidated through the
+"terms:<institute_id>" CacheVersion stamp (bumped by apps/terms/signals.py).
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+from apps.common.cache_versions import VersionedCache
+
+from .models import AcademicTerm
+
+
+@dataclass(frozen=True)
+class TermEntry:
+    start_date: date
+    end_date: date
+    id: int
+    name: str
+
+
+class TermCalendar:
+    def __init__(self, entries: List[TermEntry]):
+        self.entries = sorted(entries, key=lambda e: (e.start_date, e.id))
+        self._starts = [e.start_date for e in self.entries]
+        self._by_id: Dict[int, TermEntry] = {e.id: e for e in self.entries}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, term_id: Optional[int]) -> Optional[TermEntry]:
+        return self._by_id.get(term_id)
+
+    def last_started(self, d: date) -> Optional[TermEntry]:
+        """Latest term with start_date <= d."""
+        i = bisect_right(self._starts, d)
+        return self.entries[i - 1] if i else None
+
+    def containing(self, d: date) -> Optional[TermEntry]:
+        """Term whose [start_date, end_date] contains d (latest start wins)."""
+        i = bisect_right(self._starts, d)
+        # walk back from the last started term rather than trusting the
+        # no-overlap rule (AcademicTerm.clean) for older rows; a few dozen entries
+        for e in reversed(self.entries[:i]):
+            if e.end_date >= d:
+                return e
+        return None
+
+    def next_after(self, d: date) -> Optional[TermEntry]:
+        """Earliest term with start_date > d."""
+        i = bisect_right(self._starts, d)
+        return self.entries[i] if i < len(self.entries) else None
+
+    def latest_ended(self) -> Optional[TermEntry]:
+        return max(self.entries, key=lambda e: e.end_date, default=None)
+
+
+def version_key(institute_id: int) -> str:
+    return f"terms:{institute_id}"
+
+
+def _load(institute_id: int) -> TermCalendar:
+    rows = AcademicTerm.objects.filter(institute_id=institute_id).values_list(
+        "start_date", "end_date", "id", "name"
+    )
+    return TermCalendar([TermEntry(*r) for r in rows])
+
+
+_calendars: VersionedCache[TermCalendar] = VersionedCache(version_key, _load)
+
+
+def get_term_calendar(institute_id: int) -> TermCalendar:
+    return _calendars.get(institute_id)
+
+
+def invalidate_term_calendar(institute_id: int) -> None:
+    _calendars.invalidate(institute_id)
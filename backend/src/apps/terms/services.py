@@ -5,6 +5,7 @@ from django.utils import timezone
 from datetime import date
 from django.db import connection, transaction
 from django.db.models import Q
+from .calendar import TermEntry, get_term_calendar
 from .models import AcademicTerm
 
 _PREFIX_RE = re.compile(r"^T(\d{4})_(\d+)$")
@@ -73,31 +74,24 @@ def create_term_with_auto_name(
 
 def get_nearest_term(
     institute_id: int, as_of: date | None = None
-) -> AcademicTerm | None:
+) -> TermEntry | None:
     """
     Returns the term covering 'as_of' (default today). If none:
       - next upcoming (min by start_date >= as_of),
       - else the most recent past (max by end_date < as_of),
       - else None if no terms exist.
+    Served from the cached term calendar (no query on a warm cache).
     """
     d = as_of or date.today()
-    qs = AcademicTerm.objects.filter(institute_id=institute_id)
-    current = (
-        qs.filter(start_date__lte=d, end_date__gte=d).order_by("-start_date").first()
-    )
-    if current:
-        return current
-    upcoming = qs.filter(start_date__gt=d).order_by("start_date").first()
-    if upcoming:
-        return upcoming
-    return qs.order_by("-end_date").first()
+    cal = get_term_calendar(institute_id)
+    return cal.containing(d) or cal.next_after(d) or cal.latest_ended()
 
 
 @dataclass(frozen=True)
 class TermSelection:
-    chosen: AcademicTerm
-    current: AcademicTerm | None
-    next_: AcademicTerm | None
+    chosen: TermEntry
+    current: TermEntry | None
+    next_: TermEntry | None
     term_no: int  # <-- expose the parsed number
 
 
@@ -106,9 +100,9 @@ def pick_term_by_closeness(
 ) -> TermSelection:
     d = enquiry_date or timezone.localdate()
 
-    qs = AcademicTerm.objects.filter(institute_id=institute_id).order_by("start_date")
-    current = qs.filter(start_date__lte=d).last()
-    next_ = qs.filter(start_date__gt=d).first()
+    cal = get_term_calendar(institute_id)
+    current = cal.last_started(d)
+    next_ = cal.next_after(d)
 
     if current and next_:
         diff_curr = abs((d - current.start_date).days)
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .calendar import invalidate_term_calendar
+from .models import AcademicTerm
+
+
+@receiver(post_save, sender=AcademicTerm)
+@receiver(post_delete, sender=AcademicTerm)
+def term_calendar_changed(sender, instance, **kwargs):
+    """Every process drops its cached calendar for the institute."""
+    invalidate_term_calendar(instance.institute_id)
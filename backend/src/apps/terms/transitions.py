@@ -0,0 +1,119 @@
+# apps/terms/transitions.py
+"""
+Set-based "move students" term transition: every student whose latest active
+status is ACTIVE gets that row closed and a fresh ACTIVE row (same class)
+effective at the next term's start. A constant number of statements no matter
+how many students are moved.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Dict, List, Tuple
+
+from django.db.models import Subquery
+from django.utils import timezone
+
+from apps.courses.models import CourseClass
+from apps.students.models import Status, StudentStatus
+from apps.students.services.current_state import refresh_student_states
+from apps.students.services.enrollment_stats import apply_rollup_deltas, count_rows
+
+from .calendar import TermEntry
+
+
+@dataclass(frozen=True)
+class MoveCandidate:
+    status_id: int
+    student_id: int
+    course_class_id: int
+
+
+def latest_active_statuses(institute_id: int):
+    """Per student: the latest is_active status row (DISTINCT ON student)."""
+    return (
+        StudentStatus.all_objects.filter(institute_id=institute_id, is_active=True)
+        .order_by("student_id", "-effective_at", "-id")
+        .distinct("student_id")
+    )
+
+
+def move_candidates(institute_id: int, *, lock: bool = False) -> List[MoveCandidate]:
+    """
+    One statement: latest active rows that are ACTIVE. With lock=True the rows
+    are locked (FOR UPDATE on the outer select; DISTINCT ON cannot be locked).
+    """
+    qs = StudentStatus.all_objects.filter(
+        id__in=Subquery(latest_active_statuses(institute_id).values("id")),
+        status=Status.ACTIVE,
+    ).order_by("id")
+    if lock:
+        qs = qs.select_for_update()
+    return [
+        MoveCandidate(*row)
+        for row in qs.values_list("id", "student_id", "course_class_id")
+    ]
+
+
+def class_breakdown(candidates: List[MoveCandidate]) -> List[Dict]:
+    counts = Counter(c.course_class_id for c in candidates)
+    classes = {
+        cc.id: cc
+        for cc in CourseClass.objects.filter(id__in=counts).select_related("course")
+    }
+    out = []
+    for ccid, n in counts.items():
+        cc = classes.get(ccid)
+        out.append(
+            {
+                "course_class": ccid,
+                "class_name": cc.name if cc else None,
+                "course_name": cc.course.name if cc else None,
+                "students": n,
+            }
+        )
+    return sorted(out, key=lambda r: (r["course_name"] or "", r["class_name"] or ""))
+
+
+def preview_move(institute_id: int) -> Tuple[List[MoveCandidate], List[Dict]]:
+    candidates = move_candidates(institute_id)
+    return candidates, class_breakdown(candidates)
+
+
+def execute_move(institute_id: int, next_term: TermEntry) -> List[MoveCandidate]:
+    """
+    Run inside a transaction: lock + select, one bulk UPDATE, one bulk INSERT,
+    then the current-state projection refresh for the moved students.
+    """
+    candidates = move_candidates(institute_id, lock=True)
+    if not candidates:
+        return candidates
+
+    StudentStatus.all_objects.filter(id__in=[c.status_id for c in candidates]).update(
+        is_active=False
+    )
+
+    effective_at = timezone.make_aware(datetime.combine(next_term.start_date, time.min))
+    note = f"Moved to term {next_term.name} by term transition"
+    created = StudentStatus.all_objects.bulk_create(
+        [
+            StudentStatus(
+                institute_id=institute_id,
+                student_id=c.student_id,
+                status=Status.ACTIVE,
+                course_class_id=c.course_class_id,  # Keep same class
+                effective_at=effective_at,
+                term_id=next_term.id,  # bulk_create skips the pre_save resolution
+                is_active=True,
+                note=note,
+            )
+            for c in candidates
+        ],
+        batch_size=2000,
+    )
+    # bulk_create sends no signals: count the new rows into the rollup here
+    apply_rollup_deltas(count_rows(created))
+
+    refresh_student_states([c.student_id for c in candidates])
+    return candidates
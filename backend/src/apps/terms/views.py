@@ -13,6 +13,8 @@ from .serializers import (
     NextNameResponseSerializer,
 )
 from .services import compute_next_term_name
+from .calendar import get_term_calendar
+from .transitions import execute_move, preview_move
 
 
 class AcademicTermViewSet(ScopedModelViewSet):
@@ -65,7 +67,9 @@ class AcademicTermViewSet(ScopedModelViewSet):
         description=(
             "Bulk move of ACTIVE students to the next term (keeping same class). "
             "Can only be executed once per term, within 1 week after term end date. "
-            "Only available for director and registrar roles."
+            "Only available for director and registrar roles. "
+            "With ?dry_run=1 nothing is written: returns the number of students "
+            "that would move and a per-class breakdown."
         ),
     )
     @action(detail=True, methods=["post"], url_path="move-students")
@@ -76,10 +80,8 @@ class AcademicTermViewSet(ScopedModelViewSet):
         - Current date must be within 1 week after term end date
         - Transition must not have been executed already
         - User must have director or registrar role
+        ?dry_run=1 previews counts without writing (window/executed reported as flags).
         """
-        from apps.students.models import Student, StudentStatus, Status
-        from apps.courses.models import CourseClass
-
         from django.contrib.auth.models import Group
         from apps.employees.models import Employee, EmployeeCareer
 
@@ -123,105 +125,67 @@ class AcademicTermViewSet(ScopedModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Check if within 1 week after term end
+        # Window: within 1 week after term end
         today = timezone.now().date()
         one_week_after_end = term.end_date + timedelta(days=7)
-
+        window_error = None
         if today < term.end_date:
-            return Response(
-                {"error": f"Cannot move students before term ends on {term.end_date}."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if today > one_week_after_end:
-            return Response(
-                {"error": f"Move students window expired on {one_week_after_end}."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Get or create TermTransition record
-        transition, created = TermTransition.objects.get_or_create(
-            term=term,
-            institute_id=institute_id,
-        )
-
-        # Check if already executed
-        if transition.transition_executed_at:
+            window_error = f"Cannot move students before term ends on {term.end_date}."
+        elif today > one_week_after_end:
+            window_error = f"Move students window expired on {one_week_after_end}."
+
+        transition = TermTransition.objects.filter(
+            term=term, institute_id=institute_id
+        ).first()
+        next_term = get_term_calendar(institute_id).next_after(term.end_date)
+
+        if request.query_params.get("dry_run") in ("1", "true", "True"):
+            # Preview only: nothing is written, blockers are reported as flags
+            candidates, breakdown = preview_move(institute_id)
             return Response(
                 {
-                    "error": f"Students already moved on {transition.transition_executed_at}.",
-                    "executed_by": transition.executed_by,
-                    "students_moved": transition.students_moved_count,
+                    "dry_run": True,
+                    "students_to_move": len(candidates),
+                    "classes": breakdown,
+                    "next_term": next_term.name if next_term else None,
+                    "window_open": window_error is None,
+                    "already_executed": bool(
+                        transition and transition.transition_executed_at
+                    ),
                 },
-                status=status.HTTP_400_BAD_REQUEST,
+                status=status.HTTP_200_OK,
             )
 
-        # Find the next term
-        next_term = (
-            AcademicTerm.objects.filter(
-                institute_id=institute_id, start_date__gt=term.end_date
-            )
-            .order_by("start_date")
-            .first()
-        )
+        if window_error:
+            return Response({"error": window_error}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not next_term:
-            return Response(
-                {"error": "No upcoming term found to move students to."},
-                status=status.HTTP_400_BAD_REQUEST,
+        with transaction.atomic():
+            # Get or create TermTransition record, locked so two concurrent
+            # requests cannot both run the move
+            TermTransition.objects.get_or_create(term=term, institute_id=institute_id)
+            transition = TermTransition.objects.select_for_update().get(
+                term=term, institute_id=institute_id
             )
 
-        # Begin transaction
-        students_moved = 0
-        with transaction.atomic():
-            # Get all students for this institute (use all_objects to bypass scoping)
-            active_students = Student.all_objects.filter(
-                institute_id=institute_id
-            ).select_related("institute")
-
-            for student in active_students:
-                print(f"Processing student: {student.first_name} {student.last_name} (ID: {student.id})")
-
-                # Get latest active status
-                latest_status = (
-                    StudentStatus.all_objects.filter(student=student, is_active=True)
-                    .select_related("course_class", "course_class__course")
-                    .order_by("-effective_at", "-id")
-                    .first()
+            # Check if already executed
+            if transition.transition_executed_at:
+                return Response(
+                    {
+                        "error": f"Students already moved on {transition.transition_executed_at}.",
+                        "executed_by": transition.executed_by,
+                        "students_moved": transition.students_moved_count,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
 
-                print(f"  Latest status: {latest_status}")
-                if latest_status:
-                    print(f"    Status code: {latest_status.status}")
-                    print(f"    Is active: {latest_status.is_active}")
-
-                if not latest_status or latest_status.status != Status.ACTIVE:
-                    print(f"  Skipping: No active status or status != ACTIVE")
-                    continue  # Skip non-active students
-
-                current_class = latest_status.course_class
-                if not current_class:
-                    print(f"  Skipping: No course class")
-                    continue  # Skip students without a class
-
-                print(f"  Current class: {current_class.name}")
-
-                # Deactivate current status
-                latest_status.is_active = False
-                latest_status.save(update_fields=["is_active"])
-
-                # Create new status for next term (same class, same status)
-                StudentStatus.all_objects.create(
-                    student=student,
-                    status=Status.ACTIVE,
-                    course_class=current_class,  # Keep same class
-                    effective_at=next_term.start_date,
-                    is_active=True,
-                    note=f"Moved to term {next_term.name} by term transition",
-                    institute_id=institute_id,
+            if not next_term:
+                return Response(
+                    {"error": "No upcoming term found to move students to."},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
 
-                students_moved += 1
+            # Select, close and re-open the ACTIVE statuses as set-based statements
+            students_moved = len(execute_move(institute_id, next_term))
 
             # Update transition record
             transition.transition_executed_at = timezone.now()
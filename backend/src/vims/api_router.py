@@ -1,8 +1,10 @@
 from rest_framework.routers import DefaultRouter
 
 from apps.students.views import (
+    EnrollmentStatsViewSet,
     StudentViewSet,
     StudentCustodianViewSet,
+    StudentImportJobViewSet,
     StudentStatusViewSet,
 )
 from apps.employees.views import (
@@ -19,6 +21,7 @@ from apps.courses.views import (
 from apps.finance.views import (
     AccountTypeViewSet,
     FinanceAccountViewSet,
+    FinanceReportViewSet,
     LedgerEntryViewSet,
 )
 from apps.institutes.views import InstituteAdminViewSet, InstituteViewSet
@@ -49,6 +52,10 @@ router.register(
     r"student-custodians", StudentCustodianViewSet, basename="student-custodians"
 )
 router.register(r"student-statuses", StudentStatusViewSet, basename="student-statuses")
+router.register(
+    r"student-import-jobs", StudentImportJobViewSet, basename="student-import-jobs"
+)
+router.register(r"enrollment-stats", EnrollmentStatsViewSet, basename="enrollment-stats")
 
 # EMPLOYEE ENDPOINTS
 router.register(r"employees", EmployeeViewSet, basename="employees")
@@ -73,5 +80,6 @@ router.register(
 )
 router.register(r"finance/accounts", FinanceAccountViewSet, basename="finance-accounts")
 router.register(r"finance/ledger", LedgerEntryViewSet, basename="finance-ledger")
+router.register(r"finance/reports", FinanceReportViewSet, basename="finance-reports")
 
 urlpatterns = router.urls
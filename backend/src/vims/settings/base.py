@@ -32,6 +32,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third-party
     "django_filters",
     "corsheaders",
@@ -147,6 +148,15 @@ AWS_S3_FILE_OVERWRITE = False
 
 MEDIA_PUBLIC_BASE = env("MEDIA_PUBLIC_BASE", default=None)
 
+# Photo/logo variants (apps/common/images.py): built on a thread pool after commit
+IMAGE_VARIANTS_ASYNC = env.bool("IMAGE_VARIANTS_ASYNC", default=True)
+IMAGE_VARIANTS_WORKERS = env.int("IMAGE_VARIANTS_WORKERS", default=2)
+
+# Presigned direct uploads (apps/common/direct_upload.py); DIRECT_UPLOAD_BASE is
+# the browser-facing bucket URL when AWS_S3_ENDPOINT_URL is internal-only
+DIRECT_UPLOAD_BASE = env("DIRECT_UPLOAD_BASE", default=None)
+DIRECT_UPLOAD_MAX_BYTES = env.int("DIRECT_UPLOAD_MAX_BYTES", default=10 * 1024 * 1024)
+
 # --- Email (SMTP / Plesk) ---
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = env("EMAIL_HOST", default="mail.vims4all.eu")
@@ -8,7 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from apps.institutes.models import Institute
 from apps.employees.models import Employee, EmployeeCareer
 from apps.common.media import public_media_url
-from apps.terms.models import AcademicTerm
+from apps.terms.calendar import get_term_calendar
 
 User = get_user_model()
 
@@ -60,16 +60,7 @@ class MeView(APIView):
 
             # ---- Active academic term for institute
             active_term_payload = None
-            today = datetime.today()
-            active_term = (
-                AcademicTerm.objects.filter(
-                    institute_id=iid,
-                    start_date__lte=today,
-                    end_date__gte=today,
-                )
-                .only("id", "name", "start_date", "end_date")
-                .first()
-            )
+            active_term = get_term_calendar(iid).containing(datetime.today().date())
             if active_term:
                 active_term_payload = {
                     "id": str(active_term.id),